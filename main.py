@@ -1,12 +1,175 @@
 #!/usr/bin/env python3
+import argparse
 import pathlib
+import signal
+import sys
+from typing import Optional
+
+from src import CursesGui, JmuxModel, JsonHandler, SqliteHandler, TmuxClient
+from src.business_logic import AsyncMultiplexerAdapter, AsyncTmuxClient
+from src.business_logic.autosave import Autosaver, acquire_lock
+from src.business_logic.session_codecs import CompactCodec
+from src.business_logic.session_pool import SessionPool
+from src.data_models import RestoreResult, SessionLabel
+from src.interfaces import FileHandler
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Tmux session manager")
+    parser.add_argument(
+        "--restore",
+        nargs="*",
+        metavar="NAME",
+        help="restore the named saved sessions, or all of them, and exit",
+    )
+    parser.add_argument(
+        "--save",
+        nargs="*",
+        metavar="NAME",
+        help="save the named running sessions, or all of them, and exit",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="number of sessions to restore at a time (default: 4)",
+    )
+    parser.add_argument(
+        "--autosave",
+        nargs="?",
+        type=float,
+        const=60.0,
+        metavar="SECONDS",
+        help="save the running sessions that changed every SECONDS (default: 60) "
+        "and when tmux reports changes, until tmux exits",
+    )
+    parser.add_argument(
+        "--spare-sessions",
+        type=int,
+        default=0,
+        metavar="N",
+        help="keep N hidden sessions started ahead of time, "
+        "so new sessions open instantly (default: 0)",
+    )
+    parser.add_argument(
+        "--spare-idle",
+        type=float,
+        default=3600.0,
+        metavar="SECONDS",
+        help="replace spare sessions left unused for SECONDS (default: 3600)",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["json", "compact", "sqlite"],
+        default="json",
+        help="store sessions as JSON files, compact binary files "
+        "or in a SQLite database (default: json)",
+    )
+    return parser.parse_args()
+
+
+def open_storage(
+    sessions_dir: pathlib.Path, storage: str, write_delay: Optional[float] = None
+) -> FileHandler:
+    # Restored sessions are saved again for their new ids, which are
+    # not worth a version in the history of their own.
+    if storage == "compact":
+        return JsonHandler(
+            sessions_dir,
+            codec=CompactCodec(),
+            ignore_ids=True,
+            write_delay=write_delay,
+        )
+    json_handler = JsonHandler(sessions_dir, ignore_ids=True, write_delay=write_delay)
+    if storage == "json":
+        return json_handler
+    sqlite_handler = SqliteHandler(sessions_dir, ignore_ids=True)
+    sqlite_handler.migrate(json_handler)
+    return sqlite_handler
+
+
+def print_progress(
+    result: RestoreResult, done: int, total: int, action: str = "restored"
+) -> None:
+    status = f"failed: {result.error}" if result.error else action
+    print(f"[{done}/{total}] {result.name} {status}")
+
+
+def restore(model: JmuxModel, names: list[str], jobs: int) -> int:
+    labels = None
+    if names:
+        labels = [SessionLabel("", name) for name in names]
+    results = model.restore_sessions(labels, jobs, print_progress)
+    return 1 if any(result.error for result in results) else 0
+
+
+def save(model: JmuxModel, names: list[str]) -> int:
+    labels = None
+    if names:
+        labels = [SessionLabel("", name) for name in names]
+    results: list[RestoreResult] = []
+
+    def report(result: RestoreResult, done: int, total: int) -> None:
+        results.append(result)
+        print_progress(result, done, total, "saved")
+
+    model.save_sessions(labels, report)
+    model.wait()
+    return 1 if any(result.error for result in results) else 0
+
+
+def autosave(
+    multiplexer: TmuxClient,
+    file_handler: FileHandler,
+    sessions_dir: pathlib.Path,
+    interval: float,
+) -> int:
+    if not multiplexer.is_running():
+        print("Autosave has to run inside tmux", file=sys.stderr)
+        return 1
+    # Every tmux client runs jmux.tmux, only the first one autosaves.
+    if acquire_lock(sessions_dir / "autosave.lock") is None:
+        return 0
+    autosaver = Autosaver(multiplexer, file_handler, interval)
+    multiplexer.subscribe(autosaver.notify)
+    signal.signal(signal.SIGTERM, lambda *_: autosaver.stop())
+    signal.signal(signal.SIGHUP, lambda *_: autosaver.stop())
+    autosaver.run()
+    return 0
 
-from src import CursesGui, JmuxModel, JsonHandler, TmuxClient
 
 if __name__ == "__main__":
+    args = parse_args()
     sessions_dir = pathlib.Path.home() / ".jmux"
-    file_handler = JsonHandler(sessions_dir)
-    multiplexer = TmuxClient()
-    model = JmuxModel(multiplexer, file_handler)
-    gui = CursesGui(model)
-    gui.run()
+    # Restoring and autosaving save many sessions at once, so those saves are batched.
+    write_delay = None
+    if args.restore is not None or args.save is not None:
+        write_delay = 1.0
+    elif args.autosave is not None:
+        write_delay = args.autosave
+    file_handler = open_storage(sessions_dir, args.storage, write_delay)
+    # Saving captures many sessions, which the asyncio client runs concurrently.
+    if args.save is not None:
+        multiplexer = AsyncMultiplexerAdapter(AsyncTmuxClient(control_mode=True))
+    else:
+        multiplexer = TmuxClient(control_mode=True)
+    # Only the TUI creates new sessions, so only it keeps spares.
+    pool = None
+    tui = args.restore is None and args.autosave is None and args.save is None
+    if args.spare_sessions and tui:
+        pool = SessionPool(multiplexer, args.spare_sessions, args.spare_idle)
+    model = JmuxModel(multiplexer, file_handler, pool)
+    try:
+        if args.restore is not None:
+            sys.exit(restore(model, args.restore, args.jobs))
+        if args.save is not None:
+            sys.exit(save(model, args.save))
+        if args.autosave is not None:
+            sys.exit(autosave(multiplexer, file_handler, sessions_dir, args.autosave))
+        gui = CursesGui(model)
+        gui.run()
+    finally:
+        model.close()
+        model.wait()
+        file_handler.flush()
+        multiplexer.close()
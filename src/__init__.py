@@ -1,4 +1,4 @@
-__all__ = ["CursesGui", "JmuxModel", "JsonHandler", "TmuxClient"]
+__all__ = ["CursesGui", "JmuxModel", "JsonHandler", "SqliteHandler", "TmuxClient"]
 
-from .business_logic import JmuxModel, JsonHandler, TmuxClient
+from .business_logic import JmuxModel, JsonHandler, SqliteHandler, TmuxClient
 from .tui import CursesGui
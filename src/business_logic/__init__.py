@@ -1,5 +1,15 @@
-__all__ = ["JmuxModel", "JsonHandler", "TmuxClient"]
+__all__ = [
+    "AsyncMultiplexerAdapter",
+    "AsyncTmuxClient",
+    "JmuxModel",
+    "JsonHandler",
+    "SqliteHandler",
+    "TmuxClient",
+]
 
+from .async_multiplexer_adapter import AsyncMultiplexerAdapter
+from .async_tmux_client import AsyncTmuxClient
 from .jmux_model import JmuxModel
 from .json_handler import JsonHandler
+from .sqlite_handler import SqliteHandler
 from .tmux_client import TmuxClient
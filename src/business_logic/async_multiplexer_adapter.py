@@ -0,0 +1,118 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, List, TypeVar
+
+from src.data_models import JmuxSession, SessionLabel
+from src.interfaces import AsyncMultiplexer, Multiplexer
+
+ResultType = TypeVar("ResultType")
+
+
+class AsyncMultiplexerAdapter(Multiplexer):
+    def __init__(self, multiplexer: AsyncMultiplexer) -> None:
+        """
+        Drive an AsyncMultiplexer through the Multiplexer interface,
+        so it can be used by the JmuxModel.
+        The coroutines run on an event loop in a background thread.
+        `submit` and `capture_sessions` return futures right away, so
+        independent commands overlap instead of running one by one,
+        while the other methods wait for their command like any Multiplexer.
+        """
+        if not multiplexer or not isinstance(multiplexer, AsyncMultiplexer):
+            raise ValueError("Invalid multiplexer value")
+        self.multiplexer = multiplexer
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def submit(self, coroutine: Coroutine[Any, Any, ResultType]) -> Future:
+        """
+        Schedule `coroutine` on the event loop without waiting for it.
+        The returned future resolves to its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _wait(self, coroutine: Coroutine[Any, Any, ResultType]) -> ResultType:
+        return self.submit(coroutine).result()
+
+    def close(self) -> None:
+        """
+        Stop the event loop and close the multiplexer.
+        """
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self.multiplexer.close()
+
+    def is_running(self) -> bool:
+        """
+        Check if the terminal multiplexer is running.
+        """
+        return self.multiplexer.is_running()
+
+    def list_sessions(self) -> List[SessionLabel]:
+        """
+        Get a list of all the currently running sessions.
+        """
+        return self._wait(self.multiplexer.list_sessions())
+
+    def get_current_session_label(self) -> SessionLabel:
+        """
+        Get the name and id of the currently running session.
+        """
+        return self._wait(self.multiplexer.get_current_session_label())
+
+    def get_session(self, label: SessionLabel) -> JmuxSession:
+        """
+        Get the data of the session with the id `session_id`.
+        """
+        return self._wait(self.multiplexer.get_session(label))
+
+    def get_sessions(self) -> List[JmuxSession]:
+        """
+        Get the data of all the running sessions.
+        """
+        return self._wait(self.multiplexer.get_sessions())
+
+    def capture_sessions(self, labels: List[SessionLabel]) -> List[Future]:
+        """
+        Start capturing the sessions with `labels` on the event loop,
+        and return a future of the data of each without waiting for them.
+        The captures run concurrently.
+        """
+        return [self.submit(self.multiplexer.get_session(label)) for label in labels]
+
+    def create_session(self, session: JmuxSession, focus: bool = True) -> None:
+        """
+        Create a session with the data in `session`.
+        If `focus` is set, switch to the session once it is created.
+        """
+        self._wait(self.multiplexer.create_session(session, focus))
+
+    def kill_session(self, label: SessionLabel) -> None:
+        """
+        Kill the session with the data in `session`.
+        """
+        self._wait(self.multiplexer.kill_session(label))
+
+    def rename_session(self, label: SessionLabel, new_name: str) -> None:
+        """
+        Rename the sessions name to `new_name` and update the session object.
+        """
+        self._wait(self.multiplexer.rename_session(label, new_name))
+
+    def create_new_session(self, session_name: str, focus: bool = True) -> None:
+        """
+        Create a new session with the name `session_name`.
+        If `focus` is set, switch to the session once it is created.
+        """
+        self._wait(self.multiplexer.create_new_session(session_name, focus))
+
+    def focus_session(self, label: SessionLabel) -> None:
+        """
+        Focus the session with the data in `session`.
+        """
+        self._wait(self.multiplexer.focus_session(label))
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import shutil
+import subprocess
+from typing import List, Optional
+
+from src.data_models import JmuxSession, SessionLabel
+from src.interfaces import AsyncMultiplexer
+
+from . import tmux_commands
+from .tmux_commands import CLIENT_FORMAT, LABEL_FORMAT, PANE_FORMAT
+from .tmux_control import TmuxControlMode, get_client_name
+
+
+class AsyncTmuxClient(AsyncMultiplexer):
+    def __init__(self, control_mode: bool = False) -> None:
+        """
+        Implementation of the AsyncMultiplexer interface
+        for the Tmux terminal multiplexer.
+        Commands run as asyncio subprocesses, or with `control_mode` over
+        a single persistent `tmux -C` connection, and are awaited without
+        blocking the event loop, so independent commands overlap.
+        """
+        binary = shutil.which("tmux")
+        if not binary:
+            raise FileNotFoundError("Tmux binary not found")
+        self._bin = binary
+        self._control: Optional[TmuxControlMode] = None
+        self._client_name = ""
+        if control_mode and self.is_running():
+            self._start_control_mode()
+
+    def _start_control_mode(self) -> None:
+        self._client_name = get_client_name(self._bin)
+        control = TmuxControlMode(self._bin)
+        try:
+            control.start()
+        except OSError:
+            return
+        self._control = control
+
+    def close(self) -> None:
+        """
+        Close the control mode connection, if one is open.
+        """
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+    async def _run(self, command: List[str]) -> str:
+        if self._control is not None:
+            return await asyncio.wrap_future(self._control.submit(command[1:]))
+        command = [tmux_commands.escape_argument(argument) for argument in command]
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(
+                process.returncode or 1, command, stdout.decode(), stderr.decode()
+            )
+        return stdout.decode()
+
+    async def _run_batch(self, commands: List[List[str]]) -> str:
+        return await self._run([self._bin, *tmux_commands.chain(commands)])
+
+    def _switch_client_command(self, target: str) -> List[str]:
+        client_name = self._client_name if self._control is not None else ""
+        return tmux_commands.switch_client_command(target, client_name)
+
+    def is_running(self) -> bool:
+        """
+        Check if tmux is running.
+        """
+        return os.environ.get("TMUX", "") != ""
+
+    async def list_sessions(self) -> List[SessionLabel]:
+        """
+        Get a list of all the currently running sessions.
+        """
+        if not self.is_running():
+            return []
+        command = [self._bin, "list-sessions", "-F", LABEL_FORMAT]
+        return tmux_commands.parse_labels(await self._run(command))
+
+    async def get_current_session_label(self) -> SessionLabel:
+        """
+        Get the data of the currently running tmux session.
+        """
+        if not self.is_running():
+            raise ValueError("No session is currently running")
+        if self._control is not None:
+            command = [self._bin, "list-clients", "-F", CLIENT_FORMAT]
+            output = await self._run(command)
+            label = tmux_commands.parse_client_session(output, self._client_name)
+            if label is None:
+                raise ValueError("No session is currently running")
+            return label
+        command = [self._bin, "display-message", "-p", LABEL_FORMAT]
+        session_id, session_name = (await self._run(command)).strip().split(":")
+        return SessionLabel(session_id, session_name)
+
+    async def get_session(self, label: SessionLabel) -> JmuxSession:
+        """
+        Get the data of the tmux session with the id `session_id`.
+        All windows and panes of the session are captured with a single query.
+        """
+        if not self.is_running():
+            raise ValueError(f"Session {label.name} not found")
+        command = [self._bin, "list-panes", "-s", "-t", label.id, "-F", PANE_FORMAT]
+        try:
+            sessions = tmux_commands.parse_sessions(await self._run(command))
+        except subprocess.CalledProcessError as error:
+            raise ValueError(f"Session {label.name} not found") from error
+        if not sessions or SessionLabel(sessions[0].id, sessions[0].name) != label:
+            raise ValueError(f"Session {label.name} not found")
+        return sessions[0]
+
+    async def get_sessions(self) -> List[JmuxSession]:
+        """
+        Get the data of all the running tmux sessions with a single query.
+        """
+        if not self.is_running():
+            return []
+        command = [self._bin, "list-panes", "-a", "-F", PANE_FORMAT]
+        return tmux_commands.parse_sessions(await self._run(command))
+
+    async def create_session(self, session: JmuxSession, focus: bool = True) -> None:
+        """
+        Create a new session in tmux with the data in `session`.
+        The whole session is created with a single chained tmux command.
+        If `focus` is set, switch to the session once it is created.
+        """
+        target = f"={session.name}"
+        switch_command = self._switch_client_command(target) if focus else None
+        commands = tmux_commands.compile_session(session, switch_command)
+        try:
+            output = await self._run_batch(commands)
+        except subprocess.CalledProcessError as error:
+            raise ValueError(error.stderr) from error
+        tmux_commands.assign_ids(session, output)
+
+    async def kill_session(self, label: SessionLabel) -> None:
+        """
+        Kill the tmux session with the data in `session`.
+        """
+        if label not in await self.list_sessions():
+            raise ValueError(f"Session {label.name} not found")
+        await self._run([self._bin, "kill-session", "-t", label.id])
+
+    async def rename_session(self, label: SessionLabel, new_name: str) -> None:
+        """
+        Rename the tmux session with the data in `label` to `new_name`.
+        """
+        if label not in await self.list_sessions():
+            raise ValueError(f"Session {label.name} not found")
+        label.name = new_name
+        await self._run([self._bin, "rename-session", "-t", label.id, label.name])
+
+    async def create_new_session(self, session_name: str, focus: bool = True) -> None:
+        """
+        Create a new tmux session with the name `session_name`.
+        If `focus` is set, switch to the session once it is created.
+        """
+        commands = [["new-session", "-ds", session_name]]
+        if focus:
+            commands.append(self._switch_client_command(session_name))
+        try:
+            await self._run_batch(commands)
+        except subprocess.CalledProcessError as error:
+            raise ValueError("Session already exists") from error
+
+    async def focus_session(self, label: SessionLabel) -> None:
+        """
+        Focus the tmux session with the data in `label`.
+        """
+        if label not in await self.list_sessions():
+            raise ValueError(f"Session {label.name} not found")
+        await self._run([self._bin, *self._switch_client_command(label.id)])
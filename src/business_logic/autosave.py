@@ -0,0 +1,158 @@
+import fcntl
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.interfaces import FileHandler, Multiplexer
+
+from .session_codecs import content_hash
+from .session_pool import is_spare
+
+# Control mode notifications sent when the windows or panes of a session change.
+CHANGE_NOTIFICATIONS = {
+    "layout-change",
+    "session-renamed",
+    "session-window-changed",
+    "sessions-changed",
+    "unlinked-window-add",
+    "unlinked-window-close",
+    "unlinked-window-renamed",
+    "window-add",
+    "window-close",
+    "window-pane-changed",
+    "window-renamed",
+}
+
+
+def acquire_lock(path: Path) -> Optional[int]:
+    """
+    Take an exclusive lock on the file at `path` without waiting for it.
+    Returns the file descriptor holding the lock, or None if another
+    process holds it. The lock is released when the process exits.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(lock_file)
+        return None
+    return lock_file
+
+
+class Autosaver:
+    def __init__(
+        self,
+        multiplexer: Multiplexer,
+        file_handler: FileHandler,
+        interval: float = 60.0,
+        debounce: float = 2.0,
+    ) -> None:
+        """
+        Saves the running sessions every `interval` seconds, and `debounce`
+        seconds after a burst of changes reported through `notify` has
+        settled. All sessions are captured with one query, and only the
+        sessions that changed since the last save are written.
+        The spare sessions of the session pool are never saved.
+        """
+        if interval <= 0:
+            raise ValueError("Invalid interval value")
+        if debounce < 0:
+            raise ValueError("Invalid debounce value")
+        self.multiplexer = multiplexer
+        self.file_handler = file_handler
+        self.interval = interval
+        self.debounce = debounce
+        self._hashes: Dict[str, str] = {}
+        self._changed_at: Optional[float] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._detached = threading.Event()
+
+    def notify(self, name: str, arguments: List[str]) -> None:
+        """
+        Handle a tmux notification, scheduling a save if sessions changed.
+        Only sets flags, as it is called from the control mode reader thread.
+        """
+        if name == "exit":
+            # The control client was detached, usually because the session it
+            # was attached to was killed, so `run` reconnects it.
+            self._detached.set()
+            self._wakeup.set()
+        elif name in CHANGE_NOTIFICATIONS:
+            self._changed_at = time.monotonic()
+            self._wakeup.set()
+
+    def stop(self) -> None:
+        """
+        Make `run` return after the save it is doing, if any.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+
+    def save_changed(self) -> List[str]:
+        """
+        Save the running sessions that changed since they were last saved.
+        Returns the names of the sessions written.
+        """
+        self._changed_at = None
+        sessions = [
+            session
+            for session in self.multiplexer.get_sessions()
+            if not is_spare(session.name)
+        ]
+        hashes = {session.name: content_hash(session) for session in sessions}
+        saved = []
+        for session in sessions:
+            if self._hashes.get(session.name) == hashes[session.name]:
+                continue
+            try:
+                if self.file_handler.save_session(session):
+                    saved.append(session.name)
+            except (ValueError, OSError):
+                del hashes[session.name]
+        self.file_handler.flush()
+        self._hashes = hashes
+        return saved
+
+    def run(self) -> None:
+        """
+        Save changed sessions until `stop` is called, or until the tmux
+        server is gone.
+        """
+        next_save = time.monotonic()
+        while not self._stopped.is_set():
+            if self._detached.is_set():
+                self._detached.clear()
+                if not self._reconnect():
+                    return
+            now = time.monotonic()
+            changed_at = self._changed_at
+            if now >= next_save or (
+                changed_at is not None and now - changed_at >= self.debounce
+            ):
+                try:
+                    self.save_changed()
+                except (ValueError, OSError, subprocess.SubprocessError):
+                    # tmux or the disk failing once should not end autosaving.
+                    pass
+                next_save = time.monotonic() + self.interval
+                continue
+            deadline = next_save
+            if changed_at is not None:
+                deadline = min(deadline, changed_at + self.debounce)
+            self._wakeup.wait(deadline - now)
+            self._wakeup.clear()
+
+    def _reconnect(self) -> bool:
+        # Listing the sessions attaches a new control client, which fails
+        # once the server has exited.
+        try:
+            self.multiplexer.list_sessions()
+        except (ValueError, OSError, subprocess.SubprocessError):
+            return False
+        self._changed_at = time.monotonic()
+        return True
@@ -0,0 +1,57 @@
+import subprocess
+import threading
+from typing import Callable, Hashable, Optional
+
+
+class ChangeWatcher:
+    def __init__(
+        self,
+        probe: Callable[[], Hashable],
+        callback: Callable[[], None],
+        interval: float = 1.0,
+    ) -> None:
+        """
+        Calls `probe` every `interval` seconds in a background thread,
+        and `callback` from that thread whenever its value changes.
+        `probe` should be cheap, like the modification time of a folder.
+        """
+        if interval <= 0:
+            raise ValueError("Invalid interval value")
+        self.probe = probe
+        self.callback = callback
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start watching, taking the current value of `probe` as unchanged.
+        """
+        if self._thread is not None:
+            return
+        value = self._probe()
+        self._thread = threading.Thread(target=self._run, args=(value,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop watching and wait for the watching thread to end.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _probe(self) -> Hashable:
+        try:
+            return self.probe()
+        except (ValueError, OSError, subprocess.SubprocessError) as error:
+            # A failing probe is a value too, so recovering from it is a change.
+            return type(error)
+
+    def _run(self, value: Hashable) -> None:
+        while not self._stopped.wait(self.interval):
+            current = self._probe()
+            if current != value:
+                value = current
+                self.callback()
@@ -1,15 +1,51 @@
-from typing import List
+import functools
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Hashable, Iterator, List, Optional, TypeVar
 
-from src.data_models import SessionLabel
+from src.data_models import (
+    JmuxSession,
+    JmuxWindow,
+    RestoreResult,
+    SessionLabel,
+    SessionSnapshot,
+)
 from src.interfaces import FileHandler, Model, Multiplexer
 
+from .change_watcher import ChangeWatcher
+from .session_pool import SessionPool, is_spare
+from .tmux_client import SESSION_NOTIFICATIONS
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _publishes_change(method: F) -> F:
+    # Tell subscribers once the method is done, even if it failed part way.
+    @functools.wraps(method)
+    def wrapper(self: "JmuxModel", *args: Any, **kwargs: Any) -> Any:
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._publish_change()
+
+    return wrapper  # type: ignore[return-value]
+
 
 class JmuxModel(Model):
-    def __init__(self, multiplexer: Multiplexer, file_handler: FileHandler) -> None:
+    def __init__(
+        self,
+        multiplexer: Multiplexer,
+        file_handler: FileHandler,
+        pool: Optional[SessionPool] = None,
+    ) -> None:
         """
         Class for the model of the jmux application.
         Responsible for communicating with the presenter.
         Implements the Model interface.
+        With `pool` new sessions are taken from its spare sessions,
+        which are hidden from the running sessions, and the pool is
+        refilled in the background when the model starts and after each.
         """
         if not multiplexer or not isinstance(multiplexer, Multiplexer):
             raise ValueError("Invalid multiplexer value")
@@ -17,31 +53,222 @@ class JmuxModel(Model):
         if not file_handler or not isinstance(file_handler, FileHandler):
             raise ValueError("Invalid file_handler value")
         self.file_handler = file_handler
+        self._snapshot: Optional[SessionSnapshot] = None
+        self._workers: List[threading.Thread] = []
+        self._subscribers: List[Callable[[], None]] = []
+        self._watchers: List[ChangeWatcher] = []
+        self.pool = pool
+        if self.pool is not None:
+            self._start_worker(self._refill_pool)
 
+    @_publishes_change
     def create_session(self, session_name: str) -> None:
         """
         Create a new session in the terminal multiplexer with the name `session_name`.
         """
+        self.invalidate_snapshot()
+        if self.pool is not None:
+            if session_name in {
+                label.name for label in self.multiplexer.list_sessions()
+            }:
+                raise ValueError("Session already exists")
+            if self.pool.claim(session_name):
+                self._start_worker(self._refill_pool)
+                return
         self.multiplexer.create_new_session(session_name)
 
-    def save_session(self, label: SessionLabel) -> None:
+    def _refill_pool(self) -> None:
+        assert self.pool is not None
+        try:
+            self.pool.refill()
+        except (ValueError, OSError, subprocess.SubprocessError):
+            # Without spares new sessions are only slower to start.
+            pass
+
+    def _start_worker(self, target: Callable[..., None], *args: object) -> None:
+        worker = threading.Thread(target=target, args=args)
+        self._workers = [thread for thread in self._workers if thread.is_alive()]
+        self._workers.append(worker)
+        worker.start()
+
+    @_publishes_change
+    def save_session(self, label: SessionLabel) -> bool:
         """
         Save the session with `label` to a file.
+        Returns False if the saved session was unchanged and nothing was written.
         """
+        self.invalidate_snapshot()
         session = self.multiplexer.get_session(label)
-        self.file_handler.save_session(session)
+        return self.file_handler.save_session(session)
+
+    def save_sessions(
+        self,
+        labels: Optional[List[SessionLabel]] = None,
+        on_progress: Optional[Callable[[RestoreResult, int, int], None]] = None,
+    ) -> None:
+        """
+        Save the running sessions with `labels`, or every running session.
+        The sessions are captured and saved in a background thread, so this
+        returns right away, and `wait` waits for them. All captures are
+        started at once, so they overlap when the multiplexer can run
+        them concurrently. `on_progress` is called from that thread with
+        the result of each session, the number of sessions done and their total.
+        """
+        self._start_worker(self._save_sessions, labels, on_progress)
+
+    def _save_sessions(
+        self,
+        labels: Optional[List[SessionLabel]],
+        on_progress: Optional[Callable[[RestoreResult, int, int], None]],
+    ) -> None:
+        try:
+            try:
+                running = {label.name: label for label in self.list_running_sessions()}
+            except (ValueError, OSError, subprocess.SubprocessError):
+                # Without a reachable multiplexer no session is running.
+                running = {}
+            if labels is None:
+                labels = list(running.values())
+            found = [running[label.name] for label in labels if label.name in running]
+            captures = dict(
+                zip(
+                    [label.name for label in found],
+                    self.multiplexer.capture_sessions(found),
+                )
+            )
+            for done, label in enumerate(labels, 1):
+                result = self._save_capture(label, captures.get(label.name))
+                if on_progress is not None:
+                    on_progress(result, done, len(labels))
+        finally:
+            self._publish_change()
+
+    def _save_capture(
+        self, label: SessionLabel, capture: Optional[Future]
+    ) -> RestoreResult:
+        try:
+            if capture is None:
+                raise ValueError(f"Session {label.name} is not running")
+            self.file_handler.save_session(capture.result())
+        except (ValueError, OSError) as error:
+            return RestoreResult(label.name, str(error) or type(error).__name__)
+        return RestoreResult(label.name)
 
-    def load_session(self, label: SessionLabel) -> None:
+    @_publishes_change
+    def load_session(
+        self,
+        label: SessionLabel,
+        on_progress: Optional[Callable[[RestoreResult, int, int], None]] = None,
+    ) -> None:
         """
         Load the session with `label` from a file.
+        With `on_progress` only the focused window is created before this
+        returns, and the other windows are created in a background thread,
+        nearest to the focused window first. `on_progress` is called from
+        that thread with a result for each window created, or for the error
+        that stopped it, the number of windows created and their total.
         """
+        self.invalidate_snapshot()
         if label in self.multiplexer.list_sessions():
             self.multiplexer.focus_session(label)
             return
         session = self.file_handler.load_session(label.name)
-        self.multiplexer.create_session(session)
-        self.file_handler.save_session(session)
+        if on_progress is None:
+            self.multiplexer.create_session(session)
+            self.file_handler.save_session(session)
+            return
+        windows = self.multiplexer.create_session_lazily(session)
+        self._start_worker(self._create_windows, session, windows, on_progress)
+
+    def _create_windows(
+        self,
+        session: JmuxSession,
+        windows: Iterator[JmuxWindow],
+        on_progress: Callable[[RestoreResult, int, int], None],
+    ) -> None:
+        # The focused window was created before the thread started.
+        total, created = len(session.windows), 1
+        try:
+            for window in windows:
+                created += 1
+                on_progress(
+                    RestoreResult(f"{session.name}:{window.name}"), created, total
+                )
+            # The session is saved again with the ids of its windows and panes.
+            self.file_handler.save_session(session)
+        except (ValueError, OSError) as error:
+            result = RestoreResult(session.name, str(error) or type(error).__name__)
+            on_progress(result, created, total)
+
+    def wait(self) -> None:
+        """
+        Wait for the sessions being loaded or saved and the spare sessions
+        being spawned in the background.
+        """
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    @_publishes_change
+    def restore_sessions(
+        self,
+        labels: Optional[List[SessionLabel]] = None,
+        max_workers: int = 4,
+        on_progress: Optional[Callable[[RestoreResult, int, int], None]] = None,
+    ) -> List[RestoreResult]:
+        """
+        Restore the saved sessions with `labels`, or every saved session,
+        without switching to them. Sessions that are already running are skipped.
+        Up to `max_workers` sessions are restored at a time, and `on_progress`
+        is called in the calling thread with each result as it completes.
+        """
+        if max_workers < 1:
+            raise ValueError("Invalid max_workers value")
+        self.invalidate_snapshot()
+        if labels is None:
+            labels = self.file_handler.list_sessions()
+        running = {label.name for label in self.multiplexer.list_sessions()}
+        pending = [label for label in labels if label.name not in running]
+        results: List[RestoreResult] = []
+        if not pending:
+            return results
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            futures = {
+                pool.submit(self._restore_session, label): label for label in pending
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_progress is not None:
+                    on_progress(result, len(results), len(pending))
+        return results
+
+    def _restore_session(self, label: SessionLabel) -> RestoreResult:
+        try:
+            session = self.file_handler.load_session(label.name)
+            self.multiplexer.create_session(session, focus=False)
+            self.file_handler.save_session(session)
+        except (ValueError, OSError) as error:
+            return RestoreResult(label.name, str(error) or type(error).__name__)
+        return RestoreResult(label.name)
+
+    @_publishes_change
+    def reconcile_session(self, label: SessionLabel) -> int:
+        """
+        Add the windows and panes of the saved session with `label` that
+        are missing from the running session with its name, and fix its layouts.
+        Returns the number of windows, panes and layouts changed.
+        """
+        if label.name not in {session.name for session in self.list_running_sessions()}:
+            raise ValueError(f"Session {label.name} is not running")
+        self.invalidate_snapshot()
+        try:
+            session = self.file_handler.load_session(label.name)
+        except FileNotFoundError as error:
+            raise ValueError(f"Session {label.name} is not saved") from error
+        return self.multiplexer.reconcile_session(session)
 
+    @_publishes_change
     def kill_session(self, label: SessionLabel) -> None:
         """
         Kills the session with `label` in the terminal multiplexer.
@@ -50,16 +277,20 @@ class JmuxModel(Model):
             raise ValueError("Session does not exist")
         if label == self.multiplexer.get_current_session_label():
             raise ValueError("Cannot kill the active session")
+        self.invalidate_snapshot()
         self.multiplexer.kill_session(label)
 
+    @_publishes_change
     def delete_session(self, label: SessionLabel) -> None:
         """
         Delete the session with `label` from the file system.
         """
         if label not in self.file_handler.list_sessions():
             raise ValueError("Session does not exist")
+        self.invalidate_snapshot()
         self.file_handler.delete_session(label.name)
 
+    @_publishes_change
     def rename_session(self, label: SessionLabel, new_name: str) -> None:
         """
         Rename the session with `label` to `new_name` in the multiplexer
@@ -67,11 +298,9 @@ class JmuxModel(Model):
         """
         if not new_name or new_name.isspace():
             raise ValueError("Invalid session name")
+        self.invalidate_snapshot()
         if label in self.file_handler.list_sessions():
-            session = self.file_handler.load_session(label.name)
-            session.name = new_name
-            self.file_handler.save_session(session)
-            self.file_handler.delete_session(label.name)
+            self.file_handler.rename_session(label.name, new_name)
         if label in self.multiplexer.list_sessions():
             self.multiplexer.rename_session(label, new_name)
 
@@ -83,12 +312,84 @@ class JmuxModel(Model):
 
     def list_running_sessions(self) -> List[SessionLabel]:
         """
-        List all sessions currently running in the terminal multiplexer.
+        List all sessions currently running in the terminal multiplexer,
+        other than spare sessions.
         """
-        return self.multiplexer.list_sessions()
+        return [
+            label
+            for label in self.multiplexer.list_sessions()
+            if not is_spare(label.name)
+        ]
 
     def get_active_session(self) -> SessionLabel:
         """
         Get the active/focused session in the terminal multiplexer.
         """
         return self.multiplexer.get_current_session_label()
+
+    def get_snapshot(self) -> SessionSnapshot:
+        """
+        Get a snapshot of the running, saved and active sessions.
+        The snapshot is reused until it is invalidated, either explicitly
+        or by any of the model's operations that change sessions.
+        """
+        if self._snapshot is None:
+            try:
+                active: Optional[SessionLabel] = self.get_active_session()
+            except ValueError:
+                active = None
+            self._snapshot = SessionSnapshot(
+                self.list_running_sessions(), self.list_saved_sessions(), active
+            )
+        return self._snapshot
+
+    def invalidate_snapshot(self) -> None:
+        """
+        Drop the current snapshot, so the next one is read fresh.
+        """
+        self._snapshot = None
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        """
+        Call `callback` whenever the running or saved sessions may have
+        changed, through the model, in tmux or in the sessions folder.
+        The first subscriber starts the watching: tmux notifications are
+        used when the multiplexer sends them, and otherwise the running
+        sessions are polled, as is the sessions folder. `callback` may be
+        called from other threads, so it should only take note of the change.
+        """
+        self._subscribers.append(callback)
+        if len(self._subscribers) > 1:
+            return
+        if not self.multiplexer.subscribe(self._handle_notification):
+            self._watch(self._running_marker, interval=2.0)
+        self._watch(self.file_handler.change_marker)
+
+    def _watch(self, probe: Callable[[], Hashable], interval: float = 1.0) -> None:
+        watcher = ChangeWatcher(probe, self._publish_change, interval)
+        watcher.start()
+        self._watchers.append(watcher)
+
+    def _running_marker(self) -> Hashable:
+        labels = self.multiplexer.list_sessions()
+        active = self.multiplexer.get_current_session_label()
+        return tuple((label.id, label.name) for label in labels + [active])
+
+    def _handle_notification(self, name: str, arguments: List[str]) -> None:
+        # Layout and output notifications come far more often and never
+        # change the session lists.
+        if name in SESSION_NOTIFICATIONS:
+            self._publish_change()
+
+    def _publish_change(self) -> None:
+        self.invalidate_snapshot()
+        for callback in self._subscribers:
+            callback()
+
+    def close(self) -> None:
+        """
+        Stop watching for changes.
+        """
+        for watcher in self._watchers:
+            watcher.stop()
+        self._watchers = []
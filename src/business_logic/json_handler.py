@@ -1,75 +1,241 @@
-import json
+import contextlib
+import os
 import pathlib
-from dataclasses import asdict
-from typing import List
+import threading
+from typing import List, Optional, Set, Tuple
 
-from src.data_models import JmuxPane, JmuxSession, JmuxWindow, SessionLabel
-from src.interfaces import FileHandler
+from src.data_models import CacheInfo, JmuxSession, SessionLabel, SessionVersion
+from src.interfaces import FileHandler, SessionCodec
+
+from .session_cache import SessionCache, copy_session
+from .session_codecs import CODECS, JsonCodec, content_hash, decode_session
+from .session_manifest import SessionManifest
+from .snapshot_store import HISTORY_FOLDER, SnapshotStore
+from .write_behind import WriteBehindQueue
 
 
 class JsonHandler(FileHandler):
-    def __init__(self, sessions_folder: pathlib.Path) -> None:
+    def __init__(
+        self,
+        sessions_folder: pathlib.Path,
+        cache_size: int = 8 * 1024 * 1024,
+        codec: Optional[SessionCodec] = None,
+        ignore_ids: bool = False,
+        write_delay: Optional[float] = None,
+        history_size: int = 50,
+    ) -> None:
         """
         Handle file operations.
+        Sessions are written with `codec`, JSON by default, and session files
+        in any of the other supported formats are still read.
+        Saving a session whose contents are unchanged does not write it.
+        With `ignore_ids` a session that only got new tmux ids counts as
+        unchanged, it is written with them but not kept in the history.
+        Loaded sessions are cached in memory, up to `cache_size` bytes of
+        session files, and served again as long as their file is unchanged.
+        Session files are replaced atomically, so a crash never leaves a
+        half-written one. With `write_delay` saves are queued and written
+        in one batch that many seconds later, on `flush` or at exit.
+        Batching saves on the folder sync, not on the file syncs: every
+        file of a batch is still synced on its own before it is renamed.
+        The latest `history_size` versions of every session are kept as
+        snapshots in the history folder, 0 turns the history off.
         """
         if not sessions_folder or not isinstance(sessions_folder, pathlib.Path):
             raise ValueError("Invalid sessions_folder value")
         if not sessions_folder.exists():
             raise ValueError("The specified folder does not exist")
+        if history_size < 0:
+            raise ValueError("Invalid history_size value")
         self.sessions_folder = sessions_folder
+        self.codec = codec or JsonCodec()
+        self.ignore_ids = ignore_ids
+        self.suffixes = (self.codec.suffix,) + tuple(
+            other.suffix for other in CODECS if other.suffix != self.codec.suffix
+        )
+        self.manifest = SessionManifest(sessions_folder, self.suffixes, self._decode)
+        self.cache = SessionCache(cache_size)
+        self.history_size = history_size
+        self.history = SnapshotStore(sessions_folder / HISTORY_FOLDER)
+        self._lock = threading.RLock()
+        # Sessions waiting to be written that only got new ids.
+        self._ids_only: Set[str] = set()
+        self.queue: Optional[WriteBehindQueue[JmuxSession]] = None
+        if write_delay is not None:
+            self.queue = WriteBehindQueue(self._write_sessions, write_delay)
+
+    def _session_files(self, session_name: str) -> List[pathlib.Path]:
+        # The files of a session in every format, in order of preference.
+        files = [self.sessions_folder / f"{session_name}{s}" for s in self.suffixes]
+        return [session_file for session_file in files if session_file.exists()]
 
-    def save_session(self, session: JmuxSession) -> None:
+    def save_session(self, session: JmuxSession) -> bool:
         """
         Save the session to a file with the name of the session in the sessions folder.
+        Files of the session in other formats are replaced by it.
+        Returns False if the saved session was unchanged.
         """
-        save_file = self.sessions_folder / f"{session.name}.json"
-        if not save_file.exists():
-            save_file.touch()
-        with save_file.open("w") as file:
-            json.dump(asdict(session), file, indent=4)
+        save_file = self.sessions_folder / f"{session.name}{self.codec.suffix}"
+        if self.queue is not None and self.queue.get(session.name) is not None:
+            with self._lock:
+                self._ids_only.discard(session.name)
+            self.queue.put(session.name, copy_session(session))
+            return True
+        entry = self.manifest.lookup(save_file)
+        if entry is not None and entry.hash == content_hash(session):
+            return False
+        ids_only = (
+            self.ignore_ids
+            and entry is not None
+            and entry.shape_hash == content_hash(session, include_ids=False)
+        )
+        if ids_only:
+            with self._lock:
+                self._ids_only.add(session.name)
+        if self.queue is None:
+            self._write_sessions([session])
+        else:
+            self.queue.put(session.name, copy_session(session))
+        return not ids_only
+
+    def _write_sessions(self, sessions: List[JmuxSession]) -> None:
+        # Each session is written and synced to a temporary file that replaces
+        # its session file once the whole batch is on disk, so a crash leaves
+        # either the old or the new file. The folder is synced once per batch.
+        with self._lock:
+            written: List[Tuple[pathlib.Path, pathlib.Path, JmuxSession]] = []
+            try:
+                for session in sessions:
+                    save_file = (
+                        self.sessions_folder / f"{session.name}{self.codec.suffix}"
+                    )
+                    temp_file = save_file.with_name(
+                        f".{save_file.name}.{os.getpid()}.tmp"
+                    )
+                    written.append((temp_file, save_file, session))
+                    with open(temp_file, "wb") as session_file:
+                        session_file.write(self.codec.encode(session))
+                        os.fsync(session_file.fileno())
+                for temp_file, save_file, _ in written:
+                    os.replace(temp_file, save_file)
+            except OSError:
+                for temp_file, _, _ in written:
+                    with contextlib.suppress(OSError):
+                        temp_file.unlink()
+                raise
+            self._sync_folder()
+            for _, save_file, session in written:
+                self.cache.put(str(save_file), save_file.stat(), session)
+                for old_file in self._session_files(session.name)[1:]:
+                    old_file.unlink()
+                    self.cache.discard(str(old_file))
+            self.manifest.update_all(
+                [(save_file, session) for _, save_file, session in written]
+            )
+            for session in sessions:
+                if session.name in self._ids_only:
+                    # Only its ids changed, the history already has its contents.
+                    self._ids_only.discard(session.name)
+                elif self.history_size:
+                    self.history.record(session)
+                    self.history.trim(session.name, self.history_size)
+
+    def _sync_folder(self) -> None:
+        # The renames are only durable once the folder itself is synced.
+        folder = os.open(self.sessions_folder, os.O_RDONLY)
+        try:
+            os.fsync(folder)
+        finally:
+            os.close(folder)
+
+    def change_marker(self) -> int:
+        """
+        Get the modification time of the sessions folder, which changes
+        whenever a session file is written, as they are renamed into place,
+        or deleted.
+        """
+        return self.sessions_folder.stat().st_mtime_ns
+
+    def flush(self) -> None:
+        """
+        Write the saves that are still queued.
+        """
+        if self.queue is not None:
+            self.queue.flush()
 
     def load_session(self, session_name: str) -> JmuxSession:
         """
         Load the session with the name `session_name` from the sessions folder.
         """
-        session_file = self.sessions_folder / f"{session_name}.json"
-        if not session_file.exists():
+        pending = self.queue.get(session_name) if self.queue is not None else None
+        if pending is not None:
+            return copy_session(pending)
+        session_files = self._session_files(session_name)
+        if not session_files:
             raise FileNotFoundError(f"Session file {session_name} does not exist")
-        with session_file.open("r") as file:
-            session_data = json.load(file)
-        session = self._serialize_session(session_data)
+        session_file = session_files[0]
+        stat = session_file.stat()
+        session = self.cache.get(str(session_file), stat)
+        if session is None:
+            session = self._decode(session_file.read_bytes())
+            self.cache.put(str(session_file), stat, session)
         return session
 
     def delete_session(self, session_name: str) -> None:
         """
         Delete the session with the name `session_name`.
         """
-        session_file = self.sessions_folder / f"{session_name}.json"
-        if not session_file.exists():
+        pending = None
+        if self.queue is not None:
+            pending = self.queue.discard(session_name)
+        session_files = self._session_files(session_name)
+        if not session_files and pending is None:
             raise FileNotFoundError(f"Session file {session_name} does not exist")
-        session_file.unlink()
+        for session_file in session_files:
+            session_file.unlink()
+            self.cache.discard(str(session_file))
+        self.manifest.remove(session_name)
 
     def list_sessions(self) -> List[SessionLabel]:
         """
         Get a list of session labels of all the saved sessions.
+        The labels are read from the manifest, so only session files
+        that changed since they were last indexed are parsed.
+        Queued saves are listed without writing them.
         """
-        session_files = self.sessions_folder.glob("*.json")
-        session_names = [session_file.stem for session_file in session_files]
-        labels = []
-        for session_name in session_names:
-            try:
-                session = self.load_session(session_name)
-                labels.append(SessionLabel(session.id, session.name))
-            except FileNotFoundError:
-                pass
-        return labels
-
-    def _serialize_window(self, window: dict) -> JmuxWindow:
-        window["panes"] = [JmuxPane(**pane_data) for pane_data in window["panes"]]
-        return JmuxWindow(**window)
-
-    def _serialize_session(self, session: dict) -> JmuxSession:
-        session["windows"] = [
-            self._serialize_window(window_data) for window_data in session["windows"]
-        ]
-        return JmuxSession(**session)
+        entries = self.manifest.entries()
+        labels = {
+            stem: SessionLabel(entry.id, entry.name) for stem, entry in entries.items()
+        }
+        for session in self.queue.pending() if self.queue is not None else []:
+            labels[session.name] = SessionLabel(session.id, session.name)
+        return [labels[stem] for stem in sorted(labels)]
+
+    def list_history(self, session_name: str) -> List[SessionVersion]:
+        """
+        Get the saved versions of the session `session_name`, newest first.
+        """
+        return self.history.history(session_name)
+
+    def load_version(self, session_name: str, version: str) -> JmuxSession:
+        """
+        Load the saved version `version` of the session `session_name`.
+        """
+        return self.history.load(session_name, version)
+
+    def prune_history(self, keep: int) -> int:
+        """
+        Drop all but the latest `keep` versions of every saved session.
+        Returns the number of versions dropped.
+        """
+        self.flush()
+        return self.history.prune(keep)
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Get the hit and miss counters of the loaded session cache.
+        """
+        return self.cache.cache_info()
+
+    def _decode(self, data: bytes) -> JmuxSession:
+        return decode_session(data)
@@ -0,0 +1,103 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from src.data_models import CacheInfo, JmuxPane, JmuxSession, JmuxWindow
+
+_Entry = Tuple[Tuple[int, int], JmuxSession, int]
+
+
+def copy_window(window: JmuxWindow) -> JmuxWindow:
+    """
+    Copy `window` and its panes, without going through deepcopy.
+    """
+    return JmuxWindow(
+        window.id,
+        window.name,
+        window.layout,
+        window.focus,
+        [JmuxPane(pane.id, pane.focus, pane.current_dir) for pane in window.panes],
+    )
+
+
+def copy_session(session: JmuxSession) -> JmuxSession:
+    """
+    Copy `session` and its windows and panes, without going through deepcopy.
+    """
+    return JmuxSession(
+        session.id, session.name, [copy_window(window) for window in session.windows]
+    )
+
+
+class SessionCache:
+    def __init__(self, max_size: int) -> None:
+        """
+        LRU cache of parsed sessions, keyed by file path and validated
+        against the file's mtime and size, so a stat is enough to serve
+        an unchanged session. The cache holds at most `max_size` bytes,
+        counted as the size of the files the sessions were read from.
+        Sessions are copied in and out, so callers can change them freely.
+        """
+        if max_size < 0:
+            raise ValueError("Invalid max_size value")
+        self.max_size = max_size
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result) -> Optional[JmuxSession]:
+        """
+        Get the session cached for `path`, if the file has not changed since.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != (stat.st_mtime_ns, stat.st_size):
+                self._misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self._hits += 1
+            session = entry[1]
+        return copy_session(session)
+
+    def put(self, path: str, stat: os.stat_result, session: JmuxSession) -> None:
+        """
+        Cache `session` as the contents of `path` at the time of `stat`.
+        """
+        size = stat.st_size
+        session = copy_session(session)
+        with self._lock:
+            self._discard(path)
+            if size > self.max_size:
+                return
+            self._entries[path] = ((stat.st_mtime_ns, stat.st_size), session, size)
+            self._size += size
+            while self._size > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def discard(self, path: str) -> None:
+        """
+        Drop the session cached for `path`.
+        """
+        with self._lock:
+            self._discard(path)
+
+    def _discard(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Get the hit and miss counters and the current size of the cache.
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                len(self._entries),
+                self._size,
+                self.max_size,
+            )
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import re
+import struct
+from typing import Dict, List
+
+from src.data_models import JmuxPane, JmuxSession, JmuxWindow
+from src.interfaces import SessionCodec
+
+COMPACT_MAGIC = b"JMUX"
+COMPACT_VERSION = 1
+_HEADER = struct.Struct("<4sBII")
+
+
+class JsonCodec(SessionCodec):
+    """
+    The human readable, indented JSON session format.
+    """
+
+    suffix = ".json"
+
+    def encode(self, session: JmuxSession) -> bytes:
+        data = {
+            "id": session.id,
+            "name": session.name,
+            "windows": [
+                {
+                    "id": window.id,
+                    "name": window.name,
+                    "layout": window.layout,
+                    "focus": window.focus,
+                    "panes": [
+                        {
+                            "id": pane.id,
+                            "focus": pane.focus,
+                            "current_dir": pane.current_dir,
+                        }
+                        for pane in window.panes
+                    ],
+                }
+                for window in session.windows
+            ],
+        }
+        return json.dumps(data, indent=4).encode()
+
+    def decode(self, data: bytes) -> JmuxSession:
+        session = json.loads(data)
+        return JmuxSession(
+            session["id"],
+            session["name"],
+            [
+                JmuxWindow(
+                    window["id"],
+                    window["name"],
+                    window["layout"],
+                    window["focus"],
+                    [
+                        JmuxPane(pane["id"], pane["focus"], pane["current_dir"])
+                        for pane in window["panes"]
+                    ],
+                )
+                for window in session["windows"]
+            ],
+        )
+
+
+class CompactCodec(SessionCodec):
+    """
+    A versioned binary session format.
+    Every string is stored once in a length-prefixed string table, so
+    repeated values like pane directories cost a single index, and the
+    session tree is a flat array of unsigned ints pointing into it:
+    session id, name, window count, then per window its id, name, layout,
+    focus and pane count, followed by each pane's id, focus and directory.
+    """
+
+    suffix = ".jmux"
+
+    def encode(self, session: JmuxSession) -> bytes:
+        strings: Dict[str, int] = {}
+
+        def intern(value: str) -> int:
+            return strings.setdefault(value, len(strings))
+
+        tree = [intern(session.id), intern(session.name), len(session.windows)]
+        for window in session.windows:
+            tree += [
+                intern(window.id),
+                intern(window.name),
+                intern(window.layout),
+                window.focus,
+                len(window.panes),
+            ]
+            for pane in window.panes:
+                tree += [intern(pane.id), pane.focus, intern(pane.current_dir)]
+        encoded = [value.encode() for value in strings]
+        return b"".join(
+            [
+                _HEADER.pack(COMPACT_MAGIC, COMPACT_VERSION, len(encoded), len(tree)),
+                struct.pack(f"<{len(encoded)}I", *map(len, encoded)),
+                struct.pack(f"<{len(tree)}I", *tree),
+                *encoded,
+            ]
+        )
+
+    def decode(self, data: bytes) -> JmuxSession:
+        try:
+            return self._decode(data)
+        except (struct.error, IndexError, StopIteration) as error:
+            raise ValueError("Corrupt session file") from error
+
+    def _decode(self, data: bytes) -> JmuxSession:
+        magic, version, string_count, tree_size = _HEADER.unpack_from(data)
+        if magic != COMPACT_MAGIC or version != COMPACT_VERSION:
+            raise ValueError("Unsupported session file format")
+        offset = _HEADER.size
+        lengths = struct.unpack_from(f"<{string_count}I", data, offset)
+        offset += 4 * string_count
+        tree = struct.unpack_from(f"<{tree_size}I", data, offset)
+        offset += 4 * tree_size
+        if offset + sum(lengths) != len(data):
+            raise ValueError("Corrupt session file")
+        strings: List[str] = []
+        for length in lengths:
+            strings.append(data[offset : offset + length].decode())
+            offset += length
+        values = iter(tree)
+        session = JmuxSession(strings[next(values)], strings[next(values)], [])
+        for _ in range(next(values)):
+            window = JmuxWindow(
+                strings[next(values)],
+                strings[next(values)],
+                strings[next(values)],
+                next(values) == 1,
+                [],
+            )
+            for _ in range(next(values)):
+                window.panes.append(
+                    JmuxPane(
+                        strings[next(values)], next(values) == 1, strings[next(values)]
+                    )
+                )
+            session.windows.append(window)
+        return session
+
+
+CODECS: List[SessionCodec] = [JsonCodec(), CompactCodec()]
+
+
+def decode_session(data: bytes) -> JmuxSession:
+    """
+    Decode a session file in any of the supported formats.
+    """
+    if data.startswith(COMPACT_MAGIC):
+        return CompactCodec().decode(data)
+    return JsonCodec().decode(data)
+
+
+def layout_shape(layout: str) -> str:
+    """
+    Strip the checksum and the pane ids from the tmux layout string `layout`,
+    leaving the geometry, which is the same for windows laid out alike.
+    """
+    shape = layout.split(",", 1)[-1]
+    return re.sub(r"(\d+x\d+,\d+,\d+),\d+", r"\1", shape)
+
+
+def content_hash(session: JmuxSession, include_ids: bool = True) -> str:
+    """
+    Hash the contents of `session`, independent of how it is encoded.
+    Without `include_ids` the tmux ids, which change every time a session
+    is restored, are left out, along with the pane ids and checksum
+    in the window layouts.
+    """
+
+    def volatile(value: str) -> str:
+        return value if include_ids else ""
+
+    canonical = [
+        volatile(session.id),
+        session.name,
+        [
+            [
+                volatile(window.id),
+                window.name,
+                window.layout if include_ids else layout_shape(window.layout),
+                window.focus,
+                [
+                    [volatile(pane.id), pane.focus, pane.current_dir]
+                    for pane in window.panes
+                ],
+            ]
+            for window in session.windows
+        ],
+    ]
+    data = json.dumps(canonical, separators=(",", ":")).encode()
+    return hashlib.sha256(data).hexdigest()
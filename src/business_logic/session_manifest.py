@@ -0,0 +1,170 @@
+import contextlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.data_models import JmuxSession
+
+from .session_codecs import content_hash
+
+MANIFEST_NAME = ".manifest"
+
+
+@dataclass
+class ManifestEntry:
+    """
+    What the manifest knows about a saved session file.
+    """
+
+    file: str
+    id: str
+    name: str
+    mtime_ns: int
+    size: int
+    windows: int
+    panes: int
+    hash: str
+    shape_hash: str
+
+
+class SessionManifest:
+    def __init__(
+        self,
+        folder: Path,
+        suffixes: Tuple[str, ...],
+        decode: Callable[[bytes], JmuxSession],
+    ) -> None:
+        """
+        Index of the session files with any of `suffixes` in `folder`, kept
+        in a small manifest file so sessions can be listed without parsing
+        them. When a session is stored under several suffixes, the file with
+        the first suffix wins.
+        Entries are checked against the files' mtime and size, so files
+        changed out-of-band are decoded with `decode` and indexed again.
+        """
+        self.folder = folder
+        self.suffixes = suffixes
+        self.path = folder / MANIFEST_NAME
+        self._decode = decode
+
+    def entries(self) -> Dict[str, ManifestEntry]:
+        """
+        Get the manifest entries of all session files, keyed by file name stem.
+        """
+        stored = self._read()
+        files: Dict[str, Tuple[int, os.DirEntry]] = {}
+        with os.scandir(self.folder) as scan:
+            for file in scan:
+                rank = self._rank(file.name)
+                if rank is None or not file.is_file():
+                    continue
+                stem = file.name[: -len(self.suffixes[rank])]
+                if stem not in files or rank < files[stem][0]:
+                    files[stem] = (rank, file)
+        entries: Dict[str, ManifestEntry] = {}
+        changed = False
+        for stem, (_, file) in files.items():
+            stat = file.stat()
+            entry = stored.get(stem)
+            if entry is None or (entry.file, entry.mtime_ns, entry.size) != (
+                file.name,
+                stat.st_mtime_ns,
+                stat.st_size,
+            ):
+                try:
+                    entry = self._index(Path(file.path))
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                changed = True
+            entries[stem] = entry
+        if changed or entries.keys() != stored.keys():
+            self._write(entries)
+        return entries
+
+    def _rank(self, file_name: str) -> Optional[int]:
+        for rank, suffix in enumerate(self.suffixes):
+            if file_name.endswith(suffix):
+                return rank
+        return None
+
+    def lookup(self, session_file: Path) -> Optional[ManifestEntry]:
+        """
+        Get the entry of `session_file`, if the file is unchanged since it was indexed.
+        """
+        entry = self._read().get(session_file.name[: -len(self.suffixes[0])])
+        if entry is None or entry.file != session_file.name:
+            return None
+        try:
+            stat = session_file.stat()
+        except OSError:
+            return None
+        if (entry.mtime_ns, entry.size) != (stat.st_mtime_ns, stat.st_size):
+            return None
+        return entry
+
+    def update(self, session_file: Path, session: JmuxSession) -> None:
+        """
+        Record that `session` was just written to `session_file`.
+        """
+        self.update_all([(session_file, session)])
+
+    def update_all(self, written: List[Tuple[Path, JmuxSession]]) -> None:
+        """
+        Record that each session in `written` was just written to its file,
+        rewriting the manifest once.
+        """
+        entries = self._read()
+        for session_file, session in written:
+            stem = session_file.name[: -len(self.suffixes[0])]
+            entries[stem] = self._entry(session_file, session, session_file.stat())
+        self._write(entries)
+
+    def remove(self, stem: str) -> None:
+        """
+        Record that the session file `stem` was deleted.
+        """
+        entries = self._read()
+        if entries.pop(stem, None) is not None:
+            self._write(entries)
+
+    def _index(self, session_file: Path) -> ManifestEntry:
+        stat = session_file.stat()
+        session = self._decode(session_file.read_bytes())
+        return self._entry(session_file, session, stat)
+
+    def _entry(
+        self, session_file: Path, session: JmuxSession, stat: os.stat_result
+    ) -> ManifestEntry:
+        return ManifestEntry(
+            session_file.name,
+            session.id,
+            session.name,
+            stat.st_mtime_ns,
+            stat.st_size,
+            len(session.windows),
+            sum(len(window.panes) for window in session.windows),
+            content_hash(session),
+            content_hash(session, include_ids=False),
+        )
+
+    def _read(self) -> Dict[str, ManifestEntry]:
+        try:
+            with open(self.path) as manifest_file:
+                entries = json.load(manifest_file)
+            return {stem: ManifestEntry(**entry) for stem, entry in entries.items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+    def _write(self, entries: Dict[str, ManifestEntry]) -> None:
+        # Written to a temporary file and renamed, so readers never see half of it.
+        data = {stem: asdict(entry) for stem, entry in entries.items()}
+        temp_path = self.folder / f"{MANIFEST_NAME}.{os.getpid()}"
+        try:
+            with open(temp_path, "w") as manifest_file:
+                json.dump(data, manifest_file)
+            os.replace(temp_path, self.path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                temp_path.unlink()
@@ -0,0 +1,82 @@
+import time
+from typing import List, Tuple
+
+from src.data_models import SessionLabel
+from src.interfaces import Multiplexer
+
+# Spare sessions are named with this prefix and the time they were spawned.
+SPARE_PREFIX = "_jmux_spare_"
+
+
+def is_spare(session_name: str) -> bool:
+    """
+    Check if `session_name` is the name of a spare session of the pool.
+    """
+    return session_name.startswith(SPARE_PREFIX)
+
+
+class SessionPool:
+    def __init__(
+        self, multiplexer: Multiplexer, size: int, max_idle: float = 3600.0
+    ) -> None:
+        """
+        Pool of up to `size` detached spare sessions, spawned ahead of time
+        so a new session can be taken from it with its shell already started.
+        Spares are tmux sessions with a reserved name that holds the time they
+        were spawned, so the pool outlives jmux. Spares idle for more than
+        `max_idle` seconds are not taken, and are replaced when refilling.
+        """
+        if size < 0:
+            raise ValueError("Invalid size value")
+        if max_idle <= 0:
+            raise ValueError("Invalid max_idle value")
+        self.multiplexer = multiplexer
+        self.size = size
+        self.max_idle = max_idle
+
+    def _spares(self) -> List[Tuple[float, SessionLabel]]:
+        # Oldest first, as the shells of older spares are more likely done starting.
+        spares = []
+        for label in self.multiplexer.list_sessions():
+            if not is_spare(label.name):
+                continue
+            try:
+                spawned_at = int(label.name[len(SPARE_PREFIX) :]) / 1e9
+            except ValueError:
+                spawned_at = 0.0
+            spares.append((spawned_at, label))
+        return sorted(spares, key=lambda spare: spare[0])
+
+    def _is_fresh(self, spawned_at: float, now: float) -> bool:
+        return now - spawned_at <= self.max_idle
+
+    def claim(self, session_name: str) -> bool:
+        """
+        Rename the oldest spare that is not expired to `session_name`
+        and switch to it. Returns False if there is no such spare.
+        """
+        now = time.time()
+        for spawned_at, label in self._spares():
+            if self._is_fresh(spawned_at, now):
+                self.multiplexer.rename_session(label, session_name)
+                self.multiplexer.focus_session(label)
+                return True
+        return False
+
+    def refill(self) -> int:
+        """
+        Kill the expired spares and the ones over the size limit,
+        and spawn new ones until the pool is full.
+        Returns the number of spares spawned.
+        """
+        now = time.time()
+        kept = 0
+        for spawned_at, label in self._spares():
+            if kept < self.size and self._is_fresh(spawned_at, now):
+                kept += 1
+            else:
+                self.multiplexer.kill_session(label)
+        for _ in range(self.size - kept):
+            name = f"{SPARE_PREFIX}{time.time_ns()}"
+            self.multiplexer.create_new_session(name, focus=False)
+        return self.size - kept
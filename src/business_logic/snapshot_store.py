@@ -0,0 +1,267 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.data_models import JmuxPane, JmuxSession, JmuxWindow, SessionVersion
+
+HISTORY_FOLDER = ".history"
+
+_Object = Dict[str, Any]
+
+
+class SnapshotStore:
+    def __init__(self, folder: Path) -> None:
+        """
+        Content-addressed history of saved sessions, kept in `folder`.
+        Every snapshot is stored as session, window and pane objects named
+        after the hash of their contents, so windows and panes shared by
+        several snapshots are stored once. Each session has a log of its
+        snapshots, and objects are reference counted, so dropping snapshots
+        only touches the objects they were the last to use.
+        Changes are made under a file lock, so several jmux processes
+        can share the store.
+        """
+        self.folder = folder
+        self.objects = folder / "objects"
+        self.refs = folder / "refs"
+        self.logs = folder / "logs"
+        self.lock_path = folder / "lock"
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        # The thread lock keeps out the other threads, the file lock
+        # the other processes.
+        with self._lock:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            lock_file = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(lock_file)
+
+    def record(self, session: JmuxSession, saved_at: Optional[float] = None) -> str:
+        """
+        Add `session` to its history as a snapshot taken at `saved_at`,
+        now by default, unless it is the same as its latest snapshot.
+        Returns the hash of the snapshot.
+        """
+        objects: Dict[str, _Object] = {}
+        session_hash = self._add_objects(session, objects)
+        with self._locked():
+            log = self._read_log(session.name)
+            if log and log[-1][1] == session_hash:
+                return session_hash
+            self._acquire(session_hash, objects)
+            self.logs.mkdir(parents=True, exist_ok=True)
+            with open(self._log_path(session.name), "a") as log_file:
+                log_file.write(f"{saved_at or time.time()!r} {session_hash}\n")
+        return session_hash
+
+    def history(self, session_name: str) -> List[SessionVersion]:
+        """
+        Get the snapshots of the session `session_name`, newest first.
+        """
+        return [
+            SessionVersion(session_name, session_hash, saved_at)
+            for saved_at, session_hash in reversed(self._read_log(session_name))
+        ]
+
+    def load(self, session_name: str, version: str) -> JmuxSession:
+        """
+        Load the snapshot `version` of the session `session_name`.
+        """
+        if version not in {entry[1] for entry in self._read_log(session_name)}:
+            raise FileNotFoundError(f"Session {session_name} has no version {version}")
+        session = self._read_object(version)
+        return JmuxSession(
+            session["id"],
+            session["name"],
+            [self._load_window(window_hash) for window_hash in session["windows"]],
+        )
+
+    def _load_window(self, window_hash: str) -> JmuxWindow:
+        window = self._read_object(window_hash)
+        panes = [self._read_object(pane_hash) for pane_hash in window["panes"]]
+        return JmuxWindow(
+            window["id"],
+            window["name"],
+            window["layout"],
+            window["focus"],
+            [
+                JmuxPane(pane["id"], pane["focus"], pane["current_dir"])
+                for pane in panes
+            ],
+        )
+
+    def trim(self, session_name: str, keep: int) -> int:
+        """
+        Drop all but the latest `keep` snapshots of the session `session_name`.
+        Returns the number of snapshots dropped.
+        """
+        if keep < 0:
+            raise ValueError("Invalid keep value")
+        with self._locked():
+            return self._drop(session_name, keep)
+
+    def prune(self, keep: int) -> int:
+        """
+        Drop all but the latest `keep` snapshots of every session.
+        Returns the number of snapshots dropped.
+        """
+        if keep < 0:
+            raise ValueError("Invalid keep value")
+        if not self.logs.exists():
+            return 0
+        with self._locked():
+            names = [
+                log.name for log in self.logs.iterdir() if not log.name.startswith(".")
+            ]
+            return sum(self._drop(name, keep) for name in names)
+
+    def _drop(self, session_name: str, keep: int) -> int:
+        log = self._read_log(session_name)
+        dropped = log[: max(len(log) - keep, 0)]
+        if not dropped:
+            return 0
+        # The log is rewritten before objects are released, so a crash
+        # in between leaks objects instead of losing ones still in use.
+        self._write_log(session_name, log[len(dropped) :])
+        for _, session_hash in dropped:
+            self._release(session_hash)
+        return len(dropped)
+
+    def _add_objects(self, session: JmuxSession, objects: Dict[str, _Object]) -> str:
+        windows = []
+        for window in session.windows:
+            panes = [
+                self._add_object(
+                    {
+                        "id": pane.id,
+                        "focus": pane.focus,
+                        "current_dir": pane.current_dir,
+                    },
+                    objects,
+                )
+                for pane in window.panes
+            ]
+            windows.append(
+                self._add_object(
+                    {
+                        "id": window.id,
+                        "name": window.name,
+                        "layout": window.layout,
+                        "focus": window.focus,
+                        "panes": panes,
+                    },
+                    objects,
+                )
+            )
+        return self._add_object(
+            {"id": session.id, "name": session.name, "windows": windows}, objects
+        )
+
+    def _add_object(self, data: _Object, objects: Dict[str, _Object]) -> str:
+        encoded = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        object_hash = hashlib.sha256(encoded.encode()).hexdigest()
+        objects[object_hash] = data
+        return object_hash
+
+    def _children(self, data: _Object) -> List[str]:
+        return data.get("windows", []) + data.get("panes", [])
+
+    def _acquire(self, object_hash: str, objects: Dict[str, _Object]) -> None:
+        # Only objects not stored yet have their children counted, the
+        # children of stored ones already count it as a reference.
+        count = self._read_ref(object_hash)
+        if count == 0:
+            data = objects[object_hash]
+            for child in self._children(data):
+                self._acquire(child, objects)
+            self._write_object(object_hash, data)
+        self._write_ref(object_hash, count + 1)
+
+    def _release(self, object_hash: str) -> None:
+        count = self._read_ref(object_hash) - 1
+        if count > 0:
+            self._write_ref(object_hash, count)
+            return
+        try:
+            data = self._read_object(object_hash)
+        except (OSError, ValueError):
+            data = {}
+        for path in [self._object_path(object_hash), self._ref_path(object_hash)]:
+            with contextlib.suppress(OSError):
+                path.unlink()
+        for child in self._children(data):
+            self._release(child)
+
+    def _ref_path(self, object_hash: str) -> Path:
+        return self.refs / object_hash[:2] / object_hash[2:]
+
+    def _read_ref(self, object_hash: str) -> int:
+        try:
+            with open(self._ref_path(object_hash)) as ref_file:
+                return int(ref_file.read())
+        except (OSError, ValueError):
+            return 0
+
+    def _write_ref(self, object_hash: str, count: int) -> None:
+        path = self._ref_path(object_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._replace(path, str(count))
+
+    def _object_path(self, object_hash: str) -> Path:
+        return self.objects / object_hash[:2] / object_hash[2:]
+
+    def _read_object(self, object_hash: str) -> _Object:
+        with open(self._object_path(object_hash)) as object_file:
+            return json.load(object_file)
+
+    def _write_object(self, object_hash: str, data: _Object) -> None:
+        path = self._object_path(object_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._replace(path, json.dumps(data, sort_keys=True, separators=(",", ":")))
+
+    def _log_path(self, session_name: str) -> Path:
+        return self.logs / session_name
+
+    def _read_log(self, session_name: str) -> List[Tuple[float, str]]:
+        try:
+            with open(self._log_path(session_name)) as log_file:
+                lines = log_file.read().splitlines()
+        except OSError:
+            return []
+        log = []
+        for line in lines:
+            saved_at, _, session_hash = line.partition(" ")
+            with contextlib.suppress(ValueError):
+                log.append((float(saved_at), session_hash))
+        return log
+
+    def _write_log(self, session_name: str, log: List[Tuple[float, str]]) -> None:
+        if not log:
+            self._log_path(session_name).unlink()
+            return
+        lines = "".join(
+            f"{saved_at!r} {session_hash}\n" for saved_at, session_hash in log
+        )
+        self._replace(self._log_path(session_name), lines)
+
+    def _replace(self, path: Path, data: str) -> None:
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "w") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                temp_path.unlink()
+            raise
@@ -0,0 +1,297 @@
+import pathlib
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+from src.data_models import (
+    JmuxPane,
+    JmuxSession,
+    JmuxWindow,
+    SessionLabel,
+    SessionVersion,
+)
+from src.interfaces import FileHandler
+
+from .session_codecs import content_hash
+from .snapshot_store import HISTORY_FOLDER, SnapshotStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    session_id TEXT NOT NULL,
+    hash TEXT NOT NULL DEFAULT '',
+    shape_hash TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS windows (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    window_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    layout TEXT NOT NULL,
+    focus INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS windows_session ON windows(session, position);
+CREATE TABLE IF NOT EXISTS panes (
+    id INTEGER PRIMARY KEY,
+    window INTEGER NOT NULL REFERENCES windows(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    pane_id TEXT NOT NULL,
+    focus INTEGER NOT NULL,
+    current_dir TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS panes_window ON panes(window, position);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+LOAD_QUERY = """
+SELECT windows.id, windows.window_id, windows.name, windows.layout,
+       windows.focus, panes.pane_id, panes.focus, panes.current_dir
+FROM windows LEFT JOIN panes ON panes.window = windows.id
+WHERE windows.session = ?
+ORDER BY windows.position, panes.position
+"""
+
+
+class SqliteHandler(FileHandler):
+    def __init__(
+        self,
+        sessions_folder: pathlib.Path,
+        database_name: str = "sessions.db",
+        ignore_ids: bool = False,
+        history_size: int = 50,
+    ) -> None:
+        """
+        Handle session storage in a SQLite database in the sessions folder.
+        Sessions, windows and panes are stored in their own tables, so
+        listing, loading and renaming are indexed queries.
+        The database runs in WAL mode, so several jmux instances can read
+        it while one of them writes.
+        Saving a session whose contents are unchanged does not write it.
+        With `ignore_ids` a session that only got new tmux ids counts as
+        unchanged, it is written with them but not kept in the history.
+        The latest `history_size` versions of every session are kept as
+        snapshots in the history folder, 0 turns the history off.
+        """
+        if not sessions_folder or not isinstance(sessions_folder, pathlib.Path):
+            raise ValueError("Invalid sessions_folder value")
+        if not sessions_folder.exists():
+            raise ValueError("The specified folder does not exist")
+        if history_size < 0:
+            raise ValueError("Invalid history_size value")
+        self.sessions_folder = sessions_folder
+        self.database = sessions_folder / database_name
+        self.ignore_ids = ignore_ids
+        self.history_size = history_size
+        self.history = SnapshotStore(sessions_folder / HISTORY_FOLDER)
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+            self._migrate_schema(connection)
+
+    def _migrate_schema(self, connection: sqlite3.Connection) -> None:
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(sessions)")}
+        for column in ["hash", "shape_hash"]:
+            if column not in columns:
+                connection.execute(
+                    f"ALTER TABLE sessions ADD COLUMN {column} TEXT NOT NULL DEFAULT ''"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared between threads, and sessions
+        # are loaded from worker threads when restoring them in parallel.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.database, timeout=10.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+        return connection
+
+    def close(self) -> None:
+        """
+        Close the database connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def save_session(self, session: JmuxSession) -> bool:
+        """
+        Save the session under its name, replacing any session with that name.
+        Returns False if the saved session was unchanged.
+        """
+        session_hash = content_hash(session)
+        shape_hash = content_hash(session, include_ids=False)
+        with self._connect() as connection:
+            stored = connection.execute(
+                "SELECT hash, shape_hash FROM sessions WHERE name = ?",
+                (session.name,),
+            ).fetchone()
+            if stored is not None and stored[0] == session_hash:
+                return False
+            ids_only = (
+                self.ignore_ids and stored is not None and stored[1] == shape_hash
+            )
+            # RETURNING needs SQLite 3.35, older than what some distros ship,
+            # so the row id is looked up after the upsert.
+            connection.execute(
+                "INSERT INTO sessions (name, session_id, hash, shape_hash) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "session_id = excluded.session_id, hash = excluded.hash, "
+                "shape_hash = excluded.shape_hash",
+                (session.name, session.id, session_hash, shape_hash),
+            )
+            session_row = connection.execute(
+                "SELECT id FROM sessions WHERE name = ?", (session.name,)
+            ).fetchone()[0]
+            connection.execute("DELETE FROM windows WHERE session = ?", (session_row,))
+            for position, window in enumerate(session.windows):
+                window_row = connection.execute(
+                    "INSERT INTO windows "
+                    "(session, position, window_id, name, layout, focus) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        session_row,
+                        position,
+                        window.id,
+                        window.name,
+                        window.layout,
+                        window.focus,
+                    ),
+                ).lastrowid
+                connection.executemany(
+                    "INSERT INTO panes "
+                    "(window, position, pane_id, focus, current_dir) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (window_row, index, pane.id, pane.focus, pane.current_dir)
+                        for index, pane in enumerate(window.panes)
+                    ],
+                )
+        if self.history_size and not ids_only:
+            self.history.record(session)
+            self.history.trim(session.name, self.history_size)
+        return not ids_only
+
+    def load_session(self, session_name: str) -> JmuxSession:
+        """
+        Load the session with the name `session_name` from the database.
+        """
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT id, session_id FROM sessions WHERE name = ?", (session_name,)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Session {session_name} does not exist")
+        session_row, session_id = row
+        windows: List[JmuxWindow] = []
+        window_row = None
+        for window_data in connection.execute(LOAD_QUERY, (session_row,)):
+            row_id, window_id, name, layout, window_focus, *pane_data = window_data
+            if row_id != window_row:
+                window_row = row_id
+                windows.append(
+                    JmuxWindow(window_id, name, layout, bool(window_focus), [])
+                )
+            pane_id, pane_focus, current_dir = pane_data
+            if pane_id is not None:
+                pane = JmuxPane(pane_id, bool(pane_focus), current_dir)
+                windows[-1].panes.append(pane)
+        return JmuxSession(session_id, session_name, windows)
+
+    def delete_session(self, session_name: str) -> None:
+        """
+        Delete the session with the name `session_name`.
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "DELETE FROM sessions WHERE name = ?", (session_name,)
+            )
+        if cursor.rowcount == 0:
+            raise FileNotFoundError(f"Session {session_name} does not exist")
+
+    def rename_session(self, session_name: str, new_name: str) -> None:
+        """
+        Rename the saved session `session_name` to `new_name`,
+        replacing any session saved as `new_name`.
+        """
+        with self._connect() as connection:
+            if session_name != new_name:
+                connection.execute("DELETE FROM sessions WHERE name = ?", (new_name,))
+            cursor = connection.execute(
+                "UPDATE sessions SET name = ? WHERE name = ?",
+                (new_name, session_name),
+            )
+            if cursor.rowcount == 0:
+                raise FileNotFoundError(f"Session {session_name} does not exist")
+
+    def change_marker(self) -> Tuple[Optional[Tuple[int, int]], ...]:
+        """
+        Get the modification times and sizes of the database and its
+        write-ahead log, one of which changes with every committed write.
+        """
+        paths = [self.database, self.database.with_name(f"{self.database.name}-wal")]
+        return tuple(self._stat(path) for path in paths)
+
+    def _stat(self, path: pathlib.Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def list_sessions(self) -> List[SessionLabel]:
+        """
+        Get a list of session labels of all the saved sessions.
+        """
+        rows = self._connect().execute(
+            "SELECT session_id, name FROM sessions ORDER BY name"
+        )
+        return [SessionLabel(session_id, name) for session_id, name in rows]
+
+    def list_history(self, session_name: str) -> List[SessionVersion]:
+        """
+        Get the saved versions of the session `session_name`, newest first.
+        """
+        return self.history.history(session_name)
+
+    def load_version(self, session_name: str, version: str) -> JmuxSession:
+        """
+        Load the saved version `version` of the session `session_name`.
+        """
+        return self.history.load(session_name, version)
+
+    def prune_history(self, keep: int) -> int:
+        """
+        Drop all but the latest `keep` versions of every saved session.
+        Returns the number of versions dropped.
+        """
+        return self.history.prune(keep)
+
+    def migrate(self, source: FileHandler) -> int:
+        """
+        Copy every session saved in `source` into the database, once.
+        Later calls do nothing, so sessions deleted afterwards stay deleted.
+        Returns the number of sessions copied.
+        """
+        connection = self._connect()
+        migrated = connection.execute(
+            "SELECT value FROM meta WHERE key = 'migrated'"
+        ).fetchone()
+        if migrated is not None:
+            return 0
+        sessions = [source.load_session(label.name) for label in source.list_sessions()]
+        for session in sessions:
+            self.save_session(session)
+        with connection:
+            connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('migrated', ?)",
+                (str(len(sessions)),),
+            )
+        return len(sessions)
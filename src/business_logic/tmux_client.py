@@ -1,32 +1,111 @@
 import os
+import shutil
 import subprocess
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from src.data_models import JmuxPane, JmuxSession, JmuxWindow, SessionLabel
 from src.interfaces import Multiplexer
 
+from . import tmux_commands
+from .session_cache import copy_window
+from .tmux_commands import CLIENT_FORMAT, LABEL_FORMAT, PANE_FORMAT, WINDOW_FORMAT
+from .tmux_control import NotificationCallback, TmuxControlMode, get_client_name
+
+# Control mode notifications sent when sessions or clients' sessions change.
+SESSION_NOTIFICATIONS = {
+    "sessions-changed",
+    "session-renamed",
+    "client-session-changed",
+    "exit",
+}
+
 
 class TmuxClient(Multiplexer):
-    def __init__(self) -> None:
+    def __init__(self, control_mode: bool = False) -> None:
         """
         Implementation of the TerminalMultiplexerAPI
         for the Tmux terminal multiplexer.
+        With `control_mode` commands are sent over a single persistent
+        `tmux -C` connection instead of spawning a process per command.
+        In control mode the running sessions are cached and kept current
+        by tmux notifications, otherwise they are refetched on every read.
         """
         self._bin = self._get_binary()
         if not self._bin:
             raise FileNotFoundError("Tmux binary not found")
-        self.base_index = self._get_base_index()
+        self._control: Optional[TmuxControlMode] = None
+        self._client_name = ""
+        self._sessions: Optional[List[SessionLabel]] = None
+        self._current_session: Optional[SessionLabel] = None
+        self._generation = 0
+        self._windows: Dict[str, Tuple[str, JmuxWindow]] = {}
+        if control_mode and self.is_running():
+            self._start_control_mode()
 
     def _get_binary(self) -> str:
-        command = ["which", "tmux"]
-        response = subprocess.run(command, capture_output=True, text=True, check=True)
-        return response.stdout.strip()
+        return shutil.which("tmux") or ""
+
+    def _start_control_mode(self) -> None:
+        self._client_name = get_client_name(self._bin)
+        control = TmuxControlMode(self._bin)
+        control.subscribe(self._handle_notification)
+        try:
+            control.start()
+        except OSError:
+            return
+        self._control = control
+
+    def _handle_notification(self, name: str, arguments: List[str]) -> None:
+        if name in SESSION_NOTIFICATIONS:
+            self._invalidate_sessions()
+
+    def _invalidate_sessions(self) -> None:
+        self._generation += 1
+        self._sessions = None
+        self._current_session = None
+
+    def _is_cache_valid(self) -> bool:
+        # Notifications are only received while the control client is attached.
+        return self._control is not None and self._control.is_alive()
 
-    def _get_base_index(self) -> int:
-        command = [self._bin, "show-options", "-g", "base-index"]
+    def subscribe(self, callback: NotificationCallback) -> bool:
+        """
+        Call `callback` with the name and arguments of every tmux notification.
+        Returns False if there is no control mode connection to receive them.
+        """
+        if self._control is None:
+            return False
+        self._control.subscribe(callback)
+        return True
+
+    def close(self) -> None:
+        """
+        Close the control mode connection, if one is open.
+        """
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+    def _run(self, command: List[str], capture_output: bool = True) -> str:
+        if self._control is not None:
+            return self._control.run(command[1:])
+        command = [tmux_commands.escape_argument(argument) for argument in command]
+        if not capture_output:
+            subprocess.run(command, check=True)
+            return ""
         response = subprocess.run(command, capture_output=True, text=True, check=True)
-        base_index = response.stdout.strip().split(" ")[1]
-        return int(base_index)
+        return response.stdout
+
+    def _run_batch(self, commands: List[List[str]]) -> str:
+        return self._run([self._bin, *tmux_commands.chain(commands)])
+
+    def _switch_client_command(self, target: str) -> List[str]:
+        client_name = self._client_name if self._control is not None else ""
+        return tmux_commands.switch_client_command(target, client_name)
+
+    def _switch_client(self, target: str) -> None:
+        command = [self._bin, *self._switch_client_command(target)]
+        self._run(command, capture_output=False)
 
     def is_running(self) -> bool:
         """
@@ -43,134 +122,184 @@ class TmuxClient(Multiplexer):
         """
         if not self.is_running():
             return []
-        command = [self._bin, "list-sessions", "-F", "#{session_id}:#{session_name}"]
-        response = subprocess.run(command, capture_output=True, text=True, check=True)
-        sessions = response.stdout.split("\n")
-        return [SessionLabel(*session.split(":")) for session in sessions if session]
+        sessions = self._sessions
+        if sessions is None or not self._is_cache_valid():
+            generation = self._generation
+            command = [self._bin, "list-sessions", "-F", LABEL_FORMAT]
+            sessions = tmux_commands.parse_labels(self._run(command))
+            if self._is_cache_valid() and generation == self._generation:
+                self._sessions = sessions
+        # Callers may rename the labels they get, so the cache hands out copies.
+        return [SessionLabel(session.id, session.name) for session in sessions]
 
     def get_session(self, label: SessionLabel) -> JmuxSession:
         """
         Get the data of the tmux session with the id `session_id`.
+        All windows and panes of the session are captured with a single query.
         """
-        sessions = self.list_sessions()
-        if label not in sessions:
+        if not self.is_running():
             raise ValueError(f"Session {label.name} not found")
-        jmux_windows = self._get_windows(label.id)
-        return JmuxSession(label.id, label.name, jmux_windows)
-
-    def _get_windows(self, session_id: str) -> list[JmuxWindow]:
-        command = [
-            self._bin,
-            "list-windows",
-            "-t",
-            session_id,
-            "-F",
-            "#{window_id}:#{window_name}:#{window_layout}:#{window_active}",
-        ]
-        response = subprocess.run(command, capture_output=True, text=True, check=True)
-        windows = response.stdout.split("\n")
-        jmux_windows = [
-            self._get_window(window_data) for window_data in windows if window_data
-        ]
-        return jmux_windows
-
-    def _get_window(self, window_data: str) -> JmuxWindow:
-        window_id, window_name, window_layout, window_active = window_data.split(":")
-        panes: List[JmuxPane] = self._get_panes(window_id)
-        return JmuxWindow(
-            window_id, window_name, window_layout, window_active == "1", panes
-        )
-
-    def _get_panes(self, window_id: str) -> list[JmuxPane]:
-        command = [
-            self._bin,
-            "list-panes",
-            "-t",
-            window_id,
-            "-F",
-            "#{pane_id}:#{pane_active}:#{pane_current_path}",
-        ]
-        response = subprocess.run(command, capture_output=True, text=True, check=True)
-        panes = response.stdout.split("\n")
-        jmux_panes = [self._get_pane(pane_data) for pane_data in panes if pane_data]
-        return jmux_panes
+        command = [self._bin, "list-panes", "-s", "-t", label.id, "-F", PANE_FORMAT]
+        try:
+            sessions = tmux_commands.parse_sessions(self._run(command))
+        except subprocess.CalledProcessError as error:
+            raise ValueError(f"Session {label.name} not found") from error
+        if not sessions or SessionLabel(sessions[0].id, sessions[0].name) != label:
+            raise ValueError(f"Session {label.name} not found")
+        return sessions[0]
 
-    def _get_pane(self, pane_data: str) -> JmuxPane:
-        pane_id, pane_active, pane_current_path = pane_data.split(":")
-        return JmuxPane(pane_id, pane_active == "1", pane_current_path)
+    def get_sessions(self) -> List[JmuxSession]:
+        """
+        Get the data of all the running tmux sessions.
+        All windows are listed with a fingerprint of their layout, panes and
+        last activity in one query, and only the windows whose fingerprint
+        changed since they were last captured have their panes listed,
+        in one more query. Unchanged windows are reused.
+        """
+        if not self.is_running():
+            return []
+        command = [self._bin, "list-windows", "-a", "-F", WINDOW_FORMAT]
+        windows = tmux_commands.parse_windows(self._run(command))
+        fingerprints = {window[2]: window[3] for window in windows}
+        stale = [
+            window_id
+            for window_id, fingerprint in fingerprints.items()
+            if self._windows.get(window_id, ("", None))[0] != fingerprint
+        ]
+        if stale:
+            commands = [
+                ["list-panes", "-t", window_id, "-F", PANE_FORMAT]
+                for window_id in stale
+            ]
+            try:
+                captured = tmux_commands.parse_sessions(self._run_batch(commands))
+            except subprocess.CalledProcessError:
+                # A window closed in between, so capture everything at once.
+                self._windows = {}
+                command = [self._bin, "list-panes", "-a", "-F", PANE_FORMAT]
+                return tmux_commands.parse_sessions(self._run(command))
+            for session in captured:
+                for window in session.windows:
+                    self._windows[window.id] = (fingerprints[window.id], window)
+        self._windows = {
+            window_id: self._windows[window_id]
+            for window_id in fingerprints
+            if window_id in self._windows
+        }
+        sessions: Dict[str, JmuxSession] = {}
+        for session_id, session_name, window_id, _ in windows:
+            if session_id not in sessions:
+                sessions[session_id] = JmuxSession(session_id, session_name, [])
+            # Callers may change the sessions they get, the cache hands out copies.
+            window = copy_window(self._windows[window_id][1])
+            sessions[session_id].windows.append(window)
+        return list(sessions.values())
 
-    def create_session(self, session: JmuxSession) -> None:
+    def create_session(self, session: JmuxSession, focus: bool = True) -> None:
         """
         Create a new session in tmux with the data in `session`.
+        The whole session is created with a single chained tmux command.
+        If `focus` is set, switch to the session once it is created.
         """
+        target = f"={session.name}"
+        switch_command = self._switch_client_command(target) if focus else None
+        commands = tmux_commands.compile_session(session, switch_command)
         try:
-            command = [
-                self._bin,
-                "new-session",
-                "-ds",
-                session.name,
-                "-PF",
-                "#{session_id}",
-            ]
-            response = subprocess.run(
-                command, capture_output=True, text=True, check=True
-            )
-            session.id = response.stdout.strip()
-            if len(session.windows) == 0:
-                raise ValueError("Session must have at least one window")
-            for window in session.windows:
-                self._create_window(session.id, window)
-            command = [
-                self._bin,
-                "kill-window",
-                "-t",
-                f"{session.id}:{self.base_index}",
+            output = self._run_batch(commands)
+        except subprocess.CalledProcessError as error:
+            raise ValueError(error.stderr) from error
+        finally:
+            self._invalidate_sessions()
+        tmux_commands.assign_ids(session, output)
+
+    def create_session_lazily(
+        self, session: JmuxSession, focus: bool = True
+    ) -> Iterator[JmuxWindow]:
+        """
+        Create a new session in tmux with only the focused window of `session`,
+        and switch to it if `focus` is set. The returned iterator creates the
+        other windows one at a time, nearest to the focused window first,
+        each next to a window already created so it ends up in its saved place.
+        """
+        order = tmux_commands.focus_order(session)
+        if not order:
+            raise ValueError("Session must have at least one window")
+        first = JmuxSession(session.id, session.name, [session.windows[order[0]]])
+        target = f"={session.name}"
+        switch_command = self._switch_client_command(target) if focus else None
+        commands = tmux_commands.compile_session(first, switch_command)
+        try:
+            output = self._run_batch(commands)
+        except subprocess.CalledProcessError as error:
+            raise ValueError(error.stderr) from error
+        finally:
+            self._invalidate_sessions()
+        tmux_commands.assign_ids(first, output)
+        session.id = first.id
+        return self._create_windows(session, order[0], order[1:])
+
+    def _create_windows(
+        self, session: JmuxSession, focused: int, order: List[int]
+    ) -> Iterator[JmuxWindow]:
+        for index in order:
+            window = session.windows[index]
+            # The neighbour towards the focused window is nearer to it,
+            # so it was created before this window.
+            before = index < focused
+            neighbour = session.windows[index + 1 if before else index - 1]
+            command = tmux_commands.compile_window_insert(window, neighbour.id, before)
+            try:
+                output = self._run([self._bin, *command])
+                tmux_commands.assign_window_ids(window, output)
+                commands = tmux_commands.compile_window_panes(window)
+                output = f"{output} {self._run_batch(commands)}"
+            except subprocess.CalledProcessError as error:
+                raise ValueError(error.stderr) from error
+            tmux_commands.assign_window_ids(window, output)
+            yield window
+
+    def reconcile_session(self, session: JmuxSession) -> int:
+        """
+        Bring the running session with the name of `session` in line with it:
+        add the windows and panes it is missing and fix the layouts that differ.
+        Windows are matched by name and panes by directory, and nothing else
+        in the running session is closed or moved.
+        Returns the number of windows, panes and layouts changed.
+        """
+        labels = {label.name: label for label in self.list_sessions()}
+        if session.name not in labels:
+            raise ValueError(f"Session {session.name} not found")
+        live = self.get_session(labels[session.name])
+        pairs = tmux_commands.match_windows(session, live)
+        missing = [saved for saved, window in pairs if window is None]
+        try:
+            if missing:
+                commands = [
+                    tmux_commands.compile_new_window(session.name, window)
+                    for window in missing
+                ]
+                ids = iter(filter(None, self._run_batch(commands).split("\n")))
+                # A new window starts out with the first pane of the saved one.
+                pairs = [
+                    (saved, window or self._new_window(next(ids, ""), saved))
+                    for saved, window in pairs
+                ]
+            commands = [
+                command
+                for saved, window in pairs
+                if window is not None
+                for command in tmux_commands.compile_window_fix(saved, window)
             ]
-            subprocess.run(command, check=True)
-            command = [self._bin, "switch-client", "-t", session.id]
-            subprocess.run(command, check=True)
+            if commands:
+                self._run_batch(commands)
         except subprocess.CalledProcessError as error:
             raise ValueError(error.stderr) from error
+        return len(missing) + len(commands)
 
-    def _create_window(self, session_id: str, window: JmuxWindow) -> None:
-        command = [
-            self._bin,
-            "neww",
-            "-t",
-            session_id,
-            "-n",
-            window.name,
-            "-PF",
-            "#{window_id}",
-        ]
-        if not window.focus:
-            command.append("-d")
-        response = subprocess.run(command, capture_output=True, text=True, check=True)
-        window.id = response.stdout.strip()
-        if len(window.panes) == 0:
-            raise ValueError("Window must have at least one pane")
-        for pane in window.panes:
-            self._create_pane(window.id, pane)
-        command = [self._bin, "kill-pane", "-t", f"{window.id}.{self.base_index}"]
-        subprocess.run(command, check=True)
-        command = [self._bin, "select-layout", "-t", window.id, window.layout]
-        subprocess.run(command, check=True)
-
-    def _create_pane(self, window_id: str, pane: JmuxPane) -> None:
-        command = [
-            self._bin,
-            "splitw",
-            "-t",
-            window_id,
-            "-c",
-            pane.current_dir,
-            "-PF",
-            "#{pane_id}",
-        ]
-        if not pane.focus:
-            command.append("-d")
-        response = subprocess.run(command, capture_output=True, text=True, check=True)
-        pane.id = response.stdout.strip()
+    def _new_window(self, ids: str, saved: JmuxWindow) -> JmuxWindow:
+        window_id, _, pane_id = ids.partition(" ")
+        pane = JmuxPane(pane_id, True, saved.panes[0].current_dir)
+        return JmuxWindow(window_id, saved.name, "", False, [pane])
 
     def get_current_session_label(self) -> SessionLabel:
         """
@@ -178,11 +307,26 @@ class TmuxClient(Multiplexer):
         """
         if not self.is_running():
             raise ValueError("No session is currently running")
-        command = [self._bin, "display-message", "-p", "#{session_id}:#{session_name}"]
-        response = subprocess.run(command, capture_output=True, text=True, check=True)
-        session_id, session_name = response.stdout.strip().split(":")
+        if self._control is not None:
+            current_session = self._current_session
+            if current_session is None or not self._is_cache_valid():
+                generation = self._generation
+                current_session = self._get_client_session_label()
+                if self._is_cache_valid() and generation == self._generation:
+                    self._current_session = current_session
+            return SessionLabel(current_session.id, current_session.name)
+        command = [self._bin, "display-message", "-p", LABEL_FORMAT]
+        session_id, session_name = self._run(command).strip().split(":")
         return SessionLabel(session_id, session_name)
 
+    def _get_client_session_label(self) -> SessionLabel:
+        command = [self._bin, "list-clients", "-F", CLIENT_FORMAT]
+        output = self._run(command)
+        label = tmux_commands.parse_client_session(output, self._client_name)
+        if label is None:
+            raise ValueError("No session is currently running")
+        return label
+
     def kill_session(self, label: SessionLabel) -> None:
         """
         Kill the tmux session with the data in `session`.
@@ -190,7 +334,10 @@ class TmuxClient(Multiplexer):
         if label not in self.list_sessions():
             raise ValueError(f"Session {label.name} not found")
         command = [self._bin, "kill-session", "-t", label.id]
-        subprocess.run(command, check=True)
+        try:
+            self._run(command, capture_output=False)
+        finally:
+            self._invalidate_sessions()
 
     def rename_session(self, label: SessionLabel, new_name: str) -> None:
         """
@@ -200,19 +347,25 @@ class TmuxClient(Multiplexer):
             raise ValueError(f"Session {label.name} not found")
         label.name = new_name
         command = [self._bin, "rename-session", "-t", label.id, label.name]
-        subprocess.run(command, check=True)
+        try:
+            self._run(command, capture_output=False)
+        finally:
+            self._invalidate_sessions()
 
-    def create_new_session(self, session_name: str) -> None:
+    def create_new_session(self, session_name: str, focus: bool = True) -> None:
         """
         Create a new tmux session with the name `session_name`.
+        If `focus` is set, switch to the session once it is created.
         """
         try:
             command = [self._bin, "new-session", "-ds", session_name]
-            subprocess.run(command, check=True)
-            command = [self._bin, "switch-client", "-t", session_name]
-            subprocess.run(command, check=True)
+            self._run(command, capture_output=False)
+            if focus:
+                self._switch_client(session_name)
         except subprocess.CalledProcessError as error:
             raise ValueError("Session already exists") from error
+        finally:
+            self._invalidate_sessions()
 
     def focus_session(self, label: SessionLabel) -> None:
         """
@@ -220,5 +373,7 @@ class TmuxClient(Multiplexer):
         """
         if label not in self.list_sessions():
             raise ValueError(f"Session {label.name} not found")
-        command = [self._bin, "switch-client", "-t", label.id]
-        subprocess.run(command, check=True)
+        try:
+            self._switch_client(label.id)
+        finally:
+            self._invalidate_sessions()
@@ -0,0 +1,377 @@
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.data_models import JmuxPane, JmuxSession, JmuxWindow, SessionLabel
+
+from .session_codecs import layout_shape
+
+LABEL_FORMAT = "#{session_id}:#{session_name}"
+CLIENT_FORMAT = "#{client_name}:#{session_id}:#{session_name}"
+# Window names and paths may contain ":", so the fields are separated by
+# tabs, which tmux escapes in names. The path is last, so it may contain tabs.
+PANE_FORMAT = "\t".join(
+    [
+        "#{session_id}",
+        "#{session_name}",
+        "#{window_id}",
+        "#{window_name}",
+        "#{window_layout}",
+        "#{window_active}",
+        "#{pane_id}",
+        "#{pane_active}",
+        "#{pane_current_path}",
+    ]
+)
+# Everything in a window that changes when its panes do, so windows with
+# the same fingerprint as when they were captured don't need to be again.
+# The name is last, so it may contain ":".
+WINDOW_FORMAT = ":".join(
+    [
+        "#{session_id}",
+        "#{session_name}",
+        "#{window_id}",
+        "#{window_layout}",
+        "#{window_active}",
+        "#{window_panes}",
+        "#{window_activity}",
+        "#{pane_id}",
+        "#{window_name}",
+    ]
+)
+
+
+def escape_argument(argument: str) -> str:
+    """
+    Escape `argument` for the tmux command line,
+    where an argument ending in ";" ends a tmux command.
+    """
+    if argument != ";" and argument.endswith(";"):
+        return argument[:-1] + "\\;"
+    return argument
+
+
+def chain(commands: List[List[str]]) -> List[str]:
+    """
+    Chain `commands` into a single ";"-separated tmux command list.
+    """
+    chained: List[str] = []
+    for index, arguments in enumerate(commands):
+        if index > 0:
+            chained.append(";")
+        chained.extend(arguments)
+    return chained
+
+
+def switch_client_command(target: str, client_name: str = "") -> List[str]:
+    """
+    Switch the client named `client_name`, or the current client, to `target`.
+    """
+    command = ["switch-client", "-t", target]
+    if client_name:
+        command[1:1] = ["-c", client_name]
+    return command
+
+
+def parse_labels(output: str) -> List[SessionLabel]:
+    """
+    Parse the output of `list-sessions -F LABEL_FORMAT`.
+    """
+    sessions = output.split("\n")
+    return [SessionLabel(*session.split(":")) for session in sessions if session]
+
+
+def parse_client_session(output: str, client_name: str) -> Optional[SessionLabel]:
+    """
+    Parse the output of `list-clients -F CLIENT_FORMAT`
+    and get the session of the client named `client_name`.
+    """
+    for client in filter(None, output.split("\n")):
+        name, session_id, session_name = client.split(":")
+        if name == client_name:
+            return SessionLabel(session_id, session_name)
+    return None
+
+
+def parse_windows(output: str) -> List[Tuple[str, str, str, str]]:
+    """
+    Parse the output of `list-windows -F WINDOW_FORMAT` into the
+    session id, session name, window id and fingerprint of every window.
+    """
+    windows = []
+    for window_data in filter(None, output.split("\n")):
+        session_id, session_name, window_id, fingerprint = window_data.split(":", 3)
+        windows.append((session_id, session_name, window_id, fingerprint))
+    return windows
+
+
+def parse_sessions(output: str) -> List[JmuxSession]:
+    """
+    Rebuild the sessions in the output of `list-panes -F PANE_FORMAT`.
+    """
+    sessions: Dict[str, JmuxSession] = {}
+    windows: Dict[Tuple[str, str], JmuxWindow] = {}
+    for pane_data in filter(None, output.split("\n")):
+        session_id, session_name, *window_data = pane_data.split("\t", 8)
+        if session_id not in sessions:
+            sessions[session_id] = JmuxSession(session_id, session_name, [])
+        window_id, window_name, layout, window_active, *pane = window_data
+        key = (session_id, window_id)
+        if key not in windows:
+            windows[key] = JmuxWindow(
+                window_id, window_name, layout, window_active == "1", []
+            )
+            sessions[session_id].windows.append(windows[key])
+        pane_id, pane_active, pane_current_path = pane
+        windows[key].panes.append(
+            JmuxPane(pane_id, pane_active == "1", pane_current_path)
+        )
+    return list(sessions.values())
+
+
+def compile_session(
+    session: JmuxSession, switch_command: Optional[List[str]]
+) -> List[List[str]]:
+    """
+    Compile `session` into the list of tmux commands that create it,
+    followed by `switch_command` if one is given.
+    The window and pane every window is created with are used as its
+    first saved window and pane, so each pane's shell is started once,
+    in its own directory, and nothing has to be killed afterwards.
+    Every created session, window and pane prints its id, in order.
+    Windows are added at the end of the session and targeted as its last
+    window, so the commands don't depend on the base-index option.
+    """
+    if len(session.windows) == 0:
+        raise ValueError("Session must have at least one window")
+    target = f"={session.name}"
+    first_window = session.windows[0]
+    commands = [
+        [
+            "new-session",
+            "-ds",
+            session.name,
+            "-n",
+            first_window.name,
+            "-c",
+            _first_pane(first_window).current_dir,
+            "-PF",
+            "#{session_id} #{window_id} #{pane_id}",
+        ]
+    ]
+    window_target = f"{target}:{{end}}"
+    commands.extend(_compile_panes(window_target, first_window))
+    for window in session.windows[1:]:
+        commands.extend(_compile_window(f"{target}:", window_target, window))
+    if switch_command is not None:
+        commands.append(switch_command)
+    return commands
+
+
+def focus_order(session: JmuxSession) -> List[int]:
+    """
+    Get the indexes of the windows of `session` in the order to create them
+    in: the focused window first, then the others by their distance from it,
+    each window after it before the window as far before it.
+    """
+    focused = next(
+        (index for index, window in enumerate(session.windows) if window.focus), 0
+    )
+    return sorted(
+        range(len(session.windows)),
+        key=lambda index: (abs(index - focused), index < focused),
+    )
+
+
+def compile_window_insert(
+    window: JmuxWindow, neighbour_id: str, before: bool
+) -> List[str]:
+    """
+    Compile the command that adds `window`, with its first pane, right before
+    or after the window `neighbour_id` without switching to it,
+    printing the ids of the window and its pane.
+    """
+    return [
+        "neww",
+        "-d",
+        "-b" if before else "-a",
+        "-t",
+        neighbour_id,
+        "-n",
+        window.name,
+        "-c",
+        _first_pane(window).current_dir,
+        "-PF",
+        "#{window_id} #{pane_id}",
+    ]
+
+
+def compile_window_panes(window: JmuxWindow) -> List[List[str]]:
+    """
+    Compile the commands that add the other panes of the created `window`,
+    which has its id and first pane, and lay them out.
+    """
+    return _compile_panes(window.id, window)
+
+
+def _first_pane(window: JmuxWindow) -> JmuxPane:
+    if len(window.panes) == 0:
+        raise ValueError("Window must have at least one pane")
+    return window.panes[0]
+
+
+def _compile_window(
+    session_target: str, target: str, window: JmuxWindow
+) -> List[List[str]]:
+    command = [
+        "neww",
+        "-t",
+        session_target,
+        "-n",
+        window.name,
+        "-c",
+        _first_pane(window).current_dir,
+        "-PF",
+        "#{window_id} #{pane_id}",
+    ]
+    if not window.focus:
+        command.append("-d")
+    return [command, *_compile_panes(target, window)]
+
+
+def _compile_panes(target: str, window: JmuxWindow) -> List[List[str]]:
+    # The first pane already exists. A split pane is put right after the one
+    # split, which stays top-left, so splitting the first pane with the other
+    # panes last to first leaves them in their saved order, whatever the
+    # pane-base-index. The first pane stays active unless the focused pane
+    # is split off without -d.
+    first = f"{target}.{{top-left}}"
+    commands = [_compile_pane(first, pane) for pane in reversed(window.panes[1:])]
+    commands.append(["select-layout", "-t", target, window.layout])
+    return commands
+
+
+def _compile_pane(target: str, pane: JmuxPane) -> List[str]:
+    command = ["splitw", "-t", target, "-c", pane.current_dir, "-PF", "#{pane_id}"]
+    if not pane.focus:
+        command.append("-d")
+    return command
+
+
+def assign_ids(session: JmuxSession, output: str) -> None:
+    """
+    Set the ids printed while creating `session` on its windows and panes.
+    """
+    ids = iter(output.split())
+    session.id = next(ids, "")
+    for window in session.windows:
+        _assign_window_ids(window, ids)
+
+
+def assign_window_ids(window: JmuxWindow, output: str) -> None:
+    """
+    Set the ids printed while creating `window` on it and its panes.
+    """
+    _assign_window_ids(window, iter(output.split()))
+
+
+def _assign_window_ids(window: JmuxWindow, ids: Iterator[str]) -> None:
+    window.id = next(ids, "")
+    if not window.panes:
+        return
+    window.panes[0].id = next(ids, "")
+    # The other panes are split off last to first.
+    for pane in reversed(window.panes[1:]):
+        pane.id = next(ids, "")
+
+
+def match_windows(
+    saved: JmuxSession, live: JmuxSession
+) -> List[Tuple[JmuxWindow, Optional[JmuxWindow]]]:
+    """
+    Pair every window of `saved` with the window of the same name in `live`,
+    or None if `live` has no such window. Windows sharing a name are paired in order.
+    """
+    by_name: Dict[str, List[JmuxWindow]] = {}
+    for window in live.windows:
+        by_name.setdefault(window.name, []).append(window)
+    return [
+        (window, by_name[window.name].pop(0) if by_name.get(window.name) else None)
+        for window in saved.windows
+    ]
+
+
+def compile_new_window(session_name: str, window: JmuxWindow) -> List[str]:
+    """
+    Compile the command that adds `window`, with its first pane, at the end
+    of the session `session_name`, printing the ids of the window and its pane.
+    """
+    if len(window.panes) == 0:
+        raise ValueError("Window must have at least one pane")
+    return [
+        "neww",
+        "-d",
+        "-t",
+        f"={session_name}:",
+        "-n",
+        window.name,
+        "-c",
+        window.panes[0].current_dir,
+        "-PF",
+        "#{window_id} #{pane_id}",
+    ]
+
+
+def compile_window_fix(saved: JmuxWindow, live: JmuxWindow) -> List[List[str]]:
+    """
+    Compile the commands that add the panes of `saved` missing from `live`
+    and give `live` the layout of `saved`. Panes are matched by directory,
+    and the layout is only set when `live` ends up with as many panes as
+    `saved` has, as a layout only fits windows with its number of panes.
+    Missing panes are put next to the matched panes around them in `saved`,
+    so the layout puts every directory back in its cell.
+    """
+    matched = _match_panes(saved, live)
+    commands = []
+    # A split pane is put right after the one split, so the panes missing
+    # after a matched pane are split off it last to first. The ones before
+    # the first matched pane are split off before it, first to last.
+    first = next((pane for pane in matched if pane is not None), None)
+    anchor = None if first is not None or not live.panes else live.panes[-1]
+    missing: List[JmuxPane] = []
+    for pane, live_pane in zip(saved.panes + [None], matched + [None]):
+        if pane is not None and live_pane is None:
+            missing.append(pane)
+            continue
+        if anchor is None and first is not None:
+            commands.extend(_split_before(first.id, missing))
+        elif anchor is not None:
+            commands.extend(_split_after(anchor.id, missing))
+        anchor, missing = live_pane, []
+    fits = len(live.panes) + len(commands) == len(saved.panes)
+    if fits and (commands or layout_shape(live.layout) != layout_shape(saved.layout)):
+        commands.append(["select-layout", "-t", live.id, saved.layout])
+    return commands
+
+
+def _match_panes(saved: JmuxWindow, live: JmuxWindow) -> List[Optional[JmuxPane]]:
+    # The live pane with the directory of each saved pane, taken in order.
+    by_dir: Dict[str, List[JmuxPane]] = {}
+    for pane in live.panes:
+        by_dir.setdefault(pane.current_dir, []).append(pane)
+    return [
+        by_dir[pane.current_dir].pop(0) if by_dir.get(pane.current_dir) else None
+        for pane in saved.panes
+    ]
+
+
+def _split_after(target: str, panes: List[JmuxPane]) -> List[List[str]]:
+    return [
+        ["splitw", "-d", "-t", target, "-c", pane.current_dir]
+        for pane in reversed(panes)
+    ]
+
+
+def _split_before(target: str, panes: List[JmuxPane]) -> List[List[str]]:
+    return [
+        ["splitw", "-d", "-b", "-t", target, "-c", pane.current_dir] for pane in panes
+    ]
@@ -0,0 +1,199 @@
+import shlex
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import IO, Callable, Deque, List, Optional
+
+NotificationCallback = Callable[[str, List[str]], None]
+
+
+def get_client_name(binary: str) -> str:
+    """
+    Get the name of the tmux client the calling process runs in.
+    A control client is a client of its own, so commands acting on
+    "the current client" have to name this one instead.
+    """
+    command = [binary, "display-message", "-p", "#{client_name}"]
+    response = subprocess.run(command, capture_output=True, text=True, check=True)
+    return response.stdout.strip()
+
+
+@dataclass
+class _PendingCommand:
+    """
+    A command line waiting for its replies, one block per command in the line.
+    """
+
+    command: List[str]
+    blocks: int
+    future: Future = field(default_factory=Future)
+    output: List[str] = field(default_factory=list)
+
+
+class TmuxControlMode:
+    def __init__(self, binary: str, timeout: float = 10.0) -> None:
+        """
+        A persistent tmux control mode (`tmux -C`) connection.
+        Commands are written to the control client and matched with their
+        `%begin`/`%end` replies, so no process is spawned per command.
+        """
+        self._bin = binary
+        self.timeout = timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._pending: Deque[_PendingCommand] = deque()
+        self._write_lock = threading.Lock()
+        self._subscribers: List[NotificationCallback] = []
+        self._block: Optional[List[str]] = None
+        self._exited = False
+
+    def start(self) -> None:
+        """
+        Attach a control client to the tmux server.
+        """
+        if self._reader is not None:
+            # Let the reader of a previous client fail its pending commands.
+            self._reader.join(timeout=self.timeout)
+        self._exited = False
+        command = [
+            self._bin,
+            "-C",
+            "attach-session",
+            "-f",
+            "no-output,ignore-size",
+        ]
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+            bufsize=1,
+        )
+        self._reader = threading.Thread(
+            target=self._read_loop, args=(self._process.stdout,), daemon=True
+        )
+        self._reader.start()
+
+    def is_alive(self) -> bool:
+        """
+        Check if the control client is still attached.
+        """
+        return (
+            not self._exited
+            and self._process is not None
+            and self._process.poll() is None
+            and self._reader is not None
+            and self._reader.is_alive()
+        )
+
+    def close(self) -> None:
+        """
+        Detach the control client.
+        """
+        if self._process is None:
+            return
+        try:
+            if self._process.stdin:
+                self._process.stdin.close()
+            self._process.wait(timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        self._process = None
+
+    def subscribe(self, callback: NotificationCallback) -> None:
+        """
+        Call `callback` with the name and arguments of every
+        notification (e.g. `%sessions-changed`) sent by tmux.
+        """
+        self._subscribers.append(callback)
+
+    def run(self, command: List[str]) -> str:
+        """
+        Run `command` (without the tmux binary) and return its output.
+        A bare ";" in `command` separates several tmux commands.
+        Raises subprocess.CalledProcessError if tmux reports an error.
+        """
+        return self.submit(command).result(timeout=self.timeout)
+
+    def submit(self, command: List[str]) -> Future:
+        """
+        Send `command` without waiting for it to finish.
+        The returned future resolves to the output of the command.
+        A client that was detached, for example because the session it
+        was attached to was killed, is attached again first.
+        """
+        line = self._format_command(command)
+        pending = _PendingCommand(command, command.count(";") + 1)
+        with self._write_lock:
+            if not self.is_alive():
+                self.start()
+            assert self._process is not None and self._process.stdin is not None
+            self._pending.append(pending)
+            try:
+                self._process.stdin.write(line + "\n")
+                self._process.stdin.flush()
+            except OSError as error:
+                self._pending.remove(pending)
+                raise ConnectionError("tmux control client is not attached") from error
+        return pending.future
+
+    def _format_command(self, command: List[str]) -> str:
+        if any("\n" in argument for argument in command):
+            raise ValueError("Control mode commands cannot contain newlines")
+        return " ".join(
+            argument if argument == ";" else shlex.quote(argument)
+            for argument in command
+        )
+
+    def _read_loop(self, stdout: IO[str]) -> None:
+        for line in stdout:
+            self._handle_line(line.rstrip("\n"))
+        self._fail_pending(ConnectionError("tmux control client exited"))
+
+    def _handle_line(self, line: str) -> None:
+        if self._block is not None:
+            if line.startswith(("%end ", "%error ")):
+                self._finish_block(line)
+            else:
+                self._block.append(line)
+            return
+        if line.startswith("%begin "):
+            self._block = []
+        elif line.startswith("%"):
+            name, *arguments = line[1:].split(" ")
+            if name == "exit":
+                # tmux detaches the client, the next command attaches a new one.
+                self._exited = True
+            for callback in self._subscribers:
+                callback(name, arguments)
+
+    def _finish_block(self, line: str) -> None:
+        block = self._block or []
+        self._block = None
+        status, _time, _number, flags = line.split(" ")
+        # Blocks with flags 0 are not replies to commands sent by this client.
+        if flags != "1" or not self._pending:
+            return
+        pending = self._pending[0]
+        if status == "%error":
+            # tmux skips the rest of a command line after a failing command.
+            self._pending.popleft()
+            error = subprocess.CalledProcessError(
+                1, pending.command, "\n".join(pending.output), "\n".join(block)
+            )
+            pending.future.set_exception(error)
+            return
+        pending.output.extend(block)
+        pending.blocks -= 1
+        if pending.blocks == 0:
+            self._pending.popleft()
+            pending.future.set_result("\n".join(pending.output))
+
+    def _fail_pending(self, error: Exception) -> None:
+        self._block = None
+        while self._pending:
+            self._pending.popleft().future.set_exception(error)
@@ -0,0 +1,81 @@
+import atexit
+import threading
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class WriteBehindQueue(Generic[T]):
+    def __init__(self, write: Callable[[List[T]], None], delay: float) -> None:
+        """
+        Queue of pending writes that are handed to `write` in one batch,
+        `delay` seconds after the first of them was queued or when the
+        queue is flushed. Writes queued under the same key are coalesced,
+        so only the latest one is written. Pending writes are flushed at exit.
+        """
+        if delay < 0:
+            raise ValueError("Invalid delay value")
+        self.delay = delay
+        self._write = write
+        self._pending: Dict[str, T] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def put(self, key: str, item: T) -> None:
+        """
+        Queue `item` to be written, replacing any write pending under `key`.
+        """
+        with self._lock:
+            self._pending[key] = item
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def get(self, key: str) -> Optional[T]:
+        """
+        Get the item pending under `key`, if any.
+        """
+        with self._lock:
+            return self._pending.get(key)
+
+    def pending(self) -> List[T]:
+        """
+        Get the items waiting to be written.
+        """
+        with self._lock:
+            return list(self._pending.values())
+
+    def discard(self, key: str) -> Optional[T]:
+        """
+        Drop the write pending under `key` and return its item, if any.
+        """
+        with self._lock:
+            return self._pending.pop(key, None)
+
+    def flush(self) -> None:
+        """
+        Write all pending items now, in one batch.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            items, self._pending = self._pending, {}
+            try:
+                self._write(list(items.values()))
+            except Exception:
+                # Keep the failed writes, unless they were queued again since.
+                for key, item in items.items():
+                    self._pending.setdefault(key, item)
+                raise
+
+    def close(self) -> None:
+        """
+        Flush the pending writes and stop flushing at exit.
+        """
+        atexit.unregister(self.flush)
+        self.flush()
@@ -1,14 +1,29 @@
 __all__ = [
+    "CacheInfo",
+    "FuzzyMatch",
     "JmuxPane",
     "JmuxSession",
     "JmuxWindow",
+    "RestoreResult",
     "SessionLabel",
+    "SessionSnapshot",
+    "SessionVersion",
     "Event",
     "CursesStates",
     "Key",
 ]
 
-from .data_models import JmuxPane, JmuxSession, JmuxWindow, SessionLabel
+from .data_models import (
+    CacheInfo,
+    FuzzyMatch,
+    JmuxPane,
+    JmuxSession,
+    JmuxWindow,
+    RestoreResult,
+    SessionLabel,
+    SessionSnapshot,
+    SessionVersion,
+)
 from .events import Event
 from .keys import Key
 from .states import CursesStates
@@ -1,4 +1,18 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class CacheInfo:
+    """
+    Hit and miss counters and the current size of a cache.
+    """
+
+    hits: int
+    misses: int
+    entries: int
+    size: int
+    max_size: int
 
 
 @dataclass
@@ -36,6 +50,29 @@ class JmuxSession:
     windows: list[JmuxWindow]
 
 
+@dataclass
+class FuzzyMatch:
+    """
+    A name matching a fuzzy query, by its index in the names searched.
+    `positions` are the indexes of the matched characters in the name.
+    """
+
+    index: int
+    positions: tuple[int, ...]
+    score: int
+
+
+@dataclass
+class RestoreResult:
+    """
+    The outcome of restoring or saving a session.
+    An empty `error` means the session was restored or saved.
+    """
+
+    name: str
+    error: str = ""
+
+
 @dataclass
 class SessionLabel:
     """
@@ -44,3 +81,44 @@ class SessionLabel:
 
     id: str
     name: str
+
+
+@dataclass
+class SessionVersion:
+    """
+    A snapshot in the history of a saved session.
+    `hash` identifies the snapshot and `saved_at` is a unix timestamp.
+    """
+
+    name: str
+    hash: str
+    saved_at: float
+
+
+@dataclass
+class SessionSnapshot:
+    """
+    The running, saved and active sessions at one point in time,
+    indexed by (id, name) so membership checks are set lookups.
+    """
+
+    running: list[SessionLabel]
+    saved: list[SessionLabel]
+    active: Optional[SessionLabel] = None
+    running_keys: frozenset[tuple[str, str]] = field(init=False)
+    saved_keys: frozenset[tuple[str, str]] = field(init=False)
+    running_and_saved: frozenset[tuple[str, str]] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.running_keys = frozenset((label.id, label.name) for label in self.running)
+        self.saved_keys = frozenset((label.id, label.name) for label in self.saved)
+        self.running_and_saved = self.running_keys & self.saved_keys
+
+    def is_active(self, label: SessionLabel) -> bool:
+        return self.active is not None and label == self.active
+
+    def is_running(self, label: SessionLabel) -> bool:
+        return (label.id, label.name) in self.running_keys
+
+    def is_saved(self, label: SessionLabel) -> bool:
+        return (label.id, label.name) in self.saved_keys
@@ -19,3 +19,6 @@ class Event(Enum):
     SHOW_MESSAGE = 14
     CONFIRM = 15
     INPUT = 16
+    RESTORE_SESSIONS = 17
+    RECONCILE_SESSION = 18
+    FILTER = 19
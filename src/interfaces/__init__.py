@@ -1,13 +1,17 @@
 __all__ = [
+    "AsyncMultiplexer",
     "Model",
     "Multiplexer",
     "Presenter",
     "View",
     "FileHandler",
+    "SessionCodec",
 ]
 
+from .async_multiplexer import AsyncMultiplexer
 from .file_handler import FileHandler
 from .model import Model
 from .multiplexer import Multiplexer
 from .presenter import Presenter
+from .session_codec import SessionCodec
 from .view import View
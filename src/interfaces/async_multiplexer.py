@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from src.data_models import JmuxSession, SessionLabel
+
+
+class AsyncMultiplexer(ABC):
+    @abstractmethod
+    def __init__(self) -> None:
+        """
+        Abstract class for an asyncio terminal multiplexer API.
+        Responsible for communicating with the terminal multiplexer
+        without blocking the event loop.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_running(self) -> bool:
+        """
+        Check if the terminal multiplexer is running.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_sessions(self) -> List[SessionLabel]:
+        """
+        Get a list of all the currently running sessions.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_current_session_label(self) -> SessionLabel:
+        """
+        Get the name and id of the currently running session.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_session(self, label: SessionLabel) -> JmuxSession:
+        """
+        Get the data of the session with the id `session_id`.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_sessions(self) -> List[JmuxSession]:
+        """
+        Get the data of all the running sessions.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_session(self, session: JmuxSession, focus: bool = True) -> None:
+        """
+        Create a session with the data in `session`.
+        If `focus` is set, switch to the session once it is created.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def kill_session(self, label: SessionLabel) -> None:
+        """
+        Kill the session with the data in `session`.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def rename_session(self, label: SessionLabel, new_name: str) -> None:
+        """
+        Rename the sessions name to `new_name` and update the session object.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_new_session(self, session_name: str, focus: bool = True) -> None:
+        """
+        Create a new session with the name `session_name`.
+        If `focus` is set, switch to the session once it is created.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Close the connection to the terminal multiplexer, if one is open.
+        """
+
+    @abstractmethod
+    async def focus_session(self, label: SessionLabel) -> None:
+        """
+        Focus the session with the data in `session`.
+        """
+        raise NotImplementedError
@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List
+from typing import Hashable, List
 
-from src.data_models import JmuxSession, SessionLabel
+from src.data_models import JmuxSession, SessionLabel, SessionVersion
 
 
 class FileHandler(ABC):
@@ -15,9 +15,10 @@ class FileHandler(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def save_session(self, session: JmuxSession) -> None:
+    def save_session(self, session: JmuxSession) -> bool:
         """
         Save the session to a file with the name of the session in the sessions folder.
+        Returns False if the saved session was unchanged.
         """
         raise NotImplementedError
 
@@ -35,6 +36,53 @@ class FileHandler(ABC):
         """
         raise NotImplementedError
 
+    def rename_session(self, session_name: str, new_name: str) -> None:
+        """
+        Rename the saved session `session_name` to `new_name`.
+        """
+        session = self.load_session(session_name)
+        session.name = new_name
+        self.save_session(session)
+        if new_name != session_name:
+            self.delete_session(session_name)
+
+    def flush(self) -> None:
+        """
+        Write any saves the file handler is still holding back.
+        """
+
+    def change_marker(self) -> Hashable:
+        """
+        Get a value that changes whenever the saved sessions do, and is cheap
+        to get, so it can be polled. By default it never changes.
+        """
+        return None
+
+    def list_history(self, session_name: str) -> List[SessionVersion]:
+        """
+        Get the saved versions of the session `session_name`, newest first.
+        """
+        raise NotImplementedError
+
+    def load_version(self, session_name: str, version: str) -> JmuxSession:
+        """
+        Load the saved version `version` of the session `session_name`.
+        """
+        raise NotImplementedError
+
+    def restore_version(self, session_name: str, version: str) -> bool:
+        """
+        Save the version `version` of the session `session_name` as its latest one.
+        """
+        return self.save_session(self.load_version(session_name, version))
+
+    def prune_history(self, keep: int) -> int:
+        """
+        Drop all but the latest `keep` versions of every saved session.
+        Returns the number of versions dropped.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def list_sessions(self) -> List[SessionLabel]:
         """
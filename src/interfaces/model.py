@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Callable, List, Optional
 
-from src.data_models import SessionLabel
+from src.data_models import RestoreResult, SessionLabel, SessionSnapshot
 from src.interfaces.file_handler import FileHandler
 from src.interfaces.multiplexer import Multiplexer
 
@@ -22,16 +22,61 @@ class Model(ABC):
         """
         raise NotImplementedError
 
-    def save_session(self, label: SessionLabel) -> None:
+    def save_session(self, label: SessionLabel) -> bool:
         """
         Save the session with `label` to a file.
+        Returns False if the saved session was unchanged.
+        """
+        raise NotImplementedError
+
+    def save_sessions(
+        self,
+        labels: Optional[List[SessionLabel]] = None,
+        on_progress: Optional[Callable[[RestoreResult, int, int], None]] = None,
+    ) -> None:
+        """
+        Save the running sessions with `labels`, or every running session,
+        in the background, reporting each one to `on_progress`.
         """
         raise NotImplementedError
 
     @abstractmethod
-    def load_session(self, label: SessionLabel) -> None:
+    def load_session(
+        self,
+        label: SessionLabel,
+        on_progress: Optional[Callable[[RestoreResult, int, int], None]] = None,
+    ) -> None:
         """
         Load the session with `label` from a file.
+        With `on_progress` its windows other than the focused one are
+        created in the background, reporting each one to `on_progress`.
+        """
+        raise NotImplementedError
+
+    def wait(self) -> None:
+        """
+        Wait for the work the model does in the background.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def restore_sessions(
+        self,
+        labels: Optional[List[SessionLabel]] = None,
+        max_workers: int = 4,
+        on_progress: Optional[Callable[[RestoreResult, int, int], None]] = None,
+    ) -> List[RestoreResult]:
+        """
+        Restore the saved sessions with `labels`, or every saved session,
+        with at most `max_workers` restores running at a time.
+        """
+        raise NotImplementedError
+
+    def reconcile_session(self, label: SessionLabel) -> int:
+        """
+        Add the windows and panes of the saved session with `label` that
+        are missing from the running session with its name, and fix its layouts.
+        Returns the number of windows, panes and layouts changed.
         """
         raise NotImplementedError
 
@@ -76,3 +121,29 @@ class Model(ABC):
         Get the currently active/focused session in the terminal multiplexer.
         """
         raise NotImplementedError
+
+    @abstractmethod
+    def get_snapshot(self) -> SessionSnapshot:
+        """
+        Get a snapshot of the running, saved and active sessions.
+        The snapshot is reused until it is invalidated.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate_snapshot(self) -> None:
+        """
+        Drop the current snapshot, so the next one is read fresh.
+        """
+        raise NotImplementedError
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        """
+        Call `callback` whenever the running or saved sessions may have changed.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Stop whatever the model watches for changes.
+        """
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List
+from concurrent.futures import Future
+from typing import Callable, Iterator, List
 
-from src.data_models import JmuxSession, SessionLabel
+from src.data_models import JmuxSession, JmuxWindow, SessionLabel
 
 
 class Multiplexer(ABC):
@@ -42,12 +43,63 @@ class Multiplexer(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def create_session(self, session: JmuxSession) -> None:
+    def get_sessions(self) -> List[JmuxSession]:
+        """
+        Get the data of all the running sessions.
+        """
+        raise NotImplementedError
+
+    def capture_sessions(self, labels: List[SessionLabel]) -> List[Future]:
+        """
+        Start capturing the sessions with `labels`, and return a future
+        of the data of each. By default every session is captured
+        before this returns, one after another.
+        """
+        futures = []
+        for label in labels:
+            future: Future = Future()
+            try:
+                future.set_result(self.get_session(label))
+            except (ValueError, OSError) as error:
+                future.set_exception(error)
+            futures.append(future)
+        return futures
+
+    @abstractmethod
+    def create_session(self, session: JmuxSession, focus: bool = True) -> None:
         """
         Create a session with the data in `session`.
+        If `focus` is set, switch to the session once it is created.
+        """
+        raise NotImplementedError
+
+    def create_session_lazily(
+        self, session: JmuxSession, focus: bool = True
+    ) -> Iterator[JmuxWindow]:
+        """
+        Create a session with the focused window in `session`, and switch to
+        it if `focus` is set. The returned iterator creates the other windows,
+        yielding each once it exists. By default the whole session is created
+        at once, leaving nothing for the iterator.
+        """
+        self.create_session(session, focus)
+        return iter([])
+
+    def reconcile_session(self, session: JmuxSession) -> int:
+        """
+        Add the windows and panes of `session` missing from the running
+        session with its name, and fix its layouts.
+        Returns the number of windows, panes and layouts changed.
         """
         raise NotImplementedError
 
+    def subscribe(self, callback: Callable[[str, List[str]], None]) -> bool:
+        """
+        Call `callback` with the name and arguments of every notification
+        the terminal multiplexer sends. Returns False if it sends none.
+        """
+        return False
+
     @abstractmethod
     def kill_session(self, label: SessionLabel) -> None:
         """
@@ -63,9 +115,10 @@ class Multiplexer(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def create_new_session(self, session_name: str) -> None:
+    def create_new_session(self, session_name: str, focus: bool = True) -> None:
         """
         Create a new session with the name `session_name`.
+        If `focus` is set, switch to the session once it is created.
         """
         raise NotImplementedError
 
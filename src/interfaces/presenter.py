@@ -33,6 +33,12 @@ class Presenter(ABC, Generic[ReturnType]):
         """
         raise NotImplementedError
 
+    def render_view(self) -> None:
+        """
+        Render the view again with the data the presenter already has.
+        """
+        self.update_view()
+
     @abstractmethod
     def get_event(self) -> Event:
         """
@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+
+from src.data_models import JmuxSession
+
+
+class SessionCodec(ABC):
+    suffix: str = ""
+
+    @abstractmethod
+    def encode(self, session: JmuxSession) -> bytes:
+        """
+        Encode `session` into the bytes of a session file.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def decode(self, data: bytes) -> JmuxSession:
+        """
+        Decode the bytes of a session file written by `encode`.
+        """
+        raise NotImplementedError
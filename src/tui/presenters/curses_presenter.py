@@ -1,6 +1,8 @@
-from typing import Optional, Union
+import queue
+import threading
+from typing import Optional, Tuple, Union
 
-from src.data_models import CursesStates, Event, SessionLabel
+from src.data_models import CursesStates, Event, RestoreResult, SessionLabel
 from src.interfaces import Model, Presenter, View
 
 
@@ -23,6 +25,11 @@ class CursesPresenter(Presenter[None]):
         self.command_bar: Presenter[Union[bool, str, None]] = command_bar
         self.active: bool = False
         self.state: CursesStates = CursesStates.MULTIPLEXER_MENU
+        # Messages from background threads, shown by the event loop.
+        self.messages: queue.SimpleQueue[Tuple[str, bool]] = queue.SimpleQueue()
+        # Set by the model, possibly from another thread, when sessions change.
+        self.changed = threading.Event()
+        self.model.subscribe(self.changed.set)
         self._render_starting_screen()
 
     def _render_starting_screen(self) -> None:
@@ -37,19 +44,44 @@ class CursesPresenter(Presenter[None]):
         Activate the presenter.
         """
         self.active = not self.active
+        event = Event.UNKNOWN
         while self.active:
-            self.update_view()
+            # The model is only asked again when it reported a change.
+            # The menus return NOOP when no key was pressed for a while,
+            # which only needs the queued messages shown.
+            if self.changed.is_set():
+                self.changed.clear()
+                self.update_view()
+            elif event != Event.NOOP:
+                self.render_view()
+            self._show_messages()
             event = self.get_event()
             self.handle_event(event)
 
+    def _show_messages(self) -> None:
+        while not self.messages.empty():
+            message, is_error = self.messages.get()
+            self.command_bar.handle_event(
+                Event.SHOW_MESSAGE, message, is_error=is_error
+            )
+
     def update_view(self) -> None:
         """
         Update views based on the current state.
+        Both menus share one model snapshot per update.
         """
+        self.model.invalidate_snapshot()
         self.command_bar.update_view()
         self.file_menu.update_view()
         self.multiplexer_menu.update_view()
 
+    def render_view(self) -> None:
+        """
+        Render the menus again from what they got in the last update.
+        """
+        self.file_menu.render_view()
+        self.multiplexer_menu.render_view()
+
     def get_event(self) -> Event:
         """
         Get an event from the presenter based on the current state.
@@ -89,7 +121,13 @@ class CursesPresenter(Presenter[None]):
                 self._delete_session()
             case Event.RENAME_SESSION:
                 self._rename_session()
-            case Event.UNKNOWN:
+            case Event.RESTORE_SESSIONS:
+                self._restore_sessions()
+            case Event.RECONCILE_SESSION:
+                self._reconcile_session()
+            case Event.FILTER:
+                self._filter()
+            case Event.UNKNOWN | Event.NOOP:
                 pass
             case _:
                 self._invalid_command(event)
@@ -166,11 +204,11 @@ class CursesPresenter(Presenter[None]):
 
     def _load_session(self) -> None:
         """
-        Load the currently selected session.
+        Load the currently selected session, starting with its focused window.
         """
         try:
             session = self._get_session()
-            self.model.load_session(session)
+            self.model.load_session(session, on_progress=self._queue_progress)
         except ValueError as error:
             self.command_bar.handle_event(Event.SHOW_MESSAGE, str(error), is_error=True)
 
@@ -210,7 +248,9 @@ class CursesPresenter(Presenter[None]):
                 f"Overwrite {session.name}? (y/N)", "Error: session not saved"
             ):
                 return
-            self.model.save_session(session)
+            if self.model.save_session(session) is False:
+                message = f"{session.name} is unchanged"
+                self.command_bar.handle_event(Event.SHOW_MESSAGE, message)
         except ValueError as error:
             self.command_bar.handle_event(Event.SHOW_MESSAGE, str(error), is_error=True)
 
@@ -243,6 +283,70 @@ class CursesPresenter(Presenter[None]):
         except ValueError as error:
             self.command_bar.handle_event(Event.SHOW_MESSAGE, str(error), is_error=True)
 
+    def _restore_sessions(self) -> None:
+        """
+        Restore all saved sessions that are not running.
+        """
+        try:
+            if not self._confirm(
+                "Restore all saved sessions? (y/N)", "Error: sessions not restored"
+            ):
+                return
+            results = self.model.restore_sessions(on_progress=self._show_progress)
+        except ValueError as error:
+            self.command_bar.handle_event(Event.SHOW_MESSAGE, str(error), is_error=True)
+            return
+        failed = [result.name for result in results if result.error]
+        if failed:
+            message = f"Error: failed to restore {', '.join(failed)}"
+            self.command_bar.handle_event(Event.SHOW_MESSAGE, message, is_error=True)
+            return
+        message = f"Restored {len(results)} sessions"
+        self.command_bar.handle_event(Event.SHOW_MESSAGE, message)
+
+    def _reconcile_session(self) -> None:
+        """
+        Restore what the selected running session is missing from its save.
+        """
+        try:
+            session = self._get_session()
+            changes = self.model.reconcile_session(session)
+        except ValueError as error:
+            self.command_bar.handle_event(Event.SHOW_MESSAGE, str(error), is_error=True)
+            return
+        message = f"{session.name} is up to date"
+        if changes:
+            message = f"Made {changes} changes to {session.name}"
+        self.command_bar.handle_event(Event.SHOW_MESSAGE, message)
+
+    def _filter(self) -> None:
+        """
+        Narrow the current menu to the sessions matching what is typed.
+        Enter keeps the filter, and escape clears it.
+        """
+        menu = self.multiplexer_menu
+        if self.state == CursesStates.FILE_MENU:
+            menu = self.file_menu
+        query = self.command_bar.handle_event(
+            Event.INPUT,
+            "/",
+            on_change=lambda text: menu.handle_event(Event.FILTER, text),
+        )
+        menu.handle_event(Event.FILTER, query if isinstance(query, str) else "")
+
+    def _show_progress(self, result: RestoreResult, done: int, total: int) -> None:
+        message = self._progress_message(result, done, total)
+        self.command_bar.handle_event(Event.SHOW_MESSAGE, message)
+
+    def _queue_progress(self, result: RestoreResult, done: int, total: int) -> None:
+        # Called from the thread loading the session, which can't draw.
+        message = self._progress_message(result, done, total)
+        self.messages.put((message, bool(result.error)))
+
+    def _progress_message(self, result: RestoreResult, done: int, total: int) -> str:
+        status = f"failed: {result.error}" if result.error else "restored"
+        return f"[{done}/{total}] {result.name} {status}"
+
     def _invalid_command(self, command: Event) -> None:
         """
         Handle an invalid command.
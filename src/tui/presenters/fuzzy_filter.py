@@ -0,0 +1,86 @@
+import os
+from typing import List, Sequence
+
+from src.data_models import FuzzyMatch
+
+# Every matched character scores, more so at the start of a word
+# or right after the character matched before it.
+MATCH_SCORE = 1
+WORD_START_BONUS = 8
+CONSECUTIVE_BONUS = 4
+
+
+class FuzzyFilter:
+    def __init__(self, names: Sequence[str]) -> None:
+        """
+        Matches queries against `names` by their characters in order,
+        ignoring case. Every name is indexed up front in lower case, and the
+        matches of each prefix of the last query are kept, so typing one more
+        character only searches the names that still matched from where their
+        match ended, and deleting one goes back to a kept result.
+        """
+        self.names = list(names)
+        self.query = ""
+        self._keys = [self._fold(name) for name in self.names]
+        # The matches of each prefix of the query, after the empty one.
+        self._steps: List[List[FuzzyMatch]] = []
+
+    def _fold(self, name: str) -> str:
+        key = name.lower()
+        if len(key) != len(name):
+            # Some characters grow in lower case, which would shift positions.
+            key = "".join(char.lower()[0] for char in name)
+        return key
+
+    def match(self, query: str) -> List[FuzzyMatch]:
+        """
+        Get the names matching `query`, best first.
+        Names that score the same keep their order.
+        """
+        query = self._fold(query)
+        common = len(os.path.commonprefix([query, self.query]))
+        del self._steps[common:]
+        for char in query[common:]:
+            if self._steps:
+                self._steps.append(self._refine(self._steps[-1], char))
+            else:
+                self._steps.append(self._start(char))
+        self.query = query
+        if not query:
+            return [FuzzyMatch(index, (), 0) for index in range(len(self.names))]
+        return sorted(self._steps[-1], key=lambda match: -match.score)
+
+    def _start(self, char: str) -> List[FuzzyMatch]:
+        matches = []
+        for index, key in enumerate(self._keys):
+            position = key.find(char)
+            if position < 0:
+                continue
+            score = MATCH_SCORE
+            if self._is_word_start(self.names[index], position):
+                score += WORD_START_BONUS
+            matches.append(FuzzyMatch(index, (position,), score))
+        return matches
+
+    def _refine(self, matches: List[FuzzyMatch], char: str) -> List[FuzzyMatch]:
+        refined = []
+        for match in matches:
+            start = match.positions[-1] + 1
+            position = self._keys[match.index].find(char, start)
+            if position < 0:
+                continue
+            score = match.score + MATCH_SCORE
+            if position == start:
+                score += CONSECUTIVE_BONUS
+            if self._is_word_start(self.names[match.index], position):
+                score += WORD_START_BONUS
+            refined.append(
+                FuzzyMatch(match.index, match.positions + (position,), score)
+            )
+        return refined
+
+    def _is_word_start(self, name: str, position: int) -> bool:
+        if position == 0:
+            return True
+        before, char = name[position - 1], name[position]
+        return not before.isalnum() or (before.islower() and char.isupper())
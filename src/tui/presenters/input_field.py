@@ -1,4 +1,4 @@
-from typing import Tuple, Union
+from typing import Callable, Optional, Tuple, Union
 
 from src.data_models import Event, Key
 from src.interfaces import Model, Presenter, View
@@ -24,7 +24,11 @@ class InputFieldPresenter(Presenter[Union[bool, str, None]]):
         return Event.NOOP
 
     def handle_event(
-        self, event: Event, *args: str, is_error: bool = False
+        self,
+        event: Event,
+        *args: str,
+        is_error: bool = False,
+        on_change: Optional[Callable[[str], None]] = None,
     ) -> Union[bool, str, None]:
         match event:
             case Event.SHOW_MESSAGE:
@@ -35,7 +39,7 @@ class InputFieldPresenter(Presenter[Union[bool, str, None]]):
                     self.toggle_active()
                 return confirmation
             case Event.INPUT:
-                output = self._input(args[0])
+                output = self._input(args[0], on_change)
                 if self.active:
                     self.toggle_active()
                 if output:
@@ -43,7 +47,9 @@ class InputFieldPresenter(Presenter[Union[bool, str, None]]):
         return None
 
     def _show_message(self, message: str, is_error: bool = False) -> None:
-        self.view.render(message, (0, 0), is_error=is_error)
+        # Messages are also shown while jmux is busy, like the progress of
+        # a restore, so they can't wait for the next key to be drawn.
+        self.view.render(message, (0, 0), is_error=is_error, update=True)
 
     def _confirm(self, confirmation_prompt: str) -> bool:
         self.toggle_active()
@@ -53,14 +59,19 @@ class InputFieldPresenter(Presenter[Union[bool, str, None]]):
             return True
         return False
 
-    def _input(self, prompt: str) -> str:
+    def _input(
+        self, prompt: str, on_change: Optional[Callable[[str], None]] = None
+    ) -> str:
         self.toggle_active()
         while self.active:
             self.view.render(
                 prompt + self.text,
                 (self.cursor_pos[0], len(prompt) + self.cursor_pos[1]),
             )
+            text = self.text
             self._handle_key_press(self.view.get_event())
+            if on_change is not None and self.text != text:
+                on_change(self.text)
         return self.text
 
     def _handle_key_press(self, key: Key) -> None:
@@ -1,8 +1,10 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from src.data_models import Event, SessionLabel
+from src.data_models import Event, FuzzyMatch, SessionLabel, SessionSnapshot
 from src.interfaces import Model, Presenter, View
 
+from .fuzzy_filter import FuzzyFilter
+
 
 class MultiplexerMenuPresenter(Presenter[Optional[SessionLabel]]):
     def __init__(self, view: View[Event], model: Model) -> None:
@@ -13,7 +15,14 @@ class MultiplexerMenuPresenter(Presenter[Optional[SessionLabel]]):
         self.model: Model = model
         self.cursor_position: int = 0
         self.active: bool = False
-        self.sessions: List[SessionLabel] = self.model.list_running_sessions()
+        self.sessions: List[SessionLabel] = self.model.get_snapshot().running
+        self.items: List[str] = []
+        # What is typed after `/`, and the sessions matching it, if any.
+        self.query: str = ""
+        self.matches: Optional[List[FuzzyMatch]] = None
+        self.fuzzy_filter: Optional[FuzzyFilter] = None
+        self.shown_items: List[str] = []
+        self.highlights: List[Tuple[int, ...]] = []
 
     def toggle_active(self) -> None:
         """
@@ -25,26 +34,59 @@ class MultiplexerMenuPresenter(Presenter[Optional[SessionLabel]]):
         """
         Get data from the model and update the view.
         """
-        self.sessions = self.model.list_running_sessions()
-        self._check_cursor_position()
-        annotated_sessions = [
-            self._annotate_session(index, session)
+        snapshot = self.model.get_snapshot()
+        if snapshot.running != self.sessions:
+            self.fuzzy_filter = None
+        self.sessions = snapshot.running
+        self.items = [
+            self._annotate_session(index, session, snapshot)
             for index, session in enumerate(self.sessions)
         ]
+        self._apply_filter()
+        self.render_view()
+
+    def render_view(self) -> None:
+        """
+        Render the sessions from the last update, with the current cursor.
+        """
+        self._check_cursor_position()
+        if self.matches is None:
+            self.view.render(
+                self.items,
+                self.cursor_position,
+                self.active,
+            )
+            return
         self.view.render(
-            annotated_sessions,
+            self.shown_items,
             self.cursor_position,
             self.active,
+            self.highlights,
         )
 
-    def _annotate_session(self, index: int, session: SessionLabel) -> str:
+    def _apply_filter(self) -> None:
+        if not self.query:
+            self.matches = None
+            return
+        if self.fuzzy_filter is None:
+            self.fuzzy_filter = FuzzyFilter([session.name for session in self.sessions])
+        self.matches = self.fuzzy_filter.match(self.query)
+        self.shown_items = [self.items[match.index] for match in self.matches]
+        # The names are shown after their number, like "1. name".
+        self.highlights = [
+            tuple(
+                position + len(str(match.index + 1)) + 2 for position in match.positions
+            )
+            for match in self.matches
+        ]
+
+    def _annotate_session(
+        self, index: int, session: SessionLabel, snapshot: SessionSnapshot
+    ) -> str:
         name = f"{index + 1}. {session.name}"
-        if session == self.model.get_active_session():
+        if snapshot.is_active(session):
             name += "*"
-        if (
-            session in self.model.list_running_sessions()
-            and session in self.model.list_saved_sessions()
-        ):
+        if (session.id, session.name) in snapshot.running_and_saved:
             name += " (saved)"
         return name
 
@@ -54,7 +96,7 @@ class MultiplexerMenuPresenter(Presenter[Optional[SessionLabel]]):
         """
         return self.view.get_event()
 
-    def handle_event(self, event: Event) -> Optional[SessionLabel]:
+    def handle_event(self, event: Event, *args: str) -> Optional[SessionLabel]:
         """
         Handle a given `event`.
         """
@@ -64,9 +106,36 @@ class MultiplexerMenuPresenter(Presenter[Optional[SessionLabel]]):
             case Event.MOVE_DOWN:
                 self._cursor_down()
             case Event.GET_SESSION:
-                return self.sessions[self.cursor_position]
+                if not self._shown_count():
+                    return None
+                return self.sessions[self._session_index(self.cursor_position)]
+            case Event.FILTER:
+                self._filter(args[0] if args else "")
         return None
 
+    def _filter(self, query: str) -> None:
+        # Show the best match first, and go back to the selected session
+        # when the filter is cleared.
+        selected = None
+        if self._shown_count():
+            selected = self._session_index(self.cursor_position)
+        self.query = query
+        self._apply_filter()
+        self.cursor_position = 0
+        if self.matches is None and selected is not None:
+            self.cursor_position = selected
+        self.render_view()
+
+    def _shown_count(self) -> int:
+        if self.matches is None:
+            return len(self.sessions)
+        return len(self.matches)
+
+    def _session_index(self, cursor_position: int) -> int:
+        if self.matches is None:
+            return cursor_position
+        return self.matches[cursor_position].index
+
     def _cursor_up(self) -> None:
         self.cursor_position -= 1
         self._check_cursor_position()
@@ -76,7 +145,7 @@ class MultiplexerMenuPresenter(Presenter[Optional[SessionLabel]]):
         self._check_cursor_position()
 
     def _check_cursor_position(self) -> None:
-        if self.cursor_position >= len(self.sessions):
-            self.cursor_position = len(self.sessions) - 1
+        if self.cursor_position >= self._shown_count():
+            self.cursor_position = self._shown_count() - 1
         if self.cursor_position < 0:
             self.cursor_position = 0
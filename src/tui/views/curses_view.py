@@ -39,4 +39,4 @@ class CursesView(View[Event]):
         self.window.addch(
             self.window_size[0] - 3, self.window_size[1] // 2, curses.ACS_BTEE
         )
-        self.window.refresh()
+        self.window.noutrefresh()
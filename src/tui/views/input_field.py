@@ -13,8 +13,11 @@ class InputFieldRenderer(View[Key]):
         self.text_field.keypad(True)
         self.lower_corner = tuple(pos + size for pos, size in zip(position, size))
         self.view_position = (0, 0)
+        self.text = ""
+        self.attribute = curses.A_NORMAL
 
     def get_event(self) -> Key:
+        curses.doupdate()
         curses.curs_set(1)
         try:
             key = Key(self.text_field.getch())
@@ -24,16 +27,39 @@ class InputFieldRenderer(View[Key]):
         return key
 
     def render(
-        self, text: str, cursor_position: Tuple[int, int], is_error: bool = False
+        self,
+        text: str,
+        cursor_position: Tuple[int, int],
+        is_error: bool = False,
+        update: bool = False,
     ) -> None:
-        self.text_field.clear()
+        """
+        Render `text` with the cursor at `cursor_position`. The screen is only
+        updated when waiting for a key, or right away with `update`, for
+        messages shown while jmux is busy.
+        """
+        attribute = curses.A_NORMAL
         if is_error:
-            self.text_field.addstr(0, 0, text, curses.A_BOLD | curses.color_pair(1))
-        else:
-            self.text_field.addstr(0, 0, text)
+            attribute = curses.A_BOLD | curses.color_pair(1)
+        # Only the text after the first changed character is rewritten.
+        start = 0
+        if attribute == self.attribute:
+            for new, old in zip(text, self.text):
+                if new != old:
+                    break
+                start += 1
+        if start < max(len(text), len(self.text)):
+            self.text_field.move(0, start)
+            self.text_field.clrtoeol()
+            self.text_field.addstr(0, start, text[start:], attribute)
+        self.text, self.attribute = text, attribute
         self.text_field.move(*cursor_position)
         self.view_position = (
             max(0, cursor_position[0] - self.size[0] + 1),
             max(0, cursor_position[1] - self.size[1] + 1),
         )
-        self.text_field.refresh(*self.view_position, *self.position, *self.lower_corner)
+        self.text_field.noutrefresh(
+            *self.view_position, *self.position, *self.lower_corner
+        )
+        if update:
+            curses.doupdate()
@@ -1,9 +1,14 @@
 import curses
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 from src.data_models import Event
 from src.interfaces import Presenter, View
 
+from .virtual_list import VirtualList
+
+# Milliseconds to wait for a key before returning NOOP.
+KEY_TIMEOUT = 250
+
 
 class MultiplexerMenuRenderer(View[Event]):
     def __init__(
@@ -17,20 +22,23 @@ class MultiplexerMenuRenderer(View[Event]):
         self.presenter: Presenter
         self.size = size
         self.position = position
-        self.screen = curses.newpad(256, 256)
-        self.screen.keypad(True)
-        self.menu_offset = 1
-        self.lower_corner = tuple(pos + size for pos, size in zip(position, size))
-        self.view_index = 0
+        self.list = VirtualList(position, size, "Choose a session:")
+        self.screen = self.list.window
+        # Stop waiting for a key now and then, so messages from background
+        # work get shown.
+        self.screen.timeout(KEY_TIMEOUT)
 
     def get_event(self) -> Event:
         """
         Get a command from the user.
+        Everything rendered since the last key is put on the terminal first.
         """
+        curses.doupdate()
         return self._key_to_command(self.screen.getch())
 
     def _key_to_command(self, key: int) -> Event:
         return {
+            curses.ERR: Event.NOOP,
             ord("q"): Event.EXIT,
             curses.KEY_EXIT: Event.EXIT,
             27: Event.EXIT,
@@ -44,21 +52,25 @@ class MultiplexerMenuRenderer(View[Event]):
             ord("l"): Event.MOVE_RIGHT,
             ord("o"): Event.CREATE_SESSION,
             ord("r"): Event.RENAME_SESSION,
+            ord("a"): Event.RESTORE_SESSIONS,
+            ord("u"): Event.RECONCILE_SESSION,
+            ord("/"): Event.FILTER,
             ord("s"): Event.SAVE_SESSION,
             ord("d"): Event.KILL_SESSION,
             curses.KEY_ENTER: Event.LOAD_SESSION,
             10: Event.LOAD_SESSION,
         }.get(key, Event.UNKNOWN)
 
-    def render(self, items: List[str], cursor_index: int, active: bool) -> None:
+    def render(
+        self,
+        items: List[str],
+        cursor_index: int,
+        active: bool,
+        highlights: Optional[Sequence[Tuple[int, ...]]] = None,
+    ) -> None:
         """
-        Render the menu.
+        Render the items that fit in the menu, rewriting only the rows that
+        changed since the last render, with the characters in `highlights`
+        highlighted. The terminal is updated when the next key is read.
         """
-        self.screen.clear()
-        self.screen.addstr(0, 0, "Choose a session:", curses.A_BOLD)
-        for item_index, item in enumerate(items):
-            self.screen.addstr(item_index + self.menu_offset, 0, item)
-        if active:
-            self.screen.chgat(cursor_index + self.menu_offset, 0, -1, curses.A_REVERSE)
-        self.view_index = max(0, cursor_index - self.size[0] + 3)
-        self.screen.refresh(self.view_index, 0, *self.position, *self.lower_corner)
+        self.list.render(items, cursor_index, active, highlights)
@@ -0,0 +1,49 @@
+import curses
+from typing import List, Tuple, Union
+
+# The text of a row and the attribute it is drawn with, optionally
+# with the positions of characters to highlight in it.
+Row = Union[Tuple[str, int], Tuple[str, int, Tuple[int, ...]]]
+
+# Added to the attribute of highlighted characters.
+HIGHLIGHT = curses.A_BOLD | curses.A_UNDERLINE
+
+
+class RowBuffer:
+    def __init__(self, pad: curses.window) -> None:
+        """
+        Keeps the rows last drawn on `pad`, so drawing a new frame
+        only rewrites the rows whose text or attribute changed.
+        """
+        self.pad = pad
+        self.rows: List[Row] = []
+
+    def draw(self, rows: List[Row]) -> int:
+        """
+        Draw `rows` from the top of the pad, blanking the rows left over
+        from the last frame. Returns the number of rows rewritten.
+        """
+        changed = 0
+        for index in range(max(len(rows), len(self.rows))):
+            row = rows[index] if index < len(rows) else ("", curses.A_NORMAL)
+            last = self.rows[index] if index < len(self.rows) else None
+            if row == last:
+                continue
+            self.pad.move(index, 0)
+            self.pad.clrtoeol()
+            text, attribute, *highlights = row
+            try:
+                self.pad.addstr(index, 0, text, attribute)
+            except curses.error:
+                # Filling the last cell of a window leaves the cursor past its
+                # end, which curses reports after having drawn the text.
+                pass
+            if attribute & curses.A_REVERSE:
+                # The selection spans the whole row, not only its text.
+                self.pad.chgat(index, 0, -1, attribute)
+            for position in highlights[0] if highlights else ():
+                if position < len(text):
+                    self.pad.chgat(index, position, 1, attribute | HIGHLIGHT)
+            changed += 1
+        self.rows = list(rows)
+        return changed
@@ -0,0 +1,65 @@
+import curses
+from typing import List, Optional, Sequence, Tuple
+
+from .row_buffer import Row, RowBuffer
+
+
+class VirtualList:
+    def __init__(
+        self, position: Tuple[int, int], size: Tuple[int, int], title: str
+    ) -> None:
+        """
+        A scrolling list of items under `title`, in a window of its own.
+        Only the items that fit in the window are drawn, each clipped to its
+        width, so the list can be any length. Like the corners given to a pad
+        refresh, `size` is the offset of the last row and column from `position`.
+        """
+        self.height, self.width = size[0] + 1, size[1] + 1
+        self.window = curses.newwin(self.height, self.width, *position)
+        self.window.keypad(True)
+        self.title = title
+        self.view_index = 0
+        self.rows = RowBuffer(self.window)
+
+    @property
+    def capacity(self) -> int:
+        """
+        The number of items that fit under the title.
+        """
+        return max(self.height - 1, 1)
+
+    def render(
+        self,
+        items: List[str],
+        cursor_index: int,
+        active: bool,
+        highlights: Optional[Sequence[Tuple[int, ...]]] = None,
+    ) -> None:
+        """
+        Render the items around `cursor_index`, scrolling as little as
+        needed to keep it visible, and show it selected if `active` is set.
+        `highlights` are the positions of the characters to highlight
+        in each item, like the ones matching a filter.
+        """
+        self._scroll_to(cursor_index, len(items))
+        rows: List[Row] = [(self._clip(self.title), curses.A_BOLD)]
+        end = min(len(items), self.view_index + self.capacity)
+        for index in range(self.view_index, end):
+            selected = active and index == cursor_index
+            attribute = curses.A_REVERSE if selected else curses.A_NORMAL
+            if highlights is None:
+                rows.append((self._clip(items[index]), attribute))
+            else:
+                rows.append((self._clip(items[index]), attribute, highlights[index]))
+        self.rows.draw(rows)
+        self.window.noutrefresh()
+
+    def _scroll_to(self, cursor_index: int, length: int) -> None:
+        if cursor_index < self.view_index:
+            self.view_index = cursor_index
+        elif cursor_index >= self.view_index + self.capacity:
+            self.view_index = cursor_index - self.capacity + 1
+        self.view_index = max(0, min(self.view_index, length - self.capacity))
+
+    def _clip(self, text: str) -> str:
+        return text[: self.width]
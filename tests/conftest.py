@@ -2,7 +2,13 @@ from pathlib import Path
 
 import pytest
 
-from src.data_models import JmuxPane, JmuxSession, JmuxWindow, SessionLabel
+from src.data_models import (
+    JmuxPane,
+    JmuxSession,
+    JmuxWindow,
+    SessionLabel,
+    SessionSnapshot,
+)
 from src.interfaces import FileHandler, Model, Multiplexer, Presenter, View
 
 
@@ -29,6 +35,7 @@ def mock_folder(mocker):
 
 @pytest.fixture
 def mock_subprocess(mocker):
+    mocker.patch("shutil.which", return_value="/usr/bin/tmux")
     subprocess_run = mocker.patch("subprocess.run")
 
     def set_side_effects(*outputs):
@@ -50,7 +57,13 @@ def mock_view(mocker):
 
 @pytest.fixture
 def mock_model(mocker):
-    yield mocker.MagicMock(spec=Model)
+    model = mocker.MagicMock(spec=Model)
+    model.get_snapshot.side_effect = lambda: SessionSnapshot(
+        list(model.list_running_sessions()),
+        list(model.list_saved_sessions()),
+        model.get_active_session(),
+    )
+    yield model
 
 
 @pytest.fixture
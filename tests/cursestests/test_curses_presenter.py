@@ -1,6 +1,6 @@
 import pytest
 
-from src.data_models import CursesStates, Event
+from src.data_models import CursesStates, Event, RestoreResult
 from src.interfaces import Model, Presenter, View
 from src.tui.presenters import CursesPresenter
 
@@ -75,11 +75,24 @@ class TestToggleActive:
         self.presenter.toggle_active()
         self.presenter.handle_event.assert_called()
 
-    def test_updates_view(self):
+    def test_updates_view_when_model_reports_a_change(self):
         self.mocker.patch.object(self.presenter, "get_event", return_value=Event.EXIT)
         self.mocker.patch.object(self.presenter, "update_view")
+        self.presenter.changed.set()
         self.presenter.toggle_active()
-        self.presenter.update_view.assert_called()
+        self.presenter.update_view.assert_called_once()
+        assert not self.presenter.changed.is_set()
+
+    def test_renders_view_from_memory_without_a_change(self):
+        self.mocker.patch.object(self.presenter, "get_event", return_value=Event.EXIT)
+        self.mocker.patch.object(self.presenter, "update_view")
+        self.mocker.patch.object(self.presenter, "render_view")
+        self.presenter.toggle_active()
+        self.presenter.update_view.assert_not_called()
+        self.presenter.render_view.assert_called_once()
+
+    def test_subscribes_to_model_changes(self):
+        self.model.subscribe.assert_called_once_with(self.presenter.changed.set)
 
     def test_runs_event_loop_until_exit_event(self):
         self.mocker.patch.object(
@@ -90,6 +103,18 @@ class TestToggleActive:
         self.presenter.toggle_active()
         assert self.presenter.get_event.call_count == 3
 
+    def test_no_key_pressed_does_not_update_view(self):
+        self.mocker.patch.object(
+            self.presenter,
+            "get_event",
+            side_effect=[Event.NOOP, Event.NOOP, Event.EXIT],
+        )
+        self.mocker.patch.object(self.presenter, "update_view")
+        self.mocker.patch.object(self.presenter, "render_view")
+        self.presenter.toggle_active()
+        self.presenter.update_view.assert_not_called()
+        assert self.presenter.render_view.call_count == 1
+
 
 class TestUpdateView:
     @pytest.fixture(autouse=True)
@@ -120,6 +145,14 @@ class TestUpdateView:
         self.presenter.update_view()
         self.presenter.multiplexer_menu.update_view.assert_called()
 
+    def test_invalidates_model_snapshot_before_updating_menus(self):
+        self.file_menu.reset_mock()
+        self.model.invalidate_snapshot.side_effect = (
+            self.file_menu.update_view.assert_not_called
+        )
+        self.presenter.update_view()
+        self.model.invalidate_snapshot.assert_called_once()
+
 
 class TestGetEvent:
     @pytest.fixture(autouse=True)
@@ -348,7 +381,29 @@ class TestHandleLoadSessionEvent:
         self.presenter.state = CursesStates.FILE_MENU
         self.file_menu.handle_event.return_value = session_labels[0]
         self.presenter.handle_event(Event.LOAD_SESSION)
-        self.presenter.model.load_session.assert_called_with(session_labels[0])
+        self.presenter.model.load_session.assert_called_with(
+            session_labels[0], on_progress=self.presenter._queue_progress
+        )
+
+    def test_progress_is_queued_until_the_event_loop_shows_it(self, session_labels):
+        self.presenter.state = CursesStates.FILE_MENU
+        self.file_menu.handle_event.return_value = session_labels[0]
+        self.presenter.handle_event(Event.LOAD_SESSION)
+        on_progress = self.presenter.model.load_session.call_args[1]["on_progress"]
+        on_progress(RestoreResult("session1:window2"), 2, 2)
+        self.command_bar.handle_event.assert_not_called()
+        self.mocker.patch.object(self.presenter, "get_event", return_value=Event.EXIT)
+        self.presenter.toggle_active()
+        self.command_bar.handle_event.assert_any_call(
+            Event.SHOW_MESSAGE, "[2/2] session1:window2 restored", is_error=False
+        )
+
+    def test_failed_progress_is_shown_as_error(self, session_labels):
+        self.presenter._queue_progress(RestoreResult("session1", "Test Error"), 1, 2)
+        self.presenter._show_messages()
+        self.command_bar.handle_event.assert_called_once_with(
+            Event.SHOW_MESSAGE, "[1/2] session1 failed: Test Error", is_error=True
+        )
 
     def test_failure_to_load_session_shows_error_message_in_command_bar(
         self, session_labels
@@ -574,6 +629,16 @@ class TestHandleSaveSessionEvent:
         self.presenter.handle_event(Event.SAVE_SESSION)
         self.presenter.model.save_session.assert_called_with(session_labels[0])
 
+    def test_unchanged_session_shows_message_in_command_bar(self, session_labels):
+        self.presenter.state = CursesStates.MULTIPLEXER_MENU
+        self.multiplexer_menu.handle_event.return_value = session_labels[0]
+        self.presenter.model.list_saved_sessions.return_value = []
+        self.presenter.model.save_session.return_value = False
+        self.presenter.handle_event(Event.SAVE_SESSION)
+        self.presenter.command_bar.handle_event.assert_called_with(
+            Event.SHOW_MESSAGE, "session1 is unchanged"
+        )
+
     def test_failure_to_save_session_shows_error_message_in_command_bar(
         self, session_labels
     ):
@@ -774,6 +839,163 @@ class TestHandleRenameSessionEvent:
         assert error_call_args[1]["is_error"] is True
 
 
+class TestHandleRestoreSessionsEvent:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        self.mocker = mocker
+        self.view = self.mocker.Mock(spec=View)
+        self.model = self.mocker.Mock(spec=Model)
+        self.multiplexer_menu = self.mocker.Mock(spec=Presenter)
+        self.file_menu = self.mocker.Mock(spec=Presenter)
+        self.command_bar = self.mocker.Mock(spec=Presenter)
+        self.presenter = CursesPresenter(
+            self.view,
+            self.model,
+            self.multiplexer_menu,
+            self.file_menu,
+            self.command_bar,
+        )
+
+    def test_gets_confirmation_from_command_bar(self):
+        self.presenter.handle_event(Event.RESTORE_SESSIONS)
+        confirm_call = self.command_bar.handle_event.call_args_list[0]
+        assert confirm_call[0][0] == Event.CONFIRM
+
+    def test_does_not_restore_sessions_if_no_confirmation(self):
+        self.command_bar.handle_event.return_value = False
+        self.presenter.handle_event(Event.RESTORE_SESSIONS)
+        self.model.restore_sessions.assert_not_called()
+
+    def test_restores_sessions_if_confirmed(self):
+        self.command_bar.handle_event.return_value = True
+        self.model.restore_sessions.return_value = []
+        self.presenter.handle_event(Event.RESTORE_SESSIONS)
+        self.model.restore_sessions.assert_called_once()
+
+    def test_shows_progress_in_command_bar(self):
+        self.command_bar.handle_event.return_value = True
+
+        def restore_sessions(on_progress):
+            on_progress(RestoreResult("session1"), 1, 2)
+            return [RestoreResult("session1")]
+
+        self.model.restore_sessions.side_effect = restore_sessions
+        self.presenter.handle_event(Event.RESTORE_SESSIONS)
+        self.command_bar.handle_event.assert_any_call(
+            Event.SHOW_MESSAGE, "[1/2] session1 restored"
+        )
+
+    def test_failed_sessions_show_error_message_in_command_bar(self):
+        self.command_bar.handle_event.return_value = True
+        self.model.restore_sessions.return_value = [
+            RestoreResult("session1", "duplicate session"),
+            RestoreResult("session2"),
+        ]
+        self.presenter.handle_event(Event.RESTORE_SESSIONS)
+        error_call_args = self.command_bar.handle_event.call_args
+        assert error_call_args[0][1] == "Error: failed to restore session1"
+        assert error_call_args[1]["is_error"] is True
+
+    def test_model_error_shows_error_message_in_command_bar(self):
+        self.command_bar.handle_event.return_value = True
+        self.model.restore_sessions.side_effect = ValueError("error")
+        self.presenter.handle_event(Event.RESTORE_SESSIONS)
+        error_call_args = self.command_bar.handle_event.call_args
+        assert error_call_args[1]["is_error"] is True
+
+
+class TestHandleReconcileSessionEvent:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, session_labels):
+        self.mocker = mocker
+        self.view = self.mocker.Mock(spec=View)
+        self.model = self.mocker.Mock(spec=Model)
+        self.multiplexer_menu = self.mocker.Mock(spec=Presenter)
+        self.file_menu = self.mocker.Mock(spec=Presenter)
+        self.command_bar = self.mocker.Mock(spec=Presenter)
+        self.presenter = CursesPresenter(
+            self.view,
+            self.model,
+            self.multiplexer_menu,
+            self.file_menu,
+            self.command_bar,
+        )
+        self.presenter.state = CursesStates.FILE_MENU
+        self.file_menu.handle_event.return_value = session_labels[0]
+        self.label = session_labels[0]
+
+    def test_reconciles_selected_session(self):
+        self.model.reconcile_session.return_value = 0
+        self.presenter.handle_event(Event.RECONCILE_SESSION)
+        self.model.reconcile_session.assert_called_once_with(self.label)
+
+    def test_shows_number_of_changes_in_command_bar(self):
+        self.model.reconcile_session.return_value = 3
+        self.presenter.handle_event(Event.RECONCILE_SESSION)
+        self.command_bar.handle_event.assert_called_with(
+            Event.SHOW_MESSAGE, "Made 3 changes to session1"
+        )
+
+    def test_up_to_date_session_shows_message_in_command_bar(self):
+        self.model.reconcile_session.return_value = 0
+        self.presenter.handle_event(Event.RECONCILE_SESSION)
+        self.command_bar.handle_event.assert_called_with(
+            Event.SHOW_MESSAGE, "session1 is up to date"
+        )
+
+    def test_model_error_shows_error_message_in_command_bar(self):
+        self.model.reconcile_session.side_effect = ValueError("error")
+        self.presenter.handle_event(Event.RECONCILE_SESSION)
+        error_call_args = self.command_bar.handle_event.call_args
+        assert error_call_args[0][1] == "error"
+        assert error_call_args[1]["is_error"] is True
+
+
+class TestHandleFilterEvent:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        self.mocker = mocker
+        self.view = self.mocker.Mock(spec=View)
+        self.model = self.mocker.Mock(spec=Model)
+        self.multiplexer_menu = self.mocker.Mock(spec=Presenter)
+        self.file_menu = self.mocker.Mock(spec=Presenter)
+        self.command_bar = self.mocker.Mock(spec=Presenter)
+        self.presenter = CursesPresenter(
+            self.view,
+            self.model,
+            self.multiplexer_menu,
+            self.file_menu,
+            self.command_bar,
+        )
+        self.presenter.state = CursesStates.FILE_MENU
+        self.file_menu.reset_mock()
+        self.multiplexer_menu.reset_mock()
+
+    def test_reads_query_from_command_bar(self):
+        self.command_bar.handle_event.return_value = "abc"
+        self.presenter.handle_event(Event.FILTER)
+        assert self.command_bar.handle_event.call_args[0] == (Event.INPUT, "/")
+
+    def test_filters_current_menu_as_query_changes(self):
+        self.command_bar.handle_event.return_value = "ab"
+        self.presenter.handle_event(Event.FILTER)
+        on_change = self.command_bar.handle_event.call_args[1]["on_change"]
+        on_change("a")
+        self.file_menu.handle_event.assert_any_call(Event.FILTER, "a")
+        self.multiplexer_menu.handle_event.assert_not_called()
+
+    def test_keeps_query_when_entered(self):
+        self.command_bar.handle_event.return_value = "ab"
+        self.presenter.handle_event(Event.FILTER)
+        self.file_menu.handle_event.assert_called_with(Event.FILTER, "ab")
+
+    def test_clears_filter_when_cancelled(self):
+        self.command_bar.handle_event.return_value = None
+        self.presenter.state = CursesStates.MULTIPLEXER_MENU
+        self.presenter.handle_event(Event.FILTER)
+        self.multiplexer_menu.handle_event.assert_called_with(Event.FILTER, "")
+
+
 class TestHandleUnknownEvent:
     def test_does_nothing(self, mock_view, mock_model, mock_presenter):
         presenter = CursesPresenter(
@@ -782,6 +1004,14 @@ class TestHandleUnknownEvent:
         presenter.handle_event(Event.UNKNOWN)
         assert True
 
+    def test_noop_does_nothing(self, mock_view, mock_model, mock_presenter):
+        presenter = CursesPresenter(
+            mock_view, mock_model, mock_presenter, mock_presenter, mock_presenter
+        )
+        mock_presenter.reset_mock()
+        presenter.handle_event(Event.NOOP)
+        mock_presenter.handle_event.assert_not_called()
+
 
 class TestHandleInvalidEvent:
     def test_shows_error_message_in_command_bar(
@@ -790,7 +1020,7 @@ class TestHandleInvalidEvent:
         presenter = CursesPresenter(
             mock_view, mock_model, mock_presenter, mock_presenter, mock_presenter
         )
-        presenter.handle_event(Event.NOOP)
+        presenter.handle_event(Event.GET_SESSION)
         call_args = presenter.command_bar.handle_event.call_args
         assert call_args[0][0] == Event.SHOW_MESSAGE
         assert call_args[1]["is_error"] is True
@@ -0,0 +1,61 @@
+import pytest
+
+from src.tui.presenters.fuzzy_filter import FuzzyFilter
+
+
+class TestMatch:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        self.mocker = mocker
+        self.names = ["alpha", "beta", "gamma-beta", "Database"]
+        self.fuzzy_filter = FuzzyFilter(self.names)
+
+    def matched_names(self, query):
+        return [self.names[match.index] for match in self.fuzzy_filter.match(query)]
+
+    def test_empty_query_matches_every_name_in_order(self):
+        assert self.matched_names("") == self.names
+
+    def test_matches_characters_in_order(self):
+        assert self.matched_names("aph") == ["alpha"]
+
+    def test_characters_out_of_order_do_not_match(self):
+        assert self.matched_names("hpa") == []
+
+    def test_ignores_case(self):
+        assert self.matched_names("DB") == ["Database"]
+
+    def test_returns_positions_of_matched_characters(self):
+        matches = self.fuzzy_filter.match("gb")
+        assert matches[0].positions == (0, 6)
+
+    def test_ranks_word_starts_and_runs_first(self):
+        names = ["xaxb", "ab", "x-a-b", "xAB"]
+        matches = FuzzyFilter(names).match("ab")
+        assert [names[match.index] for match in matches] == [
+            "x-a-b",
+            "ab",
+            "xAB",
+            "xaxb",
+        ]
+
+    def test_equal_scores_keep_order_of_names(self):
+        assert self.matched_names("ta") == ["beta", "gamma-beta", "Database"]
+
+    def test_refines_matches_of_previous_query(self):
+        self.fuzzy_filter.match("b")
+        refine = self.mocker.spy(self.fuzzy_filter, "_refine")
+        self.fuzzy_filter.match("be")
+        refine.assert_called_once()
+        assert len(refine.call_args[0][0]) == 3
+
+    def test_deleting_characters_reuses_kept_matches(self):
+        self.fuzzy_filter.match("bet")
+        refine = self.mocker.spy(self.fuzzy_filter, "_refine")
+        assert self.matched_names("be") == ["beta", "gamma-beta", "Database"]
+        refine.assert_not_called()
+
+    def test_changed_query_is_matched_from_common_prefix(self):
+        self.fuzzy_filter.match("bet")
+        assert self.matched_names("bd") == []
+        assert self.matched_names("al") == ["alpha"]
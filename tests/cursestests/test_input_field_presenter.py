@@ -58,11 +58,15 @@ class TestHandleShowMessageEvent:
 
     def test_given_message_renders_message_not_as_error(self):
         self.presenter.handle_event(Event.SHOW_MESSAGE, "test")
-        self.view.render.assert_called_once_with("test", (0, 0), is_error=False)
+        self.view.render.assert_called_once_with(
+            "test", (0, 0), is_error=False, update=True
+        )
 
     def test_given_message_and_error_flag_renders_message_as_error(self):
         self.presenter.handle_event(Event.SHOW_MESSAGE, "test", is_error=True)
-        self.view.render.assert_called_once_with("test", (0, 0), is_error=True)
+        self.view.render.assert_called_once_with(
+            "test", (0, 0), is_error=True, update=True
+        )
 
 
 class TestHandleConfirmEvent:
@@ -145,6 +149,21 @@ class TestHandleInputEvent:
         self.view.get_event.side_effect = [Key.A_LOWER, Key.B_LOWER, Key.ENTER]
         assert self.presenter.handle_event(Event.INPUT, "test") == "ab"
 
+    def test_calls_on_change_when_input_changes(self):
+        on_change = self.mocker.Mock()
+        self.view.get_event.side_effect = [Key.A_LOWER, Key.LEFT, Key.ENTER]
+        self.presenter.handle_event(Event.INPUT, "test", on_change=on_change)
+        on_change.assert_called_once_with("a")
+
+    def test_calls_on_change_with_nothing_when_cancelled(self):
+        on_change = self.mocker.Mock()
+        self.view.get_event.side_effect = [Key.A_LOWER, Key.ESC]
+        self.presenter.handle_event(Event.INPUT, "test", on_change=on_change)
+        assert on_change.call_args_list == [
+            self.mocker.call("a"),
+            self.mocker.call(""),
+        ]
+
     def test_renders_prompt_with_current_input_characters(self):
         self.view.get_event.side_effect = [Key.A_LOWER, Key.ENTER]
         self.presenter.handle_event(Event.INPUT, "test")
@@ -279,7 +298,13 @@ class TestHandleEvent:
     def test_calls_input(self):
         self.mocker.patch.object(self.presenter, "_input")
         self.presenter.handle_event(Event.INPUT, "test")
-        self.presenter._input.assert_called_once_with("test")
+        self.presenter._input.assert_called_once_with("test", None)
+
+    def test_passes_on_change_to_input(self):
+        self.mocker.patch.object(self.presenter, "_input")
+        on_change = self.mocker.Mock()
+        self.presenter.handle_event(Event.INPUT, "test", on_change=on_change)
+        self.presenter._input.assert_called_once_with("test", on_change)
 
     test_events = [
         event
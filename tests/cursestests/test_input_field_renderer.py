@@ -0,0 +1,24 @@
+import pytest
+
+from src.tui.views.input_field import InputFieldRenderer
+
+
+class TestRender:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        self.mocker = mocker
+        self.pad = self.mocker.Mock()
+        self.mocker.patch("curses.newpad", return_value=self.pad)
+        self.doupdate = self.mocker.patch("curses.doupdate")
+        self.renderer = InputFieldRenderer((10, 0), (1, 20))
+
+    def test_renders_text_without_updating_screen(self):
+        self.renderer.render("test", (0, 4))
+        self.pad.addstr.assert_called_once()
+        self.pad.noutrefresh.assert_called_once()
+        self.doupdate.assert_not_called()
+
+    def test_update_shows_text_right_away(self):
+        self.renderer.render("[1/3] session1 restored", (0, 0), update=True)
+        self.pad.noutrefresh.assert_called_once()
+        self.doupdate.assert_called_once()
@@ -1,6 +1,6 @@
 import pytest
 
-from src.data_models import Event
+from src.data_models import Event, SessionLabel
 from src.interfaces import Presenter
 from src.tui.presenters import MultiplexerMenuPresenter
 
@@ -74,6 +74,15 @@ class TestUpdateView:
             ["1. session1", "2. session2 (saved)"], 0, False
         )
 
+    def test_reads_sessions_once_per_update(self):
+        self.model.get_active_session.return_value = self.session_labels[0]
+        self.model.list_saved_sessions.return_value = self.session_labels
+        self.model.reset_mock()
+        self.presenter.update_view()
+        self.model.get_snapshot.assert_called_once()
+        self.model.list_saved_sessions.assert_called_once()
+        self.model.get_active_session.assert_called_once()
+
     def test_annotates_saved_and_active_session(self):
         self.model.get_active_session.return_value = self.session_labels[1]
         self.model.list_saved_sessions.return_value = [self.session_labels[1]]
@@ -116,6 +125,85 @@ class TestUpdateView:
         self.view.render.assert_called_with(["1. session1", "2. session2"], 0, False)
 
 
+class TestRenderView:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_view, mock_model, session_labels):
+        self.view = mock_view
+        self.model = mock_model
+        self.model.list_running_sessions.return_value = session_labels
+        self.presenter = MultiplexerMenuPresenter(self.view, self.model)
+        self.presenter.update_view()
+        self.model.reset_mock()
+
+    def test_renders_sessions_from_last_update_without_model(self):
+        self.presenter.handle_event(Event.MOVE_DOWN)
+        self.presenter.render_view()
+        self.model.get_snapshot.assert_not_called()
+        assert self.view.render.call_args[0][1] == 1
+
+    def test_cursor_stays_within_sessions_from_last_update(self):
+        self.presenter.cursor_position = 5
+        self.presenter.render_view()
+        assert self.view.render.call_args[0][1] == 1
+
+
+class TestFilter:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_view, mock_model):
+        self.view = mock_view
+        self.model = mock_model
+        self.labels = [
+            SessionLabel("$1", "alpha"),
+            SessionLabel("$2", "beta"),
+            SessionLabel("$3", "gamma-beta"),
+        ]
+        self.model.get_active_session.return_value = None
+        self.model.list_running_sessions.return_value = []
+        self.model.list_saved_sessions.return_value = []
+        self.model.list_running_sessions.return_value = self.labels
+        self.presenter = MultiplexerMenuPresenter(self.view, self.model)
+        self.presenter.update_view()
+
+    def test_renders_matching_sessions_best_first(self):
+        self.presenter.handle_event(Event.FILTER, "bt")
+        items = self.view.render.call_args[0][0]
+        assert items == ["2. beta", "3. gamma-beta"]
+
+    def test_renders_positions_of_matched_characters(self):
+        self.presenter.handle_event(Event.FILTER, "bt")
+        assert self.view.render.call_args[0][3] == [(3, 5), (9, 11)]
+
+    def test_get_session_returns_selected_match(self):
+        self.presenter.handle_event(Event.FILTER, "gam")
+        assert self.presenter.handle_event(Event.GET_SESSION) == self.labels[2]
+
+    def test_get_session_without_matches_returns_none(self):
+        self.presenter.handle_event(Event.FILTER, "xyz")
+        assert self.view.render.call_args[0][0] == []
+        assert self.presenter.handle_event(Event.GET_SESSION) is None
+
+    def test_cursor_stays_within_matches(self):
+        self.presenter.handle_event(Event.FILTER, "bt")
+        self.presenter.handle_event(Event.MOVE_DOWN)
+        self.presenter.handle_event(Event.MOVE_DOWN)
+        assert self.presenter.cursor_position == 1
+
+    def test_clearing_filter_keeps_selected_session(self):
+        self.presenter.handle_event(Event.FILTER, "gam")
+        self.presenter.handle_event(Event.FILTER, "")
+        self.view.render.assert_called_with(
+            ["1. alpha", "2. beta", "3. gamma-beta"], 2, False
+        )
+
+    def test_filter_is_kept_when_sessions_change(self):
+        self.presenter.handle_event(Event.FILTER, "bt")
+        labels = self.labels + [SessionLabel("$4", "bat")]
+        self.model.list_running_sessions.return_value = labels
+        self.presenter.update_view()
+        items = self.view.render.call_args[0][0]
+        assert items == ["2. beta", "3. gamma-beta", "4. bat"]
+
+
 class TestGetEvent:
     def test_returns_event_from_view(self, mock_view, mock_model):
         presenter = MultiplexerMenuPresenter(mock_view, mock_model)
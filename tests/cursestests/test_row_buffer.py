@@ -0,0 +1,55 @@
+import curses
+
+import pytest
+
+from src.tui.views.row_buffer import HIGHLIGHT, RowBuffer
+
+
+class TestRowBuffer:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        self.mocker = mocker
+        self.pad = mocker.Mock()
+        self.buffer = RowBuffer(self.pad)
+        self.rows = [("header", curses.A_BOLD), ("item", curses.A_NORMAL)]
+        self.buffer.draw(self.rows)
+        self.pad.reset_mock()
+
+    def test_first_frame_draws_every_row(self):
+        buffer = RowBuffer(self.pad)
+        assert buffer.draw(self.rows) == 2
+
+    def test_unchanged_frame_draws_nothing(self):
+        assert self.buffer.draw(list(self.rows)) == 0
+        self.pad.addstr.assert_not_called()
+
+    def test_only_changed_rows_are_drawn(self):
+        rows = [self.rows[0], ("other", curses.A_NORMAL)]
+        assert self.buffer.draw(rows) == 1
+        self.pad.addstr.assert_called_once_with(1, 0, "other", curses.A_NORMAL)
+
+    def test_changed_highlight_is_drawn_across_the_row(self):
+        rows = [self.rows[0], ("item", curses.A_REVERSE)]
+        assert self.buffer.draw(rows) == 1
+        self.pad.chgat.assert_called_once_with(1, 0, -1, curses.A_REVERSE)
+
+    def test_rows_left_over_from_last_frame_are_blanked(self):
+        assert self.buffer.draw(self.rows[:1]) == 1
+        self.pad.move.assert_called_once_with(1, 0)
+        self.pad.clrtoeol.assert_called_once()
+
+    def test_highlighted_characters_are_drawn(self):
+        rows = [self.rows[0], ("item", curses.A_NORMAL, (0, 2))]
+        assert self.buffer.draw(rows) == 1
+        assert self.pad.chgat.call_args_list == [
+            self.mocker.call(1, 0, 1, curses.A_NORMAL | HIGHLIGHT),
+            self.mocker.call(1, 2, 1, curses.A_NORMAL | HIGHLIGHT),
+        ]
+
+    def test_highlights_past_the_text_are_skipped(self):
+        self.buffer.draw([self.rows[0], ("it", curses.A_NORMAL, (1, 5))])
+        self.pad.chgat.assert_called_once_with(1, 1, 1, curses.A_NORMAL | HIGHLIGHT)
+
+    def test_changed_highlights_redraw_the_row(self):
+        self.buffer.draw([self.rows[0], ("item", curses.A_NORMAL, (0,))])
+        assert self.buffer.draw([self.rows[0], ("item", curses.A_NORMAL, (1,))]) == 1
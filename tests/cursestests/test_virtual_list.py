@@ -0,0 +1,69 @@
+import curses
+
+import pytest
+
+from src.tui.views.virtual_list import VirtualList
+
+
+class TestVirtualList:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        self.window = mocker.Mock()
+        self.newwin = mocker.patch("curses.newwin", return_value=self.window)
+        self.list = VirtualList((1, 1), (3, 9), "title")
+        self.items = [f"item{index}" for index in range(10)]
+
+    def drawn(self):
+        return [row[0] for row in self.list.rows.rows]
+
+    def test_window_covers_the_given_corners(self):
+        self.newwin.assert_called_once_with(4, 10, 1, 1)
+        assert self.list.capacity == 3
+
+    def test_only_visible_items_are_drawn(self):
+        self.list.render(self.items, 0, True)
+        assert self.drawn() == ["title", "item0", "item1", "item2"]
+        self.window.noutrefresh.assert_called_once()
+
+    def test_view_scrolls_to_the_cursor(self):
+        self.list.render(self.items, 5, True)
+        assert self.list.view_index == 3
+        assert self.drawn() == ["title", "item3", "item4", "item5"]
+
+    def test_view_does_not_scroll_while_cursor_is_visible(self):
+        self.list.render(self.items, 5, True)
+        self.list.render(self.items, 4, True)
+        assert self.list.view_index == 3
+
+    def test_view_scrolls_up_to_the_cursor(self):
+        self.list.render(self.items, 5, True)
+        self.list.render(self.items, 1, True)
+        assert self.list.view_index == 1
+
+    def test_view_is_pulled_back_when_the_list_shrinks(self):
+        self.list.render(self.items, 9, True)
+        self.list.render(self.items[:4], 3, True)
+        assert self.list.view_index == 1
+
+    def test_selected_item_is_highlighted_when_active(self):
+        self.list.render(self.items, 1, True)
+        assert self.list.rows.rows[2] == ("item1", curses.A_REVERSE)
+
+    def test_selected_item_is_not_highlighted_when_inactive(self):
+        self.list.render(self.items, 1, False)
+        assert self.list.rows.rows[2] == ("item1", curses.A_NORMAL)
+
+    def test_long_items_are_clipped_to_the_width(self):
+        self.list.render(["a" * 50], 0, True)
+        assert self.drawn()[1] == "a" * 10
+
+    def test_long_lists_draw_a_page_of_rows(self):
+        items = [f"item{index}" for index in range(100_000)]
+        self.list.render(items, 99_999, True)
+        assert self.window.addstr.call_count == 4
+
+    def test_highlights_of_visible_items_are_drawn(self):
+        highlights = [(index,) for index in range(10)]
+        self.list.render(self.items, 5, False, highlights)
+        assert self.list.rows.rows[1] == ("item3", curses.A_NORMAL, (3,))
+        assert len(self.list.rows.rows) == 4
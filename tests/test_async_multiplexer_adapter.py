@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.business_logic import AsyncMultiplexerAdapter
+from src.interfaces import AsyncMultiplexer
+
+
+class TestAsyncMultiplexerAdapter:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, session_labels, jmux_session):
+        self.labels = session_labels
+        self.session = jmux_session
+        self.multiplexer = mocker.AsyncMock(spec=AsyncMultiplexer)
+        self.multiplexer.close = mocker.Mock()
+        self.adapter = AsyncMultiplexerAdapter(self.multiplexer)
+        yield
+        self.adapter.close()
+
+    def test_invalid_multiplexer_raises_ValueError(self, mock_multiplexer):
+        with pytest.raises(ValueError):
+            AsyncMultiplexerAdapter(mock_multiplexer)
+
+    def test_list_sessions_returns_result_of_coroutine(self):
+        self.multiplexer.list_sessions.return_value = self.labels
+        assert self.adapter.list_sessions() == self.labels
+
+    def test_get_session_returns_result_of_coroutine(self):
+        self.multiplexer.get_session.return_value = self.session
+        assert self.adapter.get_session(self.labels[0]) == self.session
+        self.multiplexer.get_session.assert_awaited_once_with(self.labels[0])
+
+    def test_errors_are_raised_in_the_caller(self):
+        self.multiplexer.kill_session.side_effect = ValueError("Session not found")
+        with pytest.raises(ValueError):
+            self.adapter.kill_session(self.labels[0])
+
+    def test_create_session_awaits_create_session(self):
+        self.adapter.create_session(self.session)
+        self.multiplexer.create_session.assert_awaited_once_with(self.session, True)
+
+    def test_capture_sessions_returns_a_future_of_each_session(self):
+        self.multiplexer.get_session.side_effect = lambda label: label.name
+        futures = self.adapter.capture_sessions(self.labels)
+        results = [future.result(timeout=5) for future in futures]
+        assert results == ["session1", "session2"]
+
+    def test_capture_sessions_does_not_wait_for_the_captures(self):
+        release = asyncio.Event()
+
+        async def get_session(label):
+            await release.wait()
+            return label.name
+
+        self.multiplexer.get_session.side_effect = get_session
+        futures = self.adapter.capture_sessions(self.labels)
+        assert not any(future.done() for future in futures)
+        self.adapter._loop.call_soon_threadsafe(release.set)
+        assert [future.result(timeout=5) for future in futures] == [
+            "session1",
+            "session2",
+        ]
+
+    def test_captures_run_concurrently(self):
+        started = []
+
+        async def get_session(label):
+            started.append(label)
+            # Neither capture finishes before both were started.
+            while len(started) < len(self.labels):
+                await asyncio.sleep(0)
+            return label.name
+
+        self.multiplexer.get_session.side_effect = get_session
+        futures = self.adapter.capture_sessions(self.labels)
+        assert [future.result(timeout=5) for future in futures] == [
+            "session1",
+            "session2",
+        ]
+
+    def test_failed_capture_is_raised_by_its_future(self):
+        self.multiplexer.get_session.side_effect = ValueError("Session not found")
+        futures = self.adapter.capture_sessions(self.labels[:1])
+        with pytest.raises(ValueError):
+            futures[0].result(timeout=5)
+
+    def test_submit_does_not_wait_for_the_coroutine(self):
+        self.multiplexer.list_sessions.return_value = self.labels
+        future = self.adapter.submit(self.multiplexer.list_sessions())
+        assert future.result(timeout=5) == self.labels
+
+    def test_is_running_is_not_scheduled_on_the_event_loop(self):
+        self.multiplexer.is_running = lambda: True
+        assert self.adapter.is_running()
+
+    def test_close_closes_the_multiplexer_once(self):
+        self.adapter.close()
+        self.adapter.close()
+        self.multiplexer.close.assert_called_once_with()
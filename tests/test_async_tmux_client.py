@@ -0,0 +1,181 @@
+import asyncio
+import os
+from concurrent.futures import Future
+
+import pytest
+
+from src.business_logic import AsyncTmuxClient
+from src.data_models import JmuxSession
+
+
+@pytest.fixture
+def mock_async_subprocess(mocker):
+    create_subprocess_exec = mocker.patch("asyncio.create_subprocess_exec")
+
+    def set_outputs(*outputs, returncode=0):
+        processes = []
+        for output in outputs:
+            if isinstance(output, tuple):
+                output, returncode = output
+            process = mocker.Mock(returncode=returncode)
+            process.communicate = mocker.AsyncMock(
+                return_value=(output.encode(), b"error")
+            )
+            processes.append(process)
+        create_subprocess_exec.side_effect = processes
+
+    create_subprocess_exec.set_outputs = set_outputs
+    return create_subprocess_exec
+
+
+def pane_out(session, window, pane):
+    return "\t".join(
+        [f"${session}", f"session{session}", f"@{window}", "window1"]
+        + ["tiled", "1", f"%{pane}", "1", "/tmp"]
+    )
+
+
+class TestAsyncTmuxClient:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, mock_async_subprocess, session_labels):
+        self.subprocess = mock_async_subprocess
+        self.labels = session_labels
+        mocker.patch("shutil.which", return_value="/usr/bin/tmux")
+        mocker.patch.dict(os.environ, {"TMUX": "/tmp/tmux-1000/default,1,0"})
+        self.multiplexer = AsyncTmuxClient()
+
+    def commands(self):
+        return [call[0] for call in self.subprocess.call_args_list]
+
+    def test_missing_tmux_binary_raises_FileNotFoundError(self, mocker):
+        mocker.patch("shutil.which", return_value=None)
+        with pytest.raises(FileNotFoundError):
+            AsyncTmuxClient()
+
+    def test_list_sessions_returns_session_labels(self):
+        self.subprocess.set_outputs("$1:session1\n$2:session2\n")
+        assert asyncio.run(self.multiplexer.list_sessions()) == self.labels
+
+    def test_list_sessions_without_tmux_returns_empty_list(self, mocker):
+        mocker.patch.dict(os.environ, {"TMUX": ""})
+        assert asyncio.run(self.multiplexer.list_sessions()) == []
+        self.subprocess.assert_not_called()
+
+    def test_get_session_captures_session_with_a_single_query(self):
+        self.subprocess.set_outputs(pane_out(1, 1, 1) + "\n")
+        session = asyncio.run(self.multiplexer.get_session(self.labels[0]))
+        assert isinstance(session, JmuxSession)
+        assert session.windows[0].panes[0].current_dir == "/tmp"
+        assert self.subprocess.call_count == 1
+
+    def test_get_session_of_unknown_session_raises_ValueError(self):
+        self.subprocess.set_outputs("", returncode=1)
+        with pytest.raises(ValueError):
+            asyncio.run(self.multiplexer.get_session(self.labels[0]))
+
+    def test_get_current_session_label_returns_SessionLabel(self):
+        self.subprocess.set_outputs("$1:session1\n")
+        label = asyncio.run(self.multiplexer.get_current_session_label())
+        assert label == self.labels[0]
+
+    def test_create_session_runs_one_chained_command(self, jmux_session):
+        self.subprocess.set_outputs("$5 @5 %5\n%6\n@6 %7\n%8\n")
+        asyncio.run(self.multiplexer.create_session(jmux_session))
+        assert self.subprocess.call_count == 1
+        assert self.commands()[0][1] == "new-session"
+        assert jmux_session.id == "$5"
+        assert jmux_session.windows[1].id == "@6"
+
+    def test_create_session_error_raises_ValueError(self, jmux_session):
+        self.subprocess.set_outputs(("", 1))
+        with pytest.raises(ValueError):
+            asyncio.run(self.multiplexer.create_session(jmux_session))
+
+    def test_kill_session_of_unknown_session_raises_ValueError(self):
+        self.subprocess.set_outputs("$2:session2\n")
+        with pytest.raises(ValueError):
+            asyncio.run(self.multiplexer.kill_session(self.labels[0]))
+
+    def test_kill_session_kills_session(self):
+        self.subprocess.set_outputs("$1:session1\n", "")
+        asyncio.run(self.multiplexer.kill_session(self.labels[0]))
+        assert self.commands()[1] == ("/usr/bin/tmux", "kill-session", "-t", "$1")
+
+    def test_rename_session_updates_label(self):
+        self.subprocess.set_outputs("$1:session1\n", "")
+        asyncio.run(self.multiplexer.rename_session(self.labels[0], "new_name"))
+        assert self.labels[0].name == "new_name"
+
+    def test_focus_session_switches_client(self):
+        self.subprocess.set_outputs("$1:session1\n", "")
+        asyncio.run(self.multiplexer.focus_session(self.labels[0]))
+        assert self.commands()[1] == ("/usr/bin/tmux", "switch-client", "-t", "$1")
+
+    def test_create_new_session_error_raises_ValueError(self):
+        self.subprocess.set_outputs("", returncode=1)
+        with pytest.raises(ValueError):
+            asyncio.run(self.multiplexer.create_new_session("session1"))
+
+    def test_independent_commands_overlap(self, mocker):
+        started = []
+
+        def process(output):
+            async def communicate():
+                started.append(output)
+                # Neither capture finishes before both were started.
+                while len(started) < 2:
+                    await asyncio.sleep(0)
+                return output.encode(), b""
+
+            return mocker.Mock(returncode=0, communicate=communicate)
+
+        self.subprocess.side_effect = [
+            process(pane_out(1, 1, 1)),
+            process(pane_out(2, 2, 2)),
+        ]
+
+        async def capture():
+            return await asyncio.wait_for(
+                asyncio.gather(
+                    self.multiplexer.get_session(self.labels[0]),
+                    self.multiplexer.get_session(self.labels[1]),
+                ),
+                timeout=5,
+            )
+
+        sessions = asyncio.run(capture())
+        assert [session.name for session in sessions] == ["session1", "session2"]
+
+
+class TestAsyncTmuxClientControlMode:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, mock_subprocess, session_labels):
+        self.labels = session_labels
+        mocker.patch.dict(os.environ, {"TMUX": "/tmp/tmux-1000/default,1,0"})
+        mock_subprocess.return_value.stdout = "/dev/pts/1\n"
+        self.control = mocker.patch(
+            "src.business_logic.async_tmux_client.TmuxControlMode"
+        ).return_value
+        self.multiplexer = AsyncTmuxClient(control_mode=True)
+
+    def reply(self, output):
+        future = Future()
+        future.set_result(output)
+        self.control.submit.return_value = future
+
+    def test_commands_are_sent_over_control_mode(self):
+        self.reply("$1:session1")
+        assert asyncio.run(self.multiplexer.list_sessions()) == [self.labels[0]]
+        self.control.submit.assert_called_once_with(
+            ["list-sessions", "-F", "#{session_id}:#{session_name}"]
+        )
+
+    def test_switch_client_targets_the_client_jmux_runs_in(self):
+        self.reply("$1:session1")
+        asyncio.run(self.multiplexer.focus_session(self.labels[0]))
+        command = self.control.submit.call_args[0][0]
+        assert command[:3] == ["switch-client", "-c", "/dev/pts/1"]
+
+    def test_close_detaches_the_control_client(self):
+        self.multiplexer.close()
+        self.control.close.assert_called_once_with()
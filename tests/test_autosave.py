@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from src.business_logic.autosave import Autosaver, acquire_lock
+from src.business_logic.session_pool import SPARE_PREFIX
+from src.data_models import JmuxSession
+from src.interfaces import FileHandler, Multiplexer
+
+
+class TestAcquireLock:
+    def test_first_lock_is_acquired(self, tmp_path):
+        assert acquire_lock(tmp_path / "autosave.lock") is not None
+
+    def test_held_lock_is_not_acquired_again(self, tmp_path):
+        assert acquire_lock(tmp_path / "autosave.lock") is not None
+        assert acquire_lock(tmp_path / "autosave.lock") is None
+
+
+class TestAutosaver:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, jmux_session):
+        self.mocker = mocker
+        self.session = jmux_session
+        self.multiplexer = self.mocker.Mock(spec=Multiplexer)
+        self.multiplexer.get_sessions.return_value = [jmux_session]
+        self.file_handler = self.mocker.Mock(spec=FileHandler)
+        self.file_handler.save_session.return_value = True
+        self.autosaver = Autosaver(
+            self.multiplexer, self.file_handler, interval=60, debounce=0.01
+        )
+
+    def test_invalid_interval_raises_value_error(self):
+        with pytest.raises(ValueError):
+            Autosaver(self.multiplexer, self.file_handler, interval=0)
+
+    def test_invalid_debounce_raises_value_error(self):
+        with pytest.raises(ValueError):
+            Autosaver(self.multiplexer, self.file_handler, debounce=-1)
+
+    def test_saves_running_sessions(self):
+        assert self.autosaver.save_changed() == ["session1"]
+        self.file_handler.save_session.assert_called_once_with(self.session)
+        self.file_handler.flush.assert_called_once()
+
+    def test_unchanged_sessions_are_not_saved_again(self):
+        self.autosaver.save_changed()
+        assert self.autosaver.save_changed() == []
+        self.file_handler.save_session.assert_called_once()
+
+    def test_changed_sessions_are_saved_again(self):
+        self.autosaver.save_changed()
+        self.session.windows[0].layout = "tiled"
+        assert self.autosaver.save_changed() == ["session1"]
+
+    def test_only_changed_sessions_are_saved(self):
+        other = JmuxSession("$2", "session2", [])
+        self.multiplexer.get_sessions.return_value = [self.session, other]
+        self.autosaver.save_changed()
+        other.name = "renamed"
+        assert self.autosaver.save_changed() == ["renamed"]
+
+    def test_spare_sessions_are_not_saved(self):
+        spare = JmuxSession("$9", f"{SPARE_PREFIX}1", [])
+        self.multiplexer.get_sessions.return_value = [self.session, spare]
+        assert self.autosaver.save_changed() == ["session1"]
+
+    def test_failed_save_is_retried(self):
+        self.file_handler.save_session.side_effect = OSError
+        self.autosaver.save_changed()
+        self.file_handler.save_session.side_effect = None
+        assert self.autosaver.save_changed() == ["session1"]
+
+    def test_exit_notification_stops_run_once_server_is_gone(self):
+        self.multiplexer.list_sessions.side_effect = ConnectionError
+        self.autosaver.notify("exit", [])
+        self.autosaver.run()
+        self.multiplexer.get_sessions.assert_not_called()
+
+    def test_killing_the_attached_session_keeps_autosave_running(self):
+        other = JmuxSession("$2", "session2", [])
+        self.multiplexer.get_sessions.return_value = [self.session, other]
+        saved = threading.Event()
+        self.file_handler.flush.side_effect = saved.set
+        thread = threading.Thread(target=self.autosaver.run)
+        thread.start()
+        try:
+            assert saved.wait(5)
+            saved.clear()
+            # tmux detaches the control client from the session it killed.
+            self.multiplexer.get_sessions.return_value = [other]
+            other.name = "renamed"
+            self.autosaver.notify("sessions-changed", [])
+            self.autosaver.notify("exit", [])
+            assert saved.wait(5)
+            assert thread.is_alive()
+        finally:
+            self.autosaver.stop()
+            thread.join(5)
+        self.multiplexer.list_sessions.assert_called_once()
+        self.file_handler.save_session.assert_called_with(other)
+
+    def test_change_notification_saves_after_debounce(self):
+        saved = threading.Event()
+        self.file_handler.flush.side_effect = saved.set
+        thread = threading.Thread(target=self.autosaver.run)
+        thread.start()
+        try:
+            assert saved.wait(5)
+            saved.clear()
+            self.session.windows[0].layout = "tiled"
+            self.autosaver.notify("layout-change", ["@1"])
+            assert saved.wait(5)
+        finally:
+            self.autosaver.stop()
+            thread.join(5)
+        assert self.file_handler.save_session.call_count == 2
+
+    def test_unrelated_notifications_do_not_save(self):
+        self.autosaver.notify("output", ["%1"])
+        assert self.autosaver._changed_at is None
+
+    def test_failing_capture_does_not_stop_run(self):
+        calls = []
+
+        def get_sessions():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError
+            self.autosaver.stop()
+            return []
+
+        self.multiplexer.get_sessions.side_effect = get_sessions
+        self.autosaver.interval = 0.01
+        self.autosaver.run()
+        assert len(calls) == 2
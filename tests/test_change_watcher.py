@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from src.business_logic.change_watcher import ChangeWatcher
+
+
+class TestChangeWatcher:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.value = 0
+        self.changed = threading.Event()
+        self.watcher = ChangeWatcher(lambda: self.value, self.changed.set, 0.01)
+        yield
+        self.watcher.stop()
+
+    def test_invalid_interval_raises_value_error(self):
+        with pytest.raises(ValueError):
+            ChangeWatcher(lambda: 0, lambda: None, 0)
+
+    def test_change_calls_callback(self):
+        self.watcher.start()
+        self.value = 1
+        assert self.changed.wait(1)
+
+    def test_unchanged_value_does_not_call_callback(self):
+        self.watcher.start()
+        assert not self.changed.wait(0.05)
+
+    def test_failing_probe_counts_as_a_change(self):
+        def probe():
+            raise OSError
+
+        self.watcher.probe = probe
+        self.watcher.start()
+        self.watcher.probe = lambda: 0
+        assert self.changed.wait(1)
+
+    def test_stop_ends_watching(self):
+        self.watcher.start()
+        self.watcher.stop()
+        self.value = 1
+        assert not self.changed.wait(0.05)
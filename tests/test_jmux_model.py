@@ -1,6 +1,11 @@
+import threading
+from concurrent.futures import Future
+
 import pytest
 
 from src.business_logic import JmuxModel
+from src.business_logic.session_pool import SPARE_PREFIX, SessionPool
+from src.data_models import JmuxSession, RestoreResult, SessionLabel
 
 
 class TestConstructor:
@@ -43,6 +48,45 @@ class TestCreateSession:
         self.multiplexer.create_new_session.assert_called_once_with("session1")
 
 
+class TestCreateSessionFromPool:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_multiplexer, mock_file_handler, session_labels, mocker):
+        self.multiplexer = mock_multiplexer
+        self.multiplexer.list_sessions.return_value = session_labels
+        self.pool = mocker.Mock(spec=SessionPool)
+        self.model = JmuxModel(self.multiplexer, mock_file_handler, self.pool)
+        self.model.wait()
+        self.pool.reset_mock()
+
+    def test_pool_is_refilled_when_the_model_starts(self, mock_file_handler):
+        JmuxModel(self.multiplexer, mock_file_handler, self.pool).wait()
+        self.pool.refill.assert_called_once()
+
+    def test_claims_spare_session_and_refills_pool(self):
+        self.pool.claim.return_value = True
+        self.model.create_session("session3")
+        self.model.wait()
+        self.pool.claim.assert_called_once_with("session3")
+        self.pool.refill.assert_called_once()
+        self.multiplexer.create_new_session.assert_not_called()
+
+    def test_creates_new_session_when_pool_is_empty(self):
+        self.pool.claim.return_value = False
+        self.model.create_session("session3")
+        self.multiplexer.create_new_session.assert_called_once_with("session3")
+
+    def test_existing_session_name_raises_value_error(self):
+        with pytest.raises(ValueError):
+            self.model.create_session("session1")
+        self.pool.claim.assert_not_called()
+
+    def test_failing_refill_is_ignored(self):
+        self.pool.claim.return_value = True
+        self.pool.refill.side_effect = ValueError("Session not found")
+        self.model.create_session("session3")
+        self.model.wait()
+
+
 class TestSaveSession:
     @pytest.fixture(autouse=True)
     def setup(self, mock_multiplexer, mock_file_handler, session_labels):
@@ -55,12 +99,95 @@ class TestSaveSession:
         self.model.save_session(self.session_labels[0])
         self.multiplexer.get_session.assert_called_once_with(self.session_labels[0])
 
+    def test_returns_whether_the_session_was_written(self):
+        self.file_handler.save_session.return_value = False
+        assert self.model.save_session(self.session_labels[0]) is False
+
     def test_calls_file_handler_save_session_with_session(self, jmux_session):
         self.multiplexer.get_session.return_value = jmux_session
         self.model.save_session(self.session_labels[0])
         self.file_handler.save_session.assert_called_once_with(jmux_session)
 
 
+class TestSaveSessions:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_multiplexer, mock_file_handler, session_labels):
+        self.multiplexer = mock_multiplexer
+        self.file_handler = mock_file_handler
+        self.session_labels = session_labels
+        self.multiplexer.list_sessions.return_value = session_labels
+        self.captures = {}
+        self.captured = threading.Event()
+
+        def capture_sessions(labels):
+            futures = [
+                self.captures.setdefault(label.name, Future()) for label in labels
+            ]
+            self.captured.set()
+            return futures
+
+        self.multiplexer.capture_sessions.side_effect = capture_sessions
+        self.model = JmuxModel(self.multiplexer, self.file_handler)
+
+    def finish_captures(self):
+        assert self.captured.wait(timeout=5)
+        for name, capture in self.captures.items():
+            capture.set_result(JmuxSession("", name, []))
+
+    def saved_names(self):
+        calls = self.file_handler.save_session.call_args_list
+        return [call.args[0].name for call in calls]
+
+    def test_saves_every_running_session_by_default(self):
+        self.model.save_sessions()
+        self.finish_captures()
+        self.model.wait()
+        assert self.saved_names() == ["session1", "session2"]
+
+    def test_captures_all_sessions_at_once(self):
+        self.model.save_sessions()
+        self.finish_captures()
+        self.model.wait()
+        self.multiplexer.capture_sessions.assert_called_once_with(self.session_labels)
+
+    def test_returns_before_the_sessions_are_captured(self):
+        self.model.save_sessions()
+        assert not self.file_handler.save_session.called
+        self.finish_captures()
+        self.model.wait()
+        assert self.file_handler.save_session.call_count == 2
+
+    def test_session_that_is_not_running_is_reported(self, mocker):
+        on_progress = mocker.Mock()
+        self.model.save_sessions([SessionLabel("", "session3")], on_progress)
+        self.model.wait()
+        on_progress.assert_called_once_with(
+            RestoreResult("session3", "Session session3 is not running"), 1, 1
+        )
+
+    def test_unreachable_multiplexer_reports_sessions_as_not_running(self, mocker):
+        self.multiplexer.list_sessions.side_effect = ConnectionError()
+        on_progress = mocker.Mock()
+        self.model.save_sessions([self.session_labels[0]], on_progress)
+        self.model.wait()
+        on_progress.assert_called_once_with(
+            RestoreResult("session1", "Session session1 is not running"), 1, 1
+        )
+
+    def test_failed_capture_does_not_stop_the_others(self, mocker):
+        on_progress = mocker.Mock()
+        self.model.save_sessions(on_progress=on_progress)
+        assert self.captured.wait(timeout=5)
+        self.captures["session1"].set_exception(ValueError("Session gone"))
+        self.captures["session2"].set_result(JmuxSession("", "session2", []))
+        self.model.wait()
+        assert [call.args for call in on_progress.call_args_list] == [
+            (RestoreResult("session1", "Session gone"), 1, 2),
+            (RestoreResult("session2"), 2, 2),
+        ]
+        assert self.saved_names() == ["session2"]
+
+
 class TestLoadSession:
     @pytest.fixture(autouse=True)
     def setup(self, mock_multiplexer, mock_file_handler, session_labels):
@@ -84,6 +211,280 @@ class TestLoadSession:
         self.file_handler.save_session.assert_called_once_with(jmux_session)
 
 
+class TestLoadSessionLazily:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_multiplexer, mock_file_handler, session_labels, jmux_session):
+        self.multiplexer = mock_multiplexer
+        self.file_handler = mock_file_handler
+        self.session_labels = session_labels
+        self.session = jmux_session
+        self.multiplexer.list_sessions.return_value = []
+        self.file_handler.load_session.return_value = jmux_session
+        self.progress = []
+        self.model = JmuxModel(self.multiplexer, self.file_handler)
+
+    def on_progress(self, result, done, total):
+        self.progress.append((result, done, total))
+
+    def test_creates_session_lazily_and_returns_before_the_other_windows(self):
+        created = threading.Event()
+
+        def windows():
+            created.wait()
+            yield self.session.windows[1]
+
+        self.multiplexer.create_session_lazily.return_value = windows()
+        self.model.load_session(self.session_labels[0], self.on_progress)
+        self.multiplexer.create_session_lazily.assert_called_once_with(self.session)
+        self.multiplexer.create_session.assert_not_called()
+        assert self.progress == []
+        created.set()
+        self.model.wait()
+        assert self.progress == [(RestoreResult("session1:window2"), 2, 2)]
+
+    def test_saves_session_once_every_window_is_created(self):
+        self.multiplexer.create_session_lazily.return_value = iter(
+            self.session.windows[1:]
+        )
+        self.model.load_session(self.session_labels[0], self.on_progress)
+        self.model.wait()
+        self.file_handler.save_session.assert_called_once_with(self.session)
+
+    def test_error_creating_a_window_is_reported_and_stops_loading(self):
+        def windows():
+            raise ValueError("can't find window")
+            yield
+
+        self.multiplexer.create_session_lazily.return_value = windows()
+        self.model.load_session(self.session_labels[0], self.on_progress)
+        self.model.wait()
+        assert self.progress == [(RestoreResult("session1", "can't find window"), 1, 2)]
+        self.file_handler.save_session.assert_not_called()
+
+    def test_running_session_is_focused(self):
+        self.multiplexer.list_sessions.return_value = self.session_labels
+        self.model.load_session(self.session_labels[0], self.on_progress)
+        self.multiplexer.focus_session.assert_called_once_with(self.session_labels[0])
+        self.multiplexer.create_session_lazily.assert_not_called()
+
+
+class TestSubscribe:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_multiplexer, mock_file_handler, session_labels, mocker):
+        self.multiplexer = mock_multiplexer
+        self.file_handler = mock_file_handler
+        self.multiplexer.list_sessions.return_value = session_labels
+        self.file_handler.list_sessions.return_value = session_labels
+        self.watcher = mocker.patch("src.business_logic.jmux_model.ChangeWatcher")
+        self.model = JmuxModel(self.multiplexer, self.file_handler)
+        self.changed = threading.Event()
+
+    def test_mutations_notify_subscribers(self):
+        self.multiplexer.subscribe.return_value = True
+        self.model.subscribe(self.changed.set)
+        self.model.create_session("session3")
+        assert self.changed.is_set()
+
+    def test_failed_mutations_notify_subscribers(self):
+        self.multiplexer.subscribe.return_value = True
+        self.model.subscribe(self.changed.set)
+        with pytest.raises(ValueError):
+            self.model.delete_session(SessionLabel("$9", "missing"))
+        assert self.changed.is_set()
+
+    def test_multiplexer_notifications_notify_subscribers(self):
+        self.multiplexer.subscribe.return_value = True
+        self.model.subscribe(self.changed.set)
+        self.model.get_snapshot()
+        callback = self.multiplexer.subscribe.call_args[0][0]
+        callback("sessions-changed", [])
+        assert self.changed.is_set()
+        assert self.model._snapshot is None
+
+    def test_layout_change_does_not_notify_subscribers(self):
+        self.multiplexer.subscribe.return_value = True
+        self.model.subscribe(self.changed.set)
+        snapshot = self.model.get_snapshot()
+        callback = self.multiplexer.subscribe.call_args[0][0]
+        callback("layout-change", ["@1", "b25d,80x24,0,0,1"])
+        assert not self.changed.is_set()
+        assert self.model._snapshot is snapshot
+
+    def test_only_first_subscriber_starts_watching(self):
+        self.multiplexer.subscribe.return_value = True
+        self.model.subscribe(self.changed.set)
+        self.model.subscribe(lambda: None)
+        self.multiplexer.subscribe.assert_called_once()
+        self.watcher.assert_called_once()
+
+    def test_sessions_folder_changes_notify_subscribers(self):
+        self.multiplexer.subscribe.return_value = True
+        self.model.subscribe(self.changed.set)
+        probe, callback, _ = self.watcher.call_args[0]
+        assert probe == self.file_handler.change_marker
+        self.watcher.return_value.start.assert_called_once()
+        callback()
+        assert self.changed.is_set()
+
+    def test_running_sessions_are_polled_without_notifications(self):
+        self.multiplexer.subscribe.return_value = False
+        self.model.subscribe(self.changed.set)
+        probe = self.watcher.call_args_list[0][0][0]
+        marker = probe()
+        self.multiplexer.list_sessions.return_value = []
+        assert probe() != marker
+
+    def test_close_stops_watching(self):
+        self.multiplexer.subscribe.return_value = True
+        self.model.subscribe(self.changed.set)
+        self.model.close()
+        self.watcher.return_value.stop.assert_called_once()
+
+
+class TestReconcileSession:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_multiplexer, mock_file_handler, session_labels):
+        self.multiplexer = mock_multiplexer
+        self.file_handler = mock_file_handler
+        self.session_labels = session_labels
+        self.model = JmuxModel(self.multiplexer, self.file_handler)
+
+    def test_reconciles_running_session_with_its_save(self, jmux_session):
+        self.multiplexer.list_sessions.return_value = [SessionLabel("$7", "session1")]
+        self.file_handler.load_session.return_value = jmux_session
+        self.multiplexer.reconcile_session.return_value = 3
+        assert self.model.reconcile_session(self.session_labels[0]) == 3
+        self.multiplexer.reconcile_session.assert_called_once_with(jmux_session)
+
+    def test_session_not_running_raises_value_error(self):
+        self.multiplexer.list_sessions.return_value = []
+        with pytest.raises(ValueError):
+            self.model.reconcile_session(self.session_labels[0])
+        self.multiplexer.reconcile_session.assert_not_called()
+
+    def test_session_not_saved_raises_value_error(self):
+        self.multiplexer.list_sessions.return_value = self.session_labels
+        self.file_handler.load_session.side_effect = FileNotFoundError
+        with pytest.raises(ValueError):
+            self.model.reconcile_session(self.session_labels[0])
+
+
+class TestRestoreSessions:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_multiplexer, mock_file_handler, session_labels):
+        self.multiplexer = mock_multiplexer
+        self.file_handler = mock_file_handler
+        self.session_labels = session_labels
+        self.multiplexer.list_sessions.return_value = []
+        self.file_handler.list_sessions.return_value = session_labels
+        self.file_handler.load_session.side_effect = lambda name: JmuxSession(
+            "", name, []
+        )
+        self.model = JmuxModel(self.multiplexer, self.file_handler)
+
+    def test_restores_every_saved_session_by_default(self):
+        results = self.model.restore_sessions()
+        assert sorted(result.name for result in results) == ["session1", "session2"]
+        assert self.multiplexer.create_session.call_count == 2
+
+    def test_restores_only_the_given_sessions(self):
+        results = self.model.restore_sessions([self.session_labels[1]])
+        assert results == [RestoreResult("session2")]
+        self.file_handler.load_session.assert_called_once_with("session2")
+
+    def test_does_not_focus_restored_sessions(self):
+        self.model.restore_sessions()
+        for call in self.multiplexer.create_session.call_args_list:
+            assert call.kwargs["focus"] is False
+
+    def test_skips_running_sessions(self):
+        self.multiplexer.list_sessions.return_value = [self.session_labels[0]]
+        results = self.model.restore_sessions()
+        assert results == [RestoreResult("session2")]
+
+    def test_failed_session_is_reported_and_does_not_stop_the_others(self):
+        def create_session(session, focus):
+            if session.name == "session1":
+                raise ValueError("duplicate session")
+
+        self.multiplexer.create_session.side_effect = create_session
+        results = sorted(self.model.restore_sessions(), key=lambda r: r.name)
+        assert results == [
+            RestoreResult("session1", "duplicate session"),
+            RestoreResult("session2"),
+        ]
+
+    def test_reports_progress_for_every_session(self, mocker):
+        on_progress = mocker.Mock()
+        self.model.restore_sessions(on_progress=on_progress)
+        assert [call.args[1:] for call in on_progress.call_args_list] == [
+            (1, 2),
+            (2, 2),
+        ]
+
+    def test_restores_sessions_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        self.multiplexer.create_session.side_effect = lambda *_, **__: barrier.wait()
+        results = self.model.restore_sessions(max_workers=2)
+        assert all(not result.error for result in results)
+
+    def test_invalid_max_workers_raises_value_error(self):
+        with pytest.raises(ValueError):
+            self.model.restore_sessions(max_workers=0)
+
+
+class TestGetSnapshot:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_multiplexer, mock_file_handler, session_labels):
+        self.multiplexer = mock_multiplexer
+        self.file_handler = mock_file_handler
+        self.session_labels = session_labels
+        self.multiplexer.list_sessions.return_value = session_labels
+        self.file_handler.list_sessions.return_value = [session_labels[1]]
+        self.multiplexer.get_current_session_label.return_value = session_labels[0]
+        self.model = JmuxModel(self.multiplexer, self.file_handler)
+
+    def test_snapshot_holds_running_saved_and_active_sessions(self):
+        snapshot = self.model.get_snapshot()
+        assert snapshot.running == self.session_labels
+        assert snapshot.saved == [self.session_labels[1]]
+        assert snapshot.is_active(self.session_labels[0])
+        assert snapshot.running_and_saved == {("$2", "session2")}
+
+    def test_snapshot_is_reused_until_invalidated(self):
+        assert self.model.get_snapshot() is self.model.get_snapshot()
+        self.multiplexer.list_sessions.assert_called_once()
+        self.file_handler.list_sessions.assert_called_once()
+        self.model.invalidate_snapshot()
+        self.model.get_snapshot()
+        assert self.file_handler.list_sessions.call_count == 2
+
+    def test_no_active_session_outside_multiplexer(self):
+        self.multiplexer.get_current_session_label.side_effect = ValueError
+        assert self.model.get_snapshot().active is None
+
+    @pytest.mark.parametrize(
+        "operation",
+        [
+            lambda model, label: model.create_session("session3"),
+            lambda model, label: model.save_session(label),
+            lambda model, label: model.load_session(label),
+            lambda model, label: model.delete_session(label),
+            lambda model, label: model.rename_session(label, "renamed"),
+            lambda model, label: model.restore_sessions([label]),
+        ],
+    )
+    def test_changes_invalidate_snapshot(self, operation):
+        snapshot = self.model.get_snapshot()
+        operation(self.model, self.session_labels[1])
+        assert self.model.get_snapshot() is not snapshot
+
+    def test_kill_session_invalidates_snapshot(self):
+        snapshot = self.model.get_snapshot()
+        self.model.kill_session(self.session_labels[1])
+        assert self.model.get_snapshot() is not snapshot
+
+
 class TestKillSession:
     @pytest.fixture(autouse=True)
     def setup(self, mock_multiplexer, mock_file_handler, session_labels):
@@ -146,24 +547,11 @@ class TestRenameSession:
             self.session_labels[0], "new_name"
         )
 
-    def test_loads_session_file_if_saved_session(self):
+    def test_renames_session_file_if_saved_session(self):
         self.multiplexer.list_sessions.return_value = []
         self.model.rename_session(self.session_labels[0], "new_name")
-        self.file_handler.load_session.assert_called_once_with(
-            self.session_labels[0].name
-        )
-
-    def test_saves_renamed_session_to_file_if_saved_session(self, jmux_session):
-        self.multiplexer.list_sessions.return_value = []
-        self.file_handler.load_session.return_value = jmux_session
-        self.model.rename_session(self.session_labels[0], "new_name")
-        self.file_handler.save_session.assert_called_once_with(jmux_session)
-
-    def test_deletes_old_session_file_if_saved_session(self):
-        self.multiplexer.list_sessions.return_value = []
-        self.model.rename_session(self.session_labels[0], "new_name")
-        self.file_handler.delete_session.assert_called_once_with(
-            self.session_labels[0].name
+        self.file_handler.rename_session.assert_called_once_with(
+            self.session_labels[0].name, "new_name"
         )
 
     def test_empty_new_name_raises_value_error(self):
@@ -179,19 +567,17 @@ class TestRenameSession:
         self.model.rename_session(self.session_labels[0], "new_name")
         self.multiplexer.rename_session.assert_not_called()
 
-    def test_not_saved_session_does_not_load_session_file(self):
+    def test_not_saved_session_does_not_rename_session_file(self):
         self.file_handler.list_sessions.return_value = []
         self.model.rename_session(self.session_labels[0], "new_name")
-        self.file_handler.load_session.assert_not_called()
+        self.file_handler.rename_session.assert_not_called()
 
     def test_running_and_saved_session_renames_multiplexer_session_and_session_file(
         self, jmux_session
     ):
         self.model.rename_session(self.session_labels[0], "new_name")
         self.multiplexer.rename_session.assert_called_once()
-        self.file_handler.load_session.assert_called_once()
-        self.file_handler.save_session.assert_called_once()
-        self.file_handler.delete_session.assert_called_once()
+        self.file_handler.rename_session.assert_called_once()
 
 
 class TestListSavedSessions:
@@ -224,9 +610,15 @@ class TestListRunningSessions:
         self.model = JmuxModel(self.multiplexer, self.file_handler)
 
     def test_calls_multiplexer_list_sessions(self):
+        self.multiplexer.list_sessions.return_value = []
         self.model.list_running_sessions()
         self.multiplexer.list_sessions.assert_called_once()
 
+    def test_spare_sessions_are_hidden(self):
+        spare = SessionLabel("$9", f"{SPARE_PREFIX}1")
+        self.multiplexer.list_sessions.return_value = self.session_labels + [spare]
+        assert self.model.list_running_sessions() == self.session_labels
+
     def test_returns_list_of_session_labels(self):
         self.multiplexer.list_sessions.return_value = self.session_labels
         assert self.model.list_running_sessions() == self.session_labels
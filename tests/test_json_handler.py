@@ -1,10 +1,12 @@
 import json
+import os
 from dataclasses import asdict
 
 import pytest
 
 from src.business_logic import JsonHandler
-from src.data_models import JmuxSession
+from src.business_logic.session_codecs import CompactCodec
+from src.data_models import JmuxSession, SessionLabel
 
 
 class TestConstructor:
@@ -31,83 +33,442 @@ class TestConstructor:
 
 class TestSaveSession:
     @pytest.fixture(autouse=True)
-    def setup(self, mock_folder, jmux_session):
-        self.folder = mock_folder
-        self.file = mock_folder / "test.json"
+    def setup(self, tmp_path, jmux_session):
+        self.folder = tmp_path
+        self.file = tmp_path / "session1.json"
         self.jmux_session = jmux_session
         self.file_handler = JsonHandler(self.folder)
 
-    def test_given_valid_arguments_returns_none(self):
-        self.folder.exists.return_value = True
-        assert self.file_handler.save_session(self.jmux_session) is None
-
-    def test_opens_save_file_in_write_mode(self):
-        self.file_handler.save_session(self.jmux_session)
-        self.file.open.assert_called_once_with("w")
+    def test_given_valid_arguments_returns_true(self):
+        assert self.file_handler.save_session(self.jmux_session) is True
 
-    def test_writes_to_save_file(self):
+    def test_writes_save_file_named_after_session(self):
         self.file_handler.save_session(self.jmux_session)
-        self.file.open().write.assert_called()
+        assert self.file.exists()
 
     def test_writes_json_object_to_save_file(self):
         self.file_handler.save_session(self.jmux_session)
-        written_data = "".join(
-            call[0][0] for call in self.file.open().write.call_args_list
-        )
         try:
-            json.loads(written_data)
+            json.loads(self.file.read_text())
             assert True
         except json.JSONDecodeError:
             assert False
 
     def test_writes_correct_data_to_save_file(self):
         self.file_handler.save_session(self.jmux_session)
-        written_data = "".join(
-            call[0][0] for call in self.file.open().write.call_args_list
-        )
-        assert json.loads(written_data) == asdict(self.jmux_session)
+        assert json.loads(self.file.read_text()) == asdict(self.jmux_session)
+
+    def test_overwrites_existing_save_file(self):
+        self.file.write_text("old")
+        self.file_handler.save_session(self.jmux_session)
+        assert json.loads(self.file.read_text()) == asdict(self.jmux_session)
+
+    def test_unchanged_session_is_not_written_again(self):
+        self.file_handler.save_session(self.jmux_session)
+        mtime = self.file.stat().st_mtime_ns
+        assert self.file_handler.save_session(self.jmux_session) is False
+        assert self.file.stat().st_mtime_ns == mtime
+
+    def test_changed_session_is_written(self):
+        self.file_handler.save_session(self.jmux_session)
+        self.jmux_session.windows[0].name = "renamed"
+        assert self.file_handler.save_session(self.jmux_session) is True
+        assert self.file_handler.load_session("session1").windows[0].name == "renamed"
+
+    def test_session_with_new_ids_is_written(self):
+        self.file_handler.save_session(self.jmux_session)
+        self.jmux_session.id = "$9"
+        assert self.file_handler.save_session(self.jmux_session) is True
+
+    def test_session_with_new_ids_is_not_written_when_ignoring_ids(self):
+        file_handler = JsonHandler(self.folder, ignore_ids=True)
+        file_handler.save_session(self.jmux_session)
+        self.jmux_session.id = "$9"
+        self.jmux_session.windows[0].panes[0].id = "%9"
+        assert file_handler.save_session(self.jmux_session) is False
+        assert len(file_handler.list_history("session1")) == 1
+
+    def test_new_ids_are_stored_when_ignoring_ids(self):
+        file_handler = JsonHandler(self.folder, ignore_ids=True)
+        file_handler.save_session(self.jmux_session)
+        self.jmux_session.id = "$9"
+        file_handler.save_session(self.jmux_session)
+        assert file_handler.load_session("session1").id == "$9"
+        assert file_handler.list_sessions() == [SessionLabel("$9", "session1")]
+
+    def test_queued_session_with_new_ids_is_not_kept_in_history(self):
+        file_handler = JsonHandler(self.folder, ignore_ids=True, write_delay=60)
+        file_handler.save_session(self.jmux_session)
+        file_handler.flush()
+        self.jmux_session.id = "$9"
+        file_handler.save_session(self.jmux_session)
+        file_handler.flush()
+        assert file_handler.load_session("session1").id == "$9"
+        assert len(file_handler.list_history("session1")) == 1
+
+    def test_session_file_changed_out_of_band_is_written(self):
+        self.file_handler.save_session(self.jmux_session)
+        self.file.write_text("{}")
+        assert self.file_handler.save_session(self.jmux_session) is True
+        assert self.file_handler.load_session("session1") == self.jmux_session
+
+    def test_adds_session_to_manifest(self):
+        self.file_handler.save_session(self.jmux_session)
+        entry = self.file_handler.manifest.entries()["session1"]
+        assert (entry.id, entry.windows, entry.panes) == ("$1", 2, 4)
+
+
+class TestChangeMarker:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, jmux_session):
+        self.folder = tmp_path
+        self.jmux_session = jmux_session
+        self.file_handler = JsonHandler(self.folder)
+        os.utime(self.folder, ns=(0, 0))
+
+    def test_changes_when_a_session_is_saved(self):
+        marker = self.file_handler.change_marker()
+        self.file_handler.save_session(self.jmux_session)
+        assert self.file_handler.change_marker() != marker
+
+    def test_changes_when_a_session_is_deleted(self):
+        self.file_handler.save_session(self.jmux_session)
+        os.utime(self.folder, ns=(0, 0))
+        marker = self.file_handler.change_marker()
+        self.file_handler.delete_session("session1")
+        assert self.file_handler.change_marker() != marker
+
+    def test_does_not_change_when_sessions_are_read(self):
+        marker = self.file_handler.change_marker()
+        self.file_handler.list_sessions()
+        assert self.file_handler.change_marker() == marker
 
 
 class TestLoadSession:
     @pytest.fixture(autouse=True)
-    def setup(self, mock_folder, jmux_session, mocker):
-        self.folder = mock_folder
-        self.session_file = mock_folder / "test.json"
+    def setup(self, tmp_path, jmux_session):
+        self.folder = tmp_path
         self.jmux_session = jmux_session
         self.file_handler = JsonHandler(self.folder)
-        mocker.patch("json.load", return_value=asdict(self.jmux_session))
+        (tmp_path / "test.json").write_text(json.dumps(asdict(jmux_session)))
 
     def test_given_valid_arguments_returns_instance_of_JmuxSession(self):
         assert isinstance(self.file_handler.load_session("test"), JmuxSession)
 
     def test_throws_file_not_found_error_if_session_file_does_not_exist(self):
-        self.session_file.exists.return_value = False
         with pytest.raises(FileNotFoundError):
-            self.file_handler.load_session("test")
-
-    def test_opens_session_file_in_read_mode(self):
-        self.file_handler.load_session("test")
-        self.session_file.open.assert_called_once_with("r")
+            self.file_handler.load_session("missing")
 
     def test_returns_JmuxSession_with_correct_data(self):
         assert self.file_handler.load_session("test") == self.jmux_session
 
+    def test_unchanged_session_is_served_from_cache(self, mocker):
+        self.file_handler.load_session("test")
+        decode = mocker.spy(self.file_handler, "_decode")
+        assert self.file_handler.load_session("test") == self.jmux_session
+        decode.assert_not_called()
+        assert self.file_handler.cache_info().hits == 1
+
+    def test_changed_session_file_is_read_again(self):
+        self.file_handler.load_session("test")
+        self.jmux_session.id = "$9"
+        data = json.dumps(asdict(self.jmux_session), indent=4)
+        (self.folder / "test.json").write_text(data)
+        assert self.file_handler.load_session("test").id == "$9"
+
+    def test_saved_session_is_served_from_cache(self, mocker):
+        self.file_handler.save_session(self.jmux_session)
+        decode = mocker.spy(self.file_handler, "_decode")
+        assert self.file_handler.load_session("session1") == self.jmux_session
+        decode.assert_not_called()
+
 
 class TestDeleteSession:
     @pytest.fixture(autouse=True)
-    def setup(self, mock_folder):
-        self.folder = mock_folder
-        self.session_file = mock_folder / "test.json"
+    def setup(self, tmp_path, jmux_session):
+        self.folder = tmp_path
+        self.session_file = tmp_path / "session1.json"
         self.file_handler = JsonHandler(self.folder)
+        self.file_handler.save_session(jmux_session)
 
     def test_throws_file_not_found_error_if_session_file_does_not_exist(self):
-        self.session_file.exists.return_value = False
         with pytest.raises(FileNotFoundError):
-            self.file_handler.delete_session("test")
+            self.file_handler.delete_session("missing")
 
     def test_returns_none_given_valid_arguments(self):
-        assert self.file_handler.delete_session("test") is None
+        assert self.file_handler.delete_session("session1") is None
 
     def test_deletes_session_file(self):
-        self.file_handler.delete_session("test")
-        self.session_file.unlink.assert_called_once()
+        self.file_handler.delete_session("session1")
+        assert not self.session_file.exists()
+
+    def test_removes_session_from_manifest(self):
+        self.file_handler.delete_session("session1")
+        assert "session1" not in self.file_handler.manifest._read()
+
+
+class TestListSessions:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, jmux_session, mocker):
+        self.folder = tmp_path
+        self.jmux_session = jmux_session
+        self.file_handler = JsonHandler(self.folder)
+        self.file_handler.save_session(jmux_session)
+        self.file_handler.save_session(JmuxSession("$2", "session2", []))
+        self.decode = mocker.spy(self.file_handler.manifest, "_decode")
+
+    def test_returns_labels_of_saved_sessions(self, session_labels):
+        assert self.file_handler.list_sessions() == session_labels
+
+    def test_no_saved_sessions_returns_empty_list(self, tmp_path_factory):
+        file_handler = JsonHandler(tmp_path_factory.mktemp("empty"))
+        assert file_handler.list_sessions() == []
+
+    def test_indexed_sessions_are_not_parsed(self):
+        self.file_handler.list_sessions()
+        self.decode.assert_not_called()
+
+    def test_manifest_is_not_listed_as_a_session(self):
+        self.file_handler.list_sessions()
+        assert (self.folder / ".manifest").exists()
+        assert len(self.file_handler.list_sessions()) == 2
+
+    def test_files_added_out_of_band_are_indexed(self):
+        session = JmuxSession("$3", "session3", [])
+        (self.folder / "session3.json").write_text(json.dumps(asdict(session)))
+        assert SessionLabel("$3", "session3") in self.file_handler.list_sessions()
+        self.decode.assert_called_once()
+        self.file_handler.list_sessions()
+        self.decode.assert_called_once()
+
+    def test_files_changed_out_of_band_are_indexed_again(self):
+        self.jmux_session.id = "$9"
+        data = json.dumps(asdict(self.jmux_session), indent=4)
+        (self.folder / "session1.json").write_text(data)
+        labels = self.file_handler.list_sessions()
+        assert SessionLabel("$9", "session1") in labels
+
+    def test_files_deleted_out_of_band_are_dropped(self):
+        (self.folder / "session1.json").unlink()
+        assert self.file_handler.list_sessions() == [SessionLabel("$2", "session2")]
+
+    def test_corrupt_manifest_is_rebuilt(self, session_labels):
+        (self.folder / ".manifest").write_text("{")
+        assert self.file_handler.list_sessions() == session_labels
+        assert self.decode.call_count == 2
+
+    def test_unreadable_session_file_is_skipped(self):
+        (self.folder / "broken.json").write_text("{")
+        assert len(self.file_handler.list_sessions()) == 2
+
+
+class TestRenameSession:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, jmux_session):
+        self.folder = tmp_path
+        self.file_handler = JsonHandler(self.folder)
+        self.file_handler.save_session(jmux_session)
+
+    def test_moves_session_to_new_name(self):
+        self.file_handler.rename_session("session1", "renamed")
+        assert self.file_handler.list_sessions() == [SessionLabel("$1", "renamed")]
+        assert self.file_handler.load_session("renamed").name == "renamed"
+
+    def test_missing_session_raises_file_not_found_error(self):
+        with pytest.raises(FileNotFoundError):
+            self.file_handler.rename_session("missing", "renamed")
+
+
+class TestCompactStore:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, jmux_session):
+        self.folder = tmp_path
+        self.session = jmux_session
+        self.file_handler = JsonHandler(self.folder, codec=CompactCodec())
+        self.legacy_handler = JsonHandler(self.folder)
+
+    def test_saves_sessions_in_compact_format(self):
+        self.file_handler.save_session(self.session)
+        data = (self.folder / "session1.jmux").read_bytes()
+        assert CompactCodec().decode(data) == self.session
+
+    def test_reads_legacy_json_sessions(self):
+        self.legacy_handler.save_session(self.session)
+        assert self.file_handler.load_session("session1") == self.session
+        assert self.file_handler.list_sessions() == [SessionLabel("$1", "session1")]
+
+    def test_saving_replaces_legacy_json_file(self):
+        self.legacy_handler.save_session(self.session)
+        self.file_handler.save_session(self.session)
+        assert not (self.folder / "session1.json").exists()
+        assert self.file_handler.list_sessions() == [SessionLabel("$1", "session1")]
+
+    def test_lists_sessions_in_both_formats(self, session_labels):
+        self.file_handler.save_session(self.session)
+        self.legacy_handler.save_session(JmuxSession("$2", "session2", []))
+        assert self.file_handler.list_sessions() == session_labels
+
+    def test_delete_removes_session_in_every_format(self):
+        self.legacy_handler.save_session(self.session)
+        (self.folder / "session1.jmux").write_bytes(CompactCodec().encode(self.session))
+        self.file_handler.delete_session("session1")
+        assert self.file_handler.list_sessions() == []
+
+
+class TestAtomicWrites:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, tmp_path, jmux_session):
+        self.mocker = mocker
+        self.folder = tmp_path
+        self.file = tmp_path / "session1.json"
+        self.jmux_session = jmux_session
+        self.file_handler = JsonHandler(self.folder)
+
+    def test_leaves_no_temporary_files(self):
+        self.file_handler.save_session(self.jmux_session)
+        assert not list(self.folder.glob("*.tmp"))
+
+    def test_failed_write_keeps_old_session_file(self):
+        self.file_handler.save_session(self.jmux_session)
+        old_data = self.file.read_bytes()
+        self.jmux_session.windows[0].name = "changed"
+        self.mocker.patch("os.replace", side_effect=OSError("disk full"))
+        with pytest.raises(OSError):
+            self.file_handler.save_session(self.jmux_session)
+        assert self.file.read_bytes() == old_data
+        assert not list(self.folder.glob("*.tmp"))
+
+    def test_single_save_syncs_file_not_everything(self):
+        fsync = self.mocker.patch("os.fsync")
+        sync = self.mocker.patch("os.sync")
+        self.file_handler.save_session(self.jmux_session)
+        assert fsync.call_count == 2
+        sync.assert_not_called()
+
+
+class TestWriteBehind:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, tmp_path, jmux_session):
+        self.mocker = mocker
+        self.folder = tmp_path
+        self.file = tmp_path / "session1.json"
+        self.jmux_session = jmux_session
+        self.file_handler = JsonHandler(self.folder, write_delay=60)
+        yield
+        self.file_handler.queue.close()
+
+    def test_save_is_not_written_until_flushed(self):
+        assert self.file_handler.save_session(self.jmux_session) is True
+        assert not self.file.exists()
+        self.file_handler.flush()
+        assert self.file_handler.load_session("session1") == self.jmux_session
+        assert self.file.exists()
+
+    def test_pending_save_can_be_loaded(self):
+        self.file_handler.save_session(self.jmux_session)
+        assert self.file_handler.load_session("session1") == self.jmux_session
+
+    def test_repeated_saves_are_coalesced(self):
+        queue = self.file_handler.queue
+        write = self.mocker.patch.object(queue, "_write", wraps=queue._write)
+        self.file_handler.save_session(self.jmux_session)
+        self.jmux_session.windows[0].name = "changed"
+        self.file_handler.save_session(self.jmux_session)
+        self.file_handler.flush()
+        written = write.call_args[0][0]
+        assert len(written) == 1
+        assert written[0].windows[0].name == "changed"
+
+    def test_batch_syncs_each_file_and_the_folder_once(self, jmux_session):
+        sync = self.mocker.patch("os.sync")
+        fsync = self.mocker.patch("os.fsync")
+        for name in ["one", "two", "three"]:
+            self.jmux_session.name = name
+            self.file_handler.save_session(self.jmux_session)
+        self.file_handler.flush()
+        sync.assert_not_called()
+        assert fsync.call_count == 4
+        assert len(self.file_handler.list_sessions()) == 3
+
+    def test_deleting_pending_save_drops_it(self):
+        self.file_handler.save_session(self.jmux_session)
+        self.file_handler.delete_session("session1")
+        self.file_handler.flush()
+        assert not self.file.exists()
+
+    def test_listing_sessions_includes_pending_saves(self):
+        self.file_handler.save_session(self.jmux_session)
+        assert self.file_handler.list_sessions() == [SessionLabel("$1", "session1")]
+
+    def test_listing_sessions_does_not_write_pending_saves(self):
+        self.file_handler.save_session(self.jmux_session)
+        self.file_handler.list_sessions()
+        assert not self.file.exists()
+        assert self.file_handler.queue.get("session1") is not None
+
+    def test_pending_save_replaces_listed_session(self):
+        self.file_handler.save_session(self.jmux_session)
+        self.file_handler.flush()
+        self.jmux_session.id = "$9"
+        self.file_handler.save_session(self.jmux_session)
+        assert self.file_handler.list_sessions() == [SessionLabel("$9", "session1")]
+
+
+class TestHistory:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, jmux_session):
+        self.folder = tmp_path
+        self.jmux_session = jmux_session
+        self.file_handler = JsonHandler(self.folder, history_size=2)
+
+    def test_invalid_history_size_raises_value_error(self):
+        with pytest.raises(ValueError):
+            JsonHandler(self.folder, history_size=-1)
+
+    def test_every_save_is_a_version(self):
+        self.file_handler.save_session(self.jmux_session)
+        self.jmux_session.windows[0].name = "changed"
+        self.file_handler.save_session(self.jmux_session)
+        assert len(self.file_handler.list_history("session1")) == 2
+
+    def test_unchanged_save_is_not_a_version(self):
+        self.file_handler.save_session(self.jmux_session)
+        self.file_handler.save_session(self.jmux_session)
+        assert len(self.file_handler.list_history("session1")) == 1
+
+    def test_keeps_history_size_versions(self):
+        for index in range(4):
+            self.jmux_session.windows[0].name = str(index)
+            self.file_handler.save_session(self.jmux_session)
+        assert len(self.file_handler.list_history("session1")) == 2
+
+    def test_restore_version_saves_it_as_latest(self):
+        self.file_handler.save_session(self.jmux_session)
+        version = self.file_handler.list_history("session1")[0].hash
+        self.jmux_session.windows[0].name = "changed"
+        self.file_handler.save_session(self.jmux_session)
+        assert self.file_handler.restore_version("session1", version) is True
+        loaded = self.file_handler.load_session("session1")
+        assert loaded.windows[0].name == "window1"
+        assert self.file_handler.list_history("session1")[0].hash == version
+
+    def test_history_survives_deleting_session(self):
+        self.file_handler.save_session(self.jmux_session)
+        version = self.file_handler.list_history("session1")[0].hash
+        self.file_handler.delete_session("session1")
+        assert self.file_handler.load_version("session1", version) == self.jmux_session
+
+    def test_prune_history(self):
+        for index in range(2):
+            self.jmux_session.windows[0].name = str(index)
+            self.file_handler.save_session(self.jmux_session)
+        assert self.file_handler.prune_history(1) == 1
+
+    def test_history_can_be_turned_off(self):
+        file_handler = JsonHandler(self.folder, history_size=0)
+        file_handler.save_session(self.jmux_session)
+        assert file_handler.list_history("session1") == []
+
+    def test_history_is_not_listed_as_a_session(self):
+        self.file_handler.save_session(self.jmux_session)
+        assert self.file_handler.list_sessions() == [SessionLabel("$1", "session1")]
@@ -0,0 +1,65 @@
+import pytest
+
+from src.business_logic.session_cache import SessionCache, copy_session
+from src.data_models import CacheInfo
+
+
+class TestCopySession:
+    def test_copy_is_equal_but_independent(self, jmux_session):
+        copy = copy_session(jmux_session)
+        assert copy == jmux_session
+        copy.windows[0].panes[0].current_dir = "/changed"
+        assert jmux_session.windows[0].panes[0].current_dir == "/tmp/jmux"
+
+
+class TestSessionCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, jmux_session):
+        self.file = tmp_path / "session1.json"
+        self.file.write_text("x" * 100)
+        self.session = jmux_session
+        self.cache = SessionCache(max_size=250)
+
+    def test_invalid_max_size_raises_value_error(self):
+        with pytest.raises(ValueError):
+            SessionCache(-1)
+
+    def test_unchanged_file_is_a_hit(self):
+        self.cache.put(str(self.file), self.file.stat(), self.session)
+        assert self.cache.get(str(self.file), self.file.stat()) == self.session
+        assert self.cache.cache_info() == CacheInfo(1, 0, 1, 100, 250)
+
+    def test_changed_file_is_a_miss(self):
+        self.cache.put(str(self.file), self.file.stat(), self.session)
+        self.file.write_text("y" * 101)
+        assert self.cache.get(str(self.file), self.file.stat()) is None
+        assert self.cache.cache_info().misses == 1
+
+    def test_cached_session_cannot_be_changed_by_callers(self):
+        self.cache.put(str(self.file), self.file.stat(), self.session)
+        self.session.name = "changed"
+        self.cache.get(str(self.file), self.file.stat()).name = "changed"
+        assert self.cache.get(str(self.file), self.file.stat()).name == "session1"
+
+    def test_least_recently_used_session_is_evicted(self, tmp_path):
+        files = []
+        for name in ["a", "b", "c"]:
+            files.append(tmp_path / name)
+            files[-1].write_text("x" * 100)
+        self.cache.put(str(files[0]), files[0].stat(), self.session)
+        self.cache.put(str(files[1]), files[1].stat(), self.session)
+        self.cache.get(str(files[0]), files[0].stat())
+        self.cache.put(str(files[2]), files[2].stat(), self.session)
+        assert self.cache.get(str(files[1]), files[1].stat()) is None
+        assert self.cache.get(str(files[0]), files[0].stat()) is not None
+        assert self.cache.cache_info().size == 200
+
+    def test_session_larger_than_the_cache_is_not_cached(self):
+        self.file.write_text("x" * 300)
+        self.cache.put(str(self.file), self.file.stat(), self.session)
+        assert self.cache.cache_info().entries == 0
+
+    def test_discard_drops_session(self):
+        self.cache.put(str(self.file), self.file.stat(), self.session)
+        self.cache.discard(str(self.file))
+        assert self.cache.cache_info() == CacheInfo(0, 0, 0, 0, 250)
@@ -0,0 +1,104 @@
+import json
+from dataclasses import asdict
+
+import pytest
+
+from src.business_logic.session_codecs import (
+    CompactCodec,
+    JsonCodec,
+    content_hash,
+    decode_session,
+)
+from src.business_logic.session_cache import copy_session
+from src.data_models import JmuxSession
+
+
+class TestJsonCodec:
+    def test_encodes_the_same_json_as_asdict(self, jmux_session):
+        data = JsonCodec().encode(jmux_session)
+        assert data.decode() == json.dumps(asdict(jmux_session), indent=4)
+
+    def test_round_trips_session(self, jmux_session):
+        codec = JsonCodec()
+        assert codec.decode(codec.encode(jmux_session)) == jmux_session
+
+
+class TestCompactCodec:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.codec = CompactCodec()
+
+    def test_round_trips_session(self, jmux_session):
+        assert self.codec.decode(self.codec.encode(jmux_session)) == jmux_session
+
+    def test_round_trips_session_without_windows(self):
+        session = JmuxSession("$1", "session1", [])
+        assert self.codec.decode(self.codec.encode(session)) == session
+
+    def test_round_trips_unicode_strings(self, jmux_session):
+        jmux_session.windows[0].panes[0].current_dir = "/tmp/jmüx ✓"
+        assert self.codec.decode(self.codec.encode(jmux_session)) == jmux_session
+
+    def test_repeated_strings_are_stored_once(self, jmux_session):
+        assert self.codec.encode(jmux_session).count(b"/tmp/jmux") == 1
+
+    def test_is_smaller_than_json(self, jmux_session):
+        compact = self.codec.encode(jmux_session)
+        assert len(compact) < len(JsonCodec().encode(jmux_session)) / 2
+
+    def test_unknown_version_raises_value_error(self, jmux_session):
+        data = bytearray(self.codec.encode(jmux_session))
+        data[4] = 99
+        with pytest.raises(ValueError):
+            self.codec.decode(bytes(data))
+
+    def test_truncated_data_raises_value_error(self, jmux_session):
+        with pytest.raises(ValueError):
+            self.codec.decode(self.codec.encode(jmux_session)[:-20])
+
+
+class TestDecodeSession:
+    def test_decodes_compact_sessions(self, jmux_session):
+        assert decode_session(CompactCodec().encode(jmux_session)) == jmux_session
+
+    def test_decodes_json_sessions(self, jmux_session):
+        assert decode_session(JsonCodec().encode(jmux_session)) == jmux_session
+
+
+class TestContentHash:
+    def test_equal_sessions_have_equal_hashes(self, jmux_session):
+        copy = JsonCodec().decode(JsonCodec().encode(jmux_session))
+        assert content_hash(copy) == content_hash(jmux_session)
+
+    def test_changed_session_has_different_hash(self, jmux_session):
+        before = content_hash(jmux_session)
+        jmux_session.windows[1].panes[0].current_dir = "/home"
+        assert content_hash(jmux_session) != before
+
+    def test_ids_can_be_left_out(self, jmux_session):
+        before = content_hash(jmux_session, include_ids=False)
+        full_before = content_hash(jmux_session)
+        jmux_session.windows[0].id = "@9"
+        assert content_hash(jmux_session, include_ids=False) == before
+        assert content_hash(jmux_session) != full_before
+
+    def test_restored_session_has_the_same_hash_without_ids(self, jmux_session):
+        for window in jmux_session.windows:
+            window.layout = "b25d,80x24,0,0{40x24,0,0,1,39x24,41,0,2}"
+        restored = copy_session(jmux_session)
+        restored.id = "$7"
+        for number, window in enumerate(restored.windows):
+            window.id = f"@{number + 7}"
+            window.layout = "c1f3,80x24,0,0{40x24,0,0,7,39x24,41,0,8}"
+            for pane, pane_id in zip(window.panes, ["%7", "%8"]):
+                pane.id = pane_id
+        assert content_hash(restored, include_ids=False) == content_hash(
+            jmux_session, include_ids=False
+        )
+        assert content_hash(restored) != content_hash(jmux_session)
+
+    def test_different_layout_has_a_different_hash_without_ids(self, jmux_session):
+        jmux_session.windows[0].layout = "b25d,80x24,0,0{40x24,0,0,1,39x24,41,0,2}"
+        before = content_hash(jmux_session, include_ids=False)
+        jmux_session.windows[0].layout = "b25d,80x24,0,0[80x12,0,0,1,80x11,0,13,2]"
+        assert content_hash(jmux_session, include_ids=False) != before
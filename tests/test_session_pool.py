@@ -0,0 +1,83 @@
+import pytest
+
+from src.business_logic.session_pool import SPARE_PREFIX, SessionPool, is_spare
+from src.data_models import SessionLabel
+from src.interfaces import Multiplexer
+
+
+def spare(index, spawned_at):
+    return SessionLabel(f"${index}", f"{SPARE_PREFIX}{int(spawned_at * 1e9)}")
+
+
+class TestIsSpare:
+    def test_spare_session_name(self):
+        assert is_spare(f"{SPARE_PREFIX}1")
+
+    def test_other_session_name(self):
+        assert not is_spare("session1")
+
+
+class TestSessionPool:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, session_labels):
+        self.mocker = mocker
+        self.mocker.patch("time.time", return_value=1000.0)
+        self.multiplexer = self.mocker.Mock(spec=Multiplexer)
+        self.session_labels = session_labels
+        self.multiplexer.list_sessions.return_value = list(session_labels)
+        self.pool = SessionPool(self.multiplexer, 2, max_idle=100)
+
+    def test_invalid_size_raises_value_error(self):
+        with pytest.raises(ValueError):
+            SessionPool(self.multiplexer, -1)
+
+    def test_invalid_max_idle_raises_value_error(self):
+        with pytest.raises(ValueError):
+            SessionPool(self.multiplexer, 2, max_idle=0)
+
+    def test_claim_renames_and_focuses_oldest_spare(self):
+        newer, older = spare(3, 990.0), spare(4, 950.0)
+        self.multiplexer.list_sessions.return_value += [newer, older]
+        assert self.pool.claim("session3")
+        self.multiplexer.rename_session.assert_called_once_with(older, "session3")
+        self.multiplexer.focus_session.assert_called_once_with(older)
+
+    def test_claim_skips_expired_spares(self):
+        expired, fresh = spare(3, 800.0), spare(4, 950.0)
+        self.multiplexer.list_sessions.return_value += [expired, fresh]
+        assert self.pool.claim("session3")
+        self.multiplexer.rename_session.assert_called_once_with(fresh, "session3")
+
+    def test_claim_without_spares_returns_false(self):
+        assert not self.pool.claim("session3")
+        self.multiplexer.rename_session.assert_not_called()
+
+    def test_refill_spawns_spares_until_full(self):
+        self.multiplexer.list_sessions.return_value += [spare(3, 950.0)]
+        assert self.pool.refill() == 1
+        name = self.multiplexer.create_new_session.call_args[0][0]
+        assert is_spare(name)
+        self.multiplexer.create_new_session.assert_called_once_with(name, focus=False)
+
+    def test_refill_kills_expired_spares(self):
+        expired = spare(3, 800.0)
+        self.multiplexer.list_sessions.return_value += [expired]
+        assert self.pool.refill() == 2
+        self.multiplexer.kill_session.assert_called_once_with(expired)
+
+    def test_refill_kills_spares_over_the_size_limit(self):
+        spares = [spare(3, 940.0), spare(4, 950.0), spare(5, 960.0)]
+        self.multiplexer.list_sessions.return_value += spares
+        assert self.pool.refill() == 0
+        self.multiplexer.kill_session.assert_called_once_with(spares[2])
+
+    def test_refill_does_not_touch_other_sessions(self):
+        self.pool.refill()
+        self.multiplexer.kill_session.assert_not_called()
+
+    def test_spare_with_unreadable_time_is_expired(self):
+        broken = SessionLabel("$3", f"{SPARE_PREFIX}x")
+        self.multiplexer.list_sessions.return_value += [broken]
+        assert not self.pool.claim("session3")
+        self.pool.refill()
+        self.multiplexer.kill_session.assert_called_once_with(broken)
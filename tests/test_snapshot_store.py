@@ -0,0 +1,191 @@
+import multiprocessing
+
+import pytest
+
+from src.business_logic.snapshot_store import SnapshotStore
+from src.data_models import SessionVersion
+
+
+class TestSnapshotStore:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, tmp_path, jmux_session):
+        self.mocker = mocker
+        self.folder = tmp_path / "history"
+        self.store = SnapshotStore(self.folder)
+        self.session = jmux_session
+
+    def object_count(self):
+        return sum(1 for path in self.store.objects.rglob("*") if path.is_file())
+
+    def test_empty_history(self):
+        assert self.store.history("session1") == []
+
+    def test_recorded_snapshot_is_in_history(self):
+        version = self.store.record(self.session, saved_at=10.0)
+        assert self.store.history("session1") == [
+            SessionVersion("session1", version, 10.0)
+        ]
+
+    def test_history_is_newest_first(self):
+        first = self.store.record(self.session, saved_at=1.0)
+        self.session.windows[0].name = "changed"
+        second = self.store.record(self.session, saved_at=2.0)
+        versions = [version.hash for version in self.store.history("session1")]
+        assert versions == [second, first]
+
+    def test_same_snapshot_twice_in_a_row_is_recorded_once(self):
+        self.store.record(self.session)
+        self.store.record(self.session)
+        assert len(self.store.history("session1")) == 1
+
+    def test_loads_recorded_snapshot(self):
+        version = self.store.record(self.session)
+        self.session.windows[0].panes[0].current_dir = "/changed"
+        self.store.record(self.session)
+        loaded = self.store.load("session1", version)
+        assert loaded.windows[0].panes[0].current_dir == "/tmp/jmux"
+        self.session.windows[0].panes[0].current_dir = "/tmp/jmux"
+        assert loaded == self.session
+
+    def test_loading_unknown_version_raises_file_not_found_error(self):
+        self.store.record(self.session)
+        with pytest.raises(FileNotFoundError):
+            self.store.load("session1", "0" * 64)
+
+    def test_unchanged_windows_and_panes_are_stored_once(self):
+        self.store.record(self.session)
+        objects = self.object_count()
+        self.session.windows[1].name = "changed"
+        self.store.record(self.session)
+        # Only a new session and window object, the panes are shared.
+        assert self.object_count() == objects + 2
+
+    def test_trim_keeps_latest_snapshots(self):
+        for index in range(5):
+            self.session.windows[0].name = str(index)
+            self.store.record(self.session, saved_at=float(index))
+        assert self.store.trim("session1", 2) == 3
+        assert [version.saved_at for version in self.store.history("session1")] == [
+            4.0,
+            3.0,
+        ]
+        assert self.store.load("session1", self.store.history("session1")[1].hash)
+
+    def test_trim_deletes_objects_no_snapshot_uses(self):
+        self.store.record(self.session)
+        objects = self.object_count()
+        self.session.windows[0].name = "changed"
+        self.store.record(self.session)
+        self.store.trim("session1", 1)
+        assert self.object_count() == objects
+        assert self.store.load("session1", self.store.history("session1")[0].hash)
+
+    def test_trim_to_zero_deletes_everything(self):
+        self.store.record(self.session)
+        self.store.trim("session1", 0)
+        assert self.store.history("session1") == []
+        assert self.object_count() == 0
+
+    def test_objects_shared_between_sessions_are_kept(self):
+        self.store.record(self.session)
+        self.session.name = "session2"
+        self.store.record(self.session)
+        self.store.trim("session1", 0)
+        version = self.store.history("session2")[0].hash
+        assert self.store.load("session2", version) == self.session
+
+    def test_trim_only_reads_objects_of_dropped_snapshots(self):
+        self.store.record(self.session)
+        self.session.name = "session2"
+        for index in range(3):
+            self.session.windows[0].name = str(index)
+            self.store.record(self.session)
+        read_object = self.mocker.spy(self.store, "_read_object")
+        self.store.trim("session2", 2)
+        # The dropped session and its changed window, the panes are shared.
+        assert read_object.call_count == 2
+
+    def test_snapshot_recorded_again_is_kept_when_its_first_entry_is_dropped(self):
+        first = self.store.record(self.session, saved_at=1.0)
+        self.session.windows[0].name = "changed"
+        self.store.record(self.session, saved_at=2.0)
+        self.session.windows[0].name = "window1"
+        assert self.store.record(self.session, saved_at=3.0) == first
+        self.store.trim("session1", 1)
+        assert self.store.load("session1", first) == self.session
+
+    def test_objects_of_other_stores_are_kept(self):
+        # Like a jmux and an autosave process sharing the history folder.
+        other = SnapshotStore(self.folder)
+        self.store.record(self.session)
+        self.session.name = "session2"
+        other.record(self.session)
+        self.store.trim("session1", 0)
+        version = other.history("session2")[0].hash
+        assert other.load("session2", version) == self.session
+
+    def test_concurrent_processes_lose_no_objects(self):
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(
+                target=record_snapshots, args=(self.folder, self.session, name)
+            )
+            for name in ["a", "b", "c", "d"]
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.store.prune(0)
+        assert self.object_count() == 0
+
+    def test_concurrent_trims_keep_shared_objects(self):
+        context = multiprocessing.get_context("fork")
+        self.session.name = "kept"
+        version = self.store.record(self.session)
+        processes = [
+            context.Process(
+                target=record_snapshots, args=(self.folder, self.session, name)
+            )
+            for name in ["a", "b", "c", "d"]
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert self.store.load("kept", version) == self.session
+
+    def test_invalid_keep_raises_value_error(self):
+        with pytest.raises(ValueError):
+            self.store.trim("session1", -1)
+
+    def test_prune_trims_every_session(self):
+        for name in ["session1", "session2"]:
+            self.session.name = name
+            for index in range(3):
+                self.session.windows[0].name = str(index)
+                self.store.record(self.session)
+        assert self.store.prune(1) == 4
+        assert len(self.store.history("session1")) == 1
+        assert len(self.store.history("session2")) == 1
+
+    def test_prune_without_history(self):
+        assert self.store.prune(1) == 0
+
+    def test_prune_deletes_objects_no_snapshot_uses(self):
+        self.store.record(self.session)
+        objects = self.object_count()
+        self.session.windows[0].name = "changed"
+        self.store.record(self.session)
+        assert self.store.prune(1) == 1
+        assert self.object_count() == objects
+
+
+def record_snapshots(folder, session, name):
+    # Records and trims snapshots that share their panes with `session`.
+    store = SnapshotStore(folder)
+    session.name = name
+    for index in range(10):
+        session.windows[0].name = str(index)
+        store.record(session)
+        store.trim(name, 2)
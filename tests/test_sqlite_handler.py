@@ -0,0 +1,169 @@
+import threading
+
+import pytest
+
+from src.business_logic import JsonHandler, SqliteHandler
+from src.data_models import JmuxSession, SessionLabel
+
+
+class TestConstructor:
+    def test_invalid_sessions_folder_value_throws_value_error(self):
+        with pytest.raises(ValueError):
+            SqliteHandler("test")
+
+    def test_given_sessions_folder_does_not_exist_throws_value_error(self, tmp_path):
+        with pytest.raises(ValueError):
+            SqliteHandler(tmp_path / "missing")
+
+    def test_database_uses_wal_mode(self, tmp_path):
+        handler = SqliteHandler(tmp_path)
+        mode = handler._connect().execute("PRAGMA journal_mode").fetchone()
+        assert mode == ("wal",)
+
+
+class TestSqliteHandler:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, jmux_session):
+        self.folder = tmp_path
+        self.session = jmux_session
+        self.handler = SqliteHandler(tmp_path)
+        self.handler.save_session(jmux_session)
+
+    def test_load_returns_saved_session(self):
+        assert self.handler.load_session("session1") == self.session
+
+    def test_change_marker_changes_when_a_session_is_saved(self):
+        marker = self.handler.change_marker()
+        self.session.name = "session2"
+        self.handler.save_session(self.session)
+        assert self.handler.change_marker() != marker
+
+    def test_change_marker_does_not_change_when_sessions_are_read(self):
+        marker = self.handler.change_marker()
+        self.handler.list_sessions()
+        assert self.handler.change_marker() == marker
+
+    def test_load_missing_session_raises_file_not_found_error(self):
+        with pytest.raises(FileNotFoundError):
+            self.handler.load_session("missing")
+
+    def test_save_replaces_session_with_same_name(self):
+        self.session.id = "$9"
+        self.session.windows = self.session.windows[:1]
+        self.handler.save_session(self.session)
+        assert self.handler.load_session("session1") == self.session
+        windows = self.handler._connect().execute("SELECT COUNT(*) FROM windows")
+        assert windows.fetchone() == (1,)
+
+    def test_save_only_uses_sql_older_sqlite_versions_support(self):
+        # RETURNING needs SQLite 3.35, which e.g. Debian 11 does not ship.
+        statements = []
+        self.handler._connect().set_trace_callback(statements.append)
+        self.session.windows[0].layout = "tiled"
+        self.handler.save_session(self.session)
+        assert statements
+        assert not any("RETURNING" in statement for statement in statements)
+        assert self.handler.load_session("session1") == self.session
+
+    def test_unchanged_session_is_not_written_again(self):
+        assert self.handler.save_session(self.session) is False
+
+    def test_changed_session_is_written(self):
+        self.session.windows[0].layout = "tiled"
+        assert self.handler.save_session(self.session) is True
+        assert self.handler.load_session("session1") == self.session
+
+    def test_session_with_new_ids_is_not_written_when_ignoring_ids(self):
+        handler = SqliteHandler(self.folder, ignore_ids=True)
+        self.session.id = "$9"
+        assert handler.save_session(self.session) is False
+        assert len(handler.list_history("session1")) == 1
+
+    def test_new_ids_are_stored_when_ignoring_ids(self):
+        handler = SqliteHandler(self.folder, ignore_ids=True)
+        self.session.id = "$9"
+        handler.save_session(self.session)
+        assert handler.load_session("session1").id == "$9"
+
+    def test_saves_are_kept_in_history(self):
+        version = self.handler.list_history("session1")[0].hash
+        self.session.windows[0].layout = "tiled"
+        self.handler.save_session(self.session)
+        assert len(self.handler.list_history("session1")) == 2
+        assert self.handler.load_version("session1", version).windows[0].layout == (
+            "test"
+        )
+
+    def test_restore_version(self):
+        version = self.handler.list_history("session1")[0].hash
+        self.session.windows[0].layout = "tiled"
+        self.handler.save_session(self.session)
+        self.handler.restore_version("session1", version)
+        assert self.handler.load_session("session1").windows[0].layout == "test"
+
+    def test_window_without_panes_is_kept(self):
+        self.session.windows[1].panes = []
+        self.handler.save_session(self.session)
+        assert self.handler.load_session("session1") == self.session
+
+    def test_list_sessions_returns_labels_sorted_by_name(self):
+        self.handler.save_session(JmuxSession("$0", "a_session", []))
+        assert self.handler.list_sessions() == [
+            SessionLabel("$0", "a_session"),
+            SessionLabel("$1", "session1"),
+        ]
+
+    def test_delete_removes_session_windows_and_panes(self):
+        self.handler.delete_session("session1")
+        assert self.handler.list_sessions() == []
+        panes = self.handler._connect().execute("SELECT COUNT(*) FROM panes")
+        assert panes.fetchone() == (0,)
+
+    def test_delete_missing_session_raises_file_not_found_error(self):
+        with pytest.raises(FileNotFoundError):
+            self.handler.delete_session("missing")
+
+    def test_rename_keeps_windows_and_panes(self):
+        self.handler.rename_session("session1", "renamed")
+        session = self.handler.load_session("renamed")
+        assert session.windows == self.session.windows
+        assert self.handler.list_sessions() == [SessionLabel("$1", "renamed")]
+
+    def test_rename_replaces_session_with_new_name(self):
+        self.handler.save_session(JmuxSession("$2", "session2", []))
+        self.handler.rename_session("session1", "session2")
+        assert self.handler.list_sessions() == [SessionLabel("$1", "session2")]
+
+    def test_rename_missing_session_raises_file_not_found_error(self):
+        with pytest.raises(FileNotFoundError):
+            self.handler.rename_session("missing", "renamed")
+
+    def test_sessions_can_be_loaded_from_other_threads(self):
+        sessions = []
+        thread = threading.Thread(
+            target=lambda: sessions.append(self.handler.load_session("session1"))
+        )
+        thread.start()
+        thread.join()
+        assert sessions == [self.session]
+
+
+class TestMigrate:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, jmux_session):
+        self.json_handler = JsonHandler(tmp_path)
+        self.json_handler.save_session(jmux_session)
+        self.json_handler.save_session(JmuxSession("$2", "session2", []))
+        self.session = jmux_session
+        self.handler = SqliteHandler(tmp_path)
+
+    def test_copies_every_json_session(self, session_labels):
+        assert self.handler.migrate(self.json_handler) == 2
+        assert self.handler.list_sessions() == session_labels
+        assert self.handler.load_session("session1") == self.session
+
+    def test_migrates_only_once(self):
+        self.handler.migrate(self.json_handler)
+        self.handler.delete_session("session2")
+        assert self.handler.migrate(self.json_handler) == 0
+        assert self.handler.list_sessions() == [SessionLabel("$1", "session1")]
@@ -1,8 +1,10 @@
 import os
+import subprocess
 
 import pytest
 
 from src.business_logic import TmuxClient
+from src.business_logic.tmux_commands import PANE_FORMAT
 from src.data_models import JmuxPane, JmuxSession, JmuxWindow, SessionLabel
 
 
@@ -10,15 +12,46 @@ def list_sessions_out(number_of_sessions):
     return "\n".join([f"${i}:session{i}" for i in range(1, number_of_sessions + 1)])
 
 
-def list_windows_out(number_of_windows):
+def pane_out(*fields):
+    return "\t".join(str(field) for field in fields)
+
+
+def list_session_panes_out(number_of_windows, number_of_panes, session=1):
     return "\n".join(
-        [f"@{i}:window{i}:tiled:{i % 2}" for i in range(1, number_of_windows + 1)]
+        pane_out(
+            f"${session}",
+            f"session{session}",
+            f"@{i}",
+            f"window{i}",
+            "tiled",
+            i % 2,
+            f"%{j}",
+            j % 2,
+            "/tmp/jmux/tests",
+        )
+        for i in range(1, number_of_windows + 1)
+        for j in range(1, number_of_panes + 1)
     )
 
 
-def list_panes_out(number_of_panes):
+def list_windows_out(number_of_windows, session=1, activity=100):
     return "\n".join(
-        [f"%{i}:{i % 2}:/tmp/jmux/tests" for i in range(1, number_of_panes + 1)]
+        f"${session}:session{session}:@{i}:tiled:{i % 2}:1:{activity}:%{i}:window{i}"
+        for i in range(1, number_of_windows + 1)
+    )
+
+
+def list_window_panes_out(window, session=1):
+    return pane_out(
+        f"${session}",
+        f"session{session}",
+        f"@{window}",
+        f"window{window}",
+        "tiled",
+        window % 2,
+        f"%{window}",
+        1,
+        "/tmp/jmux/tests",
     )
 
 
@@ -90,58 +123,62 @@ class TestGetSession:
         self.mocker.patch.object(self.multiplexer, "is_running", return_value=True)
 
     def test_nonexistent_session_id_raises_ValueError(self):
-        self.subprocess.set_side_effects(list_sessions_out(1))
+        self.subprocess.side_effect = subprocess.CalledProcessError(1, [])
         with pytest.raises(ValueError):
             self.multiplexer.get_session(self.labels[1])
 
+    def test_session_with_different_name_raises_ValueError(self):
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
+        with pytest.raises(ValueError):
+            self.multiplexer.get_session(SessionLabel("$1", "renamed"))
+
+    def test_no_tmux_server_raises_ValueError(self):
+        self.mocker.patch.object(self.multiplexer, "is_running", return_value=False)
+        with pytest.raises(ValueError):
+            self.multiplexer.get_session(self.labels[0])
+
+    def test_captures_session_with_a_single_query(self):
+        self.subprocess.reset_mock()
+        self.subprocess.set_side_effects(list_session_panes_out(2, 2))
+        self.multiplexer.get_session(self.labels[0])
+        assert self.subprocess.call_count == 1
+        command = self.subprocess.call_args[0][0]
+        assert command[:5] == ["/usr/bin/tmux", "list-panes", "-s", "-t", "$1"]
+
     def test_existing_session_id_returns_JmuxSession(self):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert isinstance(session, JmuxSession)
 
     def test_existing_session_id_returns_JmuxSession_with_correct_id_and_name(self):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert session.id == "$1"
         assert session.name == "session1"
 
     def test_session_with_one_window_returns_JmuxSession_with_one_window(self):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert len(session.windows) == 1
         assert isinstance(session.windows[0], JmuxWindow)
 
     def test_session_with_window_returns_JmuxSession_with_correct_window_name(self):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert session.windows[0].name == "window1"
 
     def test_session_with_window_returns_JmuxSession_with_correct_window_layout(self):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert session.windows[0].layout == "tiled"
 
     def test_session_with_window_returns_JmuxSession_with_correct_window_focus(self):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert session.windows[0].focus
 
     def test_session_1window_1pane_returns_JmuxSession_1window_1pane(self):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert len(session.windows[0].panes) == 1
         assert isinstance(session.windows[0].panes[0], JmuxPane)
@@ -149,43 +186,313 @@ class TestGetSession:
     def test_session_1window_1pane_returns_JmuxSession_1window_1pane_with_correct_id(
         self,
     ):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert session.windows[0].panes[0].id == "%1"
 
     def test_session_1window_1pane_returns_JmuxSession_1window_1pane_with_correct_focus(
         self,
     ):
+        self.subprocess.set_side_effects(list_session_panes_out(1, 1))
+        session = self.multiplexer.get_session(self.labels[0])
+        assert session.windows[0].panes[0].focus
+
+    def test_pane_path_with_colon_is_kept_intact(self):
         self.subprocess.set_side_effects(
-            list_sessions_out(1), list_windows_out(1), list_panes_out(1)
+            pane_out("$1", "session1", "@1", "window1", "tiled", 1, "%1", 1, "/a:b")
         )
         session = self.multiplexer.get_session(self.labels[0])
-        assert session.windows[0].panes[0].focus
+        assert session.windows[0].panes[0].current_dir == "/a:b"
 
-    def test_session_2windows_returns_JmuxSession_with_2windows(self):
+    def test_window_name_with_colon_is_kept_intact(self):
         self.subprocess.set_side_effects(
-            list_sessions_out(1),
-            list_windows_out(2),
-            list_panes_out(1),
-            list_panes_out(1),
+            pane_out("$1", "session1", "@1", "b:c", "tiled", 1, "%1", 1, "/var")
         )
+        window = self.multiplexer.get_session(self.labels[0]).windows[0]
+        assert (window.name, window.layout) == ("b:c", "tiled")
+        assert (window.panes[0].id, window.panes[0].current_dir) == ("%1", "/var")
+
+    def test_malformed_pane_output_raises_value_error(self):
+        self.subprocess.set_side_effects("$1:session1:@1:b:c:tiled:1:%1:1:/var")
+        with pytest.raises(ValueError):
+            self.multiplexer.get_session(self.labels[0])
+
+    def test_session_2windows_returns_JmuxSession_with_2windows(self):
+        self.subprocess.set_side_effects(list_session_panes_out(2, 1))
         session = self.multiplexer.get_session(self.labels[0])
         assert len(session.windows) == 2
 
     def test_session_2windows_2panes_returns_JmuxSession_with_2windows_2panes(self):
-        self.subprocess.set_side_effects(
-            list_sessions_out(1),
-            list_windows_out(2),
-            list_panes_out(2),
-            list_panes_out(2),
-        )
+        self.subprocess.set_side_effects(list_session_panes_out(2, 2))
         session = self.multiplexer.get_session(self.labels[0])
         assert len(session.windows[0].panes) == 2
         assert len(session.windows[1].panes) == 2
 
 
+class TestCaptureSessions:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, mock_subprocess, session_labels):
+        self.subprocess = mock_subprocess
+        self.labels = session_labels
+        self.multiplexer = TmuxClient()
+        self.multiplexer._bin = "/usr/bin/tmux"
+        mocker.patch.object(self.multiplexer, "is_running", return_value=True)
+
+    def test_returns_a_future_of_each_session(self):
+        self.subprocess.set_side_effects(
+            list_session_panes_out(1, 1), list_session_panes_out(1, 1, session=2)
+        )
+        futures = self.multiplexer.capture_sessions(self.labels)
+        assert [future.result().name for future in futures] == [
+            "session1",
+            "session2",
+        ]
+
+    def test_failed_capture_is_raised_by_its_future(self):
+        self.subprocess.side_effect = [
+            subprocess.CalledProcessError(1, []),
+            self.subprocess.return_value,
+        ]
+        self.subprocess.return_value.stdout = list_session_panes_out(1, 1, session=2)
+        futures = self.multiplexer.capture_sessions(self.labels)
+        with pytest.raises(ValueError):
+            futures[0].result()
+        assert futures[1].result().name == "session2"
+
+
+class TestGetSessions:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, mock_subprocess):
+        self.mocker = mocker
+        self.subprocess = mock_subprocess
+        self.multiplexer = TmuxClient()
+        self.multiplexer._bin = "/usr/bin/tmux"
+        self.mocker.patch.object(self.multiplexer, "is_running", return_value=True)
+
+    def test_with_no_tmux_server_returns_empty_list(self):
+        self.mocker.patch.object(self.multiplexer, "is_running", return_value=False)
+        assert self.multiplexer.get_sessions() == []
+
+    def test_captures_all_sessions(self):
+        windows = list_windows_out(2) + "\n" + list_windows_out(1, session=2)
+        panes = list_session_panes_out(2, 1) + "\n" + list_session_panes_out(1, 2, 2)
+        self.subprocess.reset_mock()
+        self.subprocess.set_side_effects(windows, panes)
+        sessions = self.multiplexer.get_sessions()
+        assert self.subprocess.call_count == 2
+        assert self.subprocess.call_args_list[0][0][0][:3] == [
+            "/usr/bin/tmux",
+            "list-windows",
+            "-a",
+        ]
+        assert [session.name for session in sessions] == ["session1", "session2"]
+        assert len(sessions[0].windows) == 2
+        assert len(sessions[1].windows[0].panes) == 2
+
+    def test_unchanged_windows_are_captured_with_a_single_query(self):
+        self.subprocess.reset_mock()
+        self.subprocess.set_side_effects(
+            list_windows_out(2), list_session_panes_out(2, 1), list_windows_out(2)
+        )
+        first = self.multiplexer.get_sessions()
+        second = self.multiplexer.get_sessions()
+        assert self.subprocess.call_count == 3
+        assert second == first
+
+    def test_only_changed_windows_are_captured_again(self):
+        changed = list_windows_out(1) + "\n" + list_windows_out(2, activity=200)
+        changed = changed.split("\n")
+        self.subprocess.set_side_effects(
+            list_windows_out(2),
+            list_session_panes_out(2, 1),
+            "\n".join([changed[0], changed[2]]),
+            list_window_panes_out(2),
+        )
+        self.multiplexer.get_sessions()
+        sessions = self.multiplexer.get_sessions()
+        commands = chained_commands(self.subprocess.call_args[0][0])
+        assert commands == [["list-panes", "-t", "@2", "-F", PANE_FORMAT]]
+        assert [window.id for window in sessions[0].windows] == ["@1", "@2"]
+
+    def test_closed_windows_are_dropped(self):
+        self.subprocess.set_side_effects(
+            list_windows_out(2), list_session_panes_out(2, 1), list_windows_out(1)
+        )
+        self.multiplexer.get_sessions()
+        sessions = self.multiplexer.get_sessions()
+        assert [window.id for window in sessions[0].windows] == ["@1"]
+
+    def test_window_closed_during_capture_falls_back_to_full_capture(self):
+        self.subprocess.side_effect = [
+            self.mocker.Mock(stdout=list_windows_out(2)),
+            subprocess.CalledProcessError(1, []),
+            self.mocker.Mock(stdout=list_session_panes_out(1, 1)),
+        ]
+        sessions = self.multiplexer.get_sessions()
+        assert [window.id for window in sessions[0].windows] == ["@1"]
+
+    def test_changing_returned_sessions_does_not_change_the_cache(self):
+        self.subprocess.set_side_effects(
+            list_windows_out(1), list_session_panes_out(1, 1), list_windows_out(1)
+        )
+        self.multiplexer.get_sessions()[0].windows[0].name = "changed"
+        assert self.multiplexer.get_sessions()[0].windows[0].name == "window1"
+
+
+def chained_commands(command):
+    commands = [[]]
+    for argument in command[1:]:
+        if argument == ";":
+            commands.append([])
+        else:
+            commands[-1].append(argument)
+    return commands
+
+
+def live_pane(window, pane, directory="/tmp/jmux", layout="test"):
+    return pane_out(
+        "$1",
+        "session1",
+        f"@{window}",
+        f"window{window}",
+        layout,
+        1,
+        f"%{pane}",
+        1,
+        directory,
+    )
+
+
+class TestReconcileSession:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_subprocess, jmux_session, mocker):
+        self.subprocess = mock_subprocess
+        self.session = jmux_session
+        self.mocker = mocker
+        self.multiplexer = TmuxClient()
+        self.multiplexer._bin = "/usr/bin/tmux"
+        self.mocker.patch.object(self.multiplexer, "is_running", return_value=True)
+        self.subprocess.reset_mock()
+
+    def live(self, *panes):
+        return "$1:session1\n" + "\n".join(panes)
+
+    def commands(self, call):
+        return chained_commands(self.subprocess.call_args_list[call][0][0])
+
+    def test_session_not_running_raises_value_error(self):
+        self.subprocess.set_side_effects("$2:session2")
+        with pytest.raises(ValueError):
+            self.multiplexer.reconcile_session(self.session)
+
+    def test_matching_session_is_left_alone(self):
+        live = self.live(
+            live_pane(1, 1), live_pane(1, 2), live_pane(2, 3), live_pane(2, 4)
+        )
+        self.subprocess.set_side_effects(*live.split("\n", 1))
+        assert self.multiplexer.reconcile_session(self.session) == 0
+        assert self.subprocess.call_count == 2
+
+    def test_layouts_differing_only_in_pane_ids_match(self):
+        layout = "b25d,80x24,0,0[80x12,0,0,1,80x11,0,13,2]"
+        for window in self.session.windows:
+            window.layout = layout
+        live_layout = "aaaa,80x24,0,0[80x12,0,0,7,80x11,0,13,8]"
+        panes = [(1, 7), (1, 8), (2, 9), (2, 10)]
+        live = self.live(*[live_pane(*pane, layout=live_layout) for pane in panes])
+        self.subprocess.set_side_effects(*live.split("\n", 1))
+        assert self.multiplexer.reconcile_session(self.session) == 0
+
+    def test_adds_missing_window(self):
+        live = self.live(live_pane(1, 1), live_pane(1, 2))
+        self.subprocess.set_side_effects(*live.split("\n", 1), "@9 %9\n", "")
+        assert self.multiplexer.reconcile_session(self.session) == 3
+        assert self.commands(2) == [
+            [
+                "neww",
+                "-d",
+                "-t",
+                "=session1:",
+                "-n",
+                "window2",
+                "-c",
+                "/tmp/jmux",
+                "-PF",
+                "#{window_id} #{pane_id}",
+            ]
+        ]
+        assert self.commands(3) == [
+            ["splitw", "-d", "-t", "%9", "-c", "/tmp/jmux"],
+            ["select-layout", "-t", "@9", "test"],
+        ]
+
+    def test_missing_window_gets_its_panes_in_saved_order(self):
+        directories = ["/usr", "/", "/tmp", "/etc"]
+        self.session.windows[1].panes = [
+            JmuxPane("", False, directory) for directory in directories
+        ]
+        live = self.live(live_pane(1, 1), live_pane(1, 2))
+        self.subprocess.set_side_effects(*live.split("\n", 1), "@9 %9\n", "")
+        self.multiplexer.reconcile_session(self.session)
+        # Each pane is put right after %9, so the last one is split off first.
+        assert self.commands(3) == [
+            ["splitw", "-d", "-t", "%9", "-c", "/etc"],
+            ["splitw", "-d", "-t", "%9", "-c", "/tmp"],
+            ["splitw", "-d", "-t", "%9", "-c", "/"],
+            ["select-layout", "-t", "@9", "test"],
+        ]
+
+    def test_missing_panes_are_put_next_to_their_saved_neighbours(self):
+        directories = ["/usr", "/", "/tmp", "/etc"]
+        self.session.windows[1].panes = [
+            JmuxPane("", False, directory) for directory in directories
+        ]
+        live = self.live(
+            live_pane(1, 1),
+            live_pane(1, 2),
+            live_pane(2, 3, directory="/"),
+            live_pane(2, 4, directory="/etc"),
+        )
+        self.subprocess.set_side_effects(*live.split("\n", 1), "")
+        self.multiplexer.reconcile_session(self.session)
+        assert self.commands(2) == [
+            ["splitw", "-d", "-b", "-t", "%3", "-c", "/usr"],
+            ["splitw", "-d", "-t", "%3", "-c", "/tmp"],
+            ["select-layout", "-t", "@2", "test"],
+        ]
+
+    def test_adds_missing_pane_and_fixes_layout(self):
+        live = self.live(
+            live_pane(1, 1), live_pane(2, 3), live_pane(2, 4, directory="/home")
+        )
+        self.subprocess.set_side_effects(*live.split("\n", 1), "")
+        assert self.multiplexer.reconcile_session(self.session) == 3
+        assert self.commands(2) == [
+            ["splitw", "-d", "-t", "%1", "-c", "/tmp/jmux"],
+            ["select-layout", "-t", "@1", "test"],
+            ["splitw", "-d", "-t", "%3", "-c", "/tmp/jmux"],
+        ]
+
+    def test_fixes_layout(self):
+        live = self.live(
+            live_pane(1, 1, layout="tiled"),
+            live_pane(1, 2, layout="tiled"),
+            live_pane(2, 3),
+            live_pane(2, 4),
+        )
+        self.subprocess.set_side_effects(*live.split("\n", 1), "")
+        assert self.multiplexer.reconcile_session(self.session) == 1
+        assert self.commands(2) == [["select-layout", "-t", "@1", "test"]]
+
+    def test_tmux_error_raises_value_error(self):
+        live = self.live(live_pane(1, 1), live_pane(1, 2))
+        self.subprocess.side_effect = [
+            self.mocker.Mock(stdout=output) for output in live.split("\n", 1)
+        ] + [subprocess.CalledProcessError(1, [], stderr="error")]
+        with pytest.raises(ValueError):
+            self.multiplexer.reconcile_session(self.session)
+
+
 class TestCreateSession:
     @pytest.fixture(autouse=True)
     def setup(self, mock_subprocess, jmux_session, mocker):
@@ -195,6 +502,11 @@ class TestCreateSession:
         self.multiplexer = TmuxClient()
         self.multiplexer._bin = "/usr/bin/tmux"
         self.mocker.patch.object(self.multiplexer, "is_running", return_value=True)
+        self.subprocess.reset_mock()
+        self.subprocess.return_value.stdout = "$5\n@5\n%5\n%6\n@6\n%7\n%8\n"
+
+    def created_commands(self):
+        return chained_commands(self.subprocess.call_args[0][0])
 
     def test_session_with_no_windows_throws_ValueError(self):
         with pytest.raises(ValueError):
@@ -202,109 +514,289 @@ class TestCreateSession:
                 JmuxSession(self.session.id, self.session.name, [])
             )
 
-    def test_session_creates_tmux_session(self):
+    def test_window_with_no_panes_throws_ValueError(self):
+        self.session.windows[0].panes = []
+        with pytest.raises(ValueError):
+            self.multiplexer.create_session(self.session)
+        self.subprocess.assert_not_called()
+
+    def test_session_is_created_with_a_single_tmux_call(self):
+        self.multiplexer.create_session(self.session)
+        self.subprocess.assert_called_once()
+        assert self.subprocess.call_args[0][0][0] == "/usr/bin/tmux"
+
+    def test_tmux_error_raises_ValueError(self):
+        self.subprocess.side_effect = subprocess.CalledProcessError(
+            1, [], stderr="duplicate session: session1"
+        )
+        with pytest.raises(ValueError):
+            self.multiplexer.create_session(self.session)
+
+    def test_session_creates_tmux_session_with_first_window_and_pane(self):
         self.multiplexer.create_session(self.session)
         command = [
-            "/usr/bin/tmux",
             "new-session",
             "-ds",
             self.session.name,
+            "-n",
+            "window1",
+            "-c",
+            "/tmp/jmux",
             "-PF",
-            "#{session_id}",
+            "#{session_id} #{window_id} #{pane_id}",
         ]
-        expected_call = self.mocker.call(
-            command, capture_output=True, text=True, check=True
-        )
-        call_count = self.subprocess.mock_calls.count(expected_call)
-        print(self.subprocess.mock_calls)
-        assert call_count == 1
+        assert self.created_commands()[0] == command
 
     def test_session_switches_to_created_session(self):
         self.multiplexer.create_session(self.session)
-        command = ["/usr/bin/tmux", "switch-client", "-t", self.session.id]
-        expected_call = self.mocker.call(command, check=True)
-        call_count = self.subprocess.mock_calls.count(expected_call)
-        assert call_count == 1
+        command = ["switch-client", "-t", "=session1"]
+        assert self.created_commands()[-1] == command
 
-    def test_session_with_one_window_creates_session_with_one_window(self):
+    def test_unfocused_session_does_not_switch_client(self):
+        self.multiplexer.create_session(self.session, focus=False)
+        assert all(c[0] != "switch-client" for c in self.created_commands())
+
+    def test_second_window_is_created_with_its_first_pane(self):
         self.multiplexer.create_session(self.session)
         command = [
-            "/usr/bin/tmux",
             "neww",
             "-t",
-            self.session.id,
+            "=session1:",
             "-n",
-            self.session.windows[0].name,
+            self.session.windows[1].name,
+            "-c",
+            "/tmp/jmux",
             "-PF",
-            "#{window_id}",
+            "#{window_id} #{pane_id}",
+            "-d",
         ]
-        expected_call = self.mocker.call(
-            command, capture_output=True, text=True, check=True
-        )
-        call_count = self.subprocess.mock_calls.count(expected_call)
-        assert call_count == 1
+        assert self.created_commands().count(command) == 1
 
-    def test_session_with_one_window_creates_session_with_one_pane(self):
+    def test_first_window_gets_only_its_other_panes_split_off(self):
         self.session.windows = self.session.windows[:1]
         self.multiplexer.create_session(self.session)
-        window_id = self.session.windows[0].id
-        pane_dir = self.session.windows[0].panes[0].current_dir
+        pane_dir = self.session.windows[0].panes[1].current_dir
         command = [
-            "/usr/bin/tmux",
             "splitw",
             "-t",
-            window_id,
+            "=session1:{end}.{top-left}",
             "-c",
             pane_dir,
             "-PF",
             "#{pane_id}",
+            "-d",
         ]
-        expected_call = self.mocker.call(
-            command, capture_output=True, text=True, check=True
-        )
-        call_count = self.subprocess.mock_calls.count(expected_call)
-        assert call_count == 1
+        assert self.created_commands()[1:] == [
+            command,
+            [
+                "select-layout",
+                "-t",
+                "=session1:{end}",
+                self.session.windows[0].layout,
+            ],
+            ["switch-client", "-t", "=session1"],
+        ]
+
+    def test_panes_are_split_off_the_first_pane_last_to_first(self):
+        window = self.session.windows[0]
+        window.panes = [
+            JmuxPane("", False, "/usr"),
+            JmuxPane("", False, "/"),
+            JmuxPane("", True, "/tmp"),
+            JmuxPane("", False, "/etc"),
+        ]
+        self.session.windows = [window]
+        self.subprocess.return_value.stdout = "$5 @5 %5\n%6\n%7\n%8\n"
+        self.multiplexer.create_session(self.session, focus=False)
+        first = "=session1:{end}.{top-left}"
+        assert self.created_commands()[1:] == [
+            ["splitw", "-t", first, "-c", "/etc", "-PF", "#{pane_id}", "-d"],
+            ["splitw", "-t", first, "-c", "/tmp", "-PF", "#{pane_id}"],
+            ["splitw", "-t", first, "-c", "/", "-PF", "#{pane_id}", "-d"],
+            ["select-layout", "-t", "=session1:{end}", window.layout],
+        ]
+        assert [pane.id for pane in window.panes] == ["%5", "%8", "%7", "%6"]
+
+    def test_one_command_per_session_window_and_pane(self):
+        self.multiplexer.create_session(self.session, focus=False)
+        commands = [command[0] for command in self.created_commands()]
+        assert commands.count("new-session") + commands.count("neww") == 2
+        assert commands.count("splitw") == 2
+        assert "kill-window" not in commands
+        assert "kill-pane" not in commands
 
-    def test_session_with_one_window_creates_session_with_correct_layout(self):
+    def test_focused_pane_is_split_off_without_d(self):
         self.session.windows = self.session.windows[:1]
+        self.session.windows[0].panes[0].focus = False
+        self.session.windows[0].panes[1].focus = True
         self.multiplexer.create_session(self.session)
-        window_id = self.session.windows[0].id
-        layout = self.session.windows[0].layout
-        command = [
-            "/usr/bin/tmux",
+        assert "-d" not in self.created_commands()[1]
+
+    def test_session_name_ending_in_semicolon_is_escaped(self):
+        self.session.name = "session1;"
+        self.multiplexer.create_session(self.session)
+        assert "session1\\;" in self.subprocess.call_args[0][0]
+
+    def test_sets_ids_of_created_session_windows_and_panes(self):
+        self.session = JmuxSession(
+            "",
+            "session1",
+            [
+                JmuxWindow(
+                    "",
+                    "w1",
+                    "tiled",
+                    True,
+                    [JmuxPane("", True, "/"), JmuxPane("", False, "/")],
+                ),
+                JmuxWindow("", "w2", "tiled", False, [JmuxPane("", True, "/")]),
+            ],
+        )
+        self.subprocess.return_value.stdout = "$5 @5 %5\n%6\n@6 %7\n"
+        self.multiplexer.create_session(self.session)
+        assert self.session.id == "$5"
+        assert [window.id for window in self.session.windows] == ["@5", "@6"]
+        assert [pane.id for pane in self.session.windows[0].panes] == ["%5", "%6"]
+        assert self.session.windows[1].panes[0].id == "%7"
+
+
+class TestCreateSessionLazily:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_subprocess, mocker):
+        self.subprocess = mock_subprocess
+        self.multiplexer = TmuxClient()
+        self.multiplexer._bin = "/usr/bin/tmux"
+        mocker.patch.object(self.multiplexer, "is_running", return_value=True)
+        self.subprocess.reset_mock()
+        self.session = JmuxSession(
+            "$1",
+            "session1",
+            [
+                JmuxWindow(f"@{i}", f"w{i}", "tiled", i == 2, [JmuxPane("", True, "/")])
+                for i in range(1, 5)
+            ],
+        )
+        self.session.windows[1].panes.append(JmuxPane("", False, "/tmp"))
+
+    def commands(self, call):
+        return chained_commands(call[0][0])
+
+    def test_creates_and_switches_to_only_the_focused_window(self):
+        self.subprocess.return_value.stdout = "$5 @5 %5\n%6\n"
+        self.multiplexer.create_session_lazily(self.session)
+        self.subprocess.assert_called_once()
+        commands = self.commands(self.subprocess.call_args)
+        assert commands[0][:5] == ["new-session", "-ds", "session1", "-n", "w2"]
+        assert [command[0] for command in commands] == [
+            "new-session",
+            "splitw",
             "select-layout",
-            "-t",
-            window_id,
-            layout,
+            "switch-client",
         ]
-        expected_call = self.mocker.call(command, check=True)
-        call_count = self.subprocess.mock_calls.count(expected_call)
-        assert call_count == 1
+        assert self.session.id == "$5"
+        assert self.session.windows[1].id == "@5"
 
-    def test_session_with_one_window_cleans_default_window(self):
-        self.multiplexer.create_session(self.session)
-        command = [
-            "/usr/bin/tmux",
-            "kill-window",
-            "-t",
-            f"{self.session.id}:1",
+    def test_unfocused_session_does_not_switch_client(self):
+        self.subprocess.return_value.stdout = "$5 @5 %5\n%6\n"
+        self.multiplexer.create_session_lazily(self.session, focus=False)
+        commands = self.commands(self.subprocess.call_args)
+        assert all(command[0] != "switch-client" for command in commands)
+
+    def test_creates_other_windows_nearest_to_the_focused_one_first(self):
+        self.subprocess.return_value.stdout = "$5 @5 %5\n%6\n"
+        windows = self.multiplexer.create_session_lazily(self.session)
+        self.subprocess.return_value.stdout = "@9 %9\n"
+        assert [window.name for window in windows] == ["w3", "w1", "w4"]
+
+    def test_windows_are_inserted_next_to_a_created_neighbour(self):
+        self.subprocess.return_value.stdout = "$5 @5 %5\n%6\n"
+        windows = self.multiplexer.create_session_lazily(self.session)
+        self.subprocess.reset_mock()
+        self.subprocess.side_effect = [
+            completed_process("@6 %6\n"),
+            completed_process(""),
+            completed_process("@7 %7\n"),
+            completed_process(""),
+            completed_process("@8 %8\n"),
+            completed_process(""),
+        ]
+        list(windows)
+        inserts = [
+            call[0][0][1:6]
+            for call in self.subprocess.call_args_list
+            if call[0][0][1] == "neww"
+        ]
+        assert inserts == [
+            ["neww", "-d", "-a", "-t", "@5"],
+            ["neww", "-d", "-b", "-t", "@5"],
+            ["neww", "-d", "-a", "-t", "@6"],
+        ]
+        assert [window.id for window in self.session.windows] == [
+            "@7",
+            "@5",
+            "@6",
+            "@8",
         ]
-        expected_call = self.mocker.call(command, check=True)
-        call_count = self.subprocess.mock_calls.count(expected_call)
-        assert call_count == 1
 
-    def test_session_with_one_window_cleans_default_pane(self):
-        self.session.windows = self.session.windows[:1]
-        self.multiplexer.create_session(self.session)
-        command = [
-            "/usr/bin/tmux",
-            "kill-pane",
-            "-t",
-            f"{self.session.windows[0].id}.1",
+    def test_window_panes_are_split_off_in_the_created_window(self):
+        self.session.windows[1].focus = False
+        self.session.windows[0].focus = True
+        self.subprocess.return_value.stdout = "$5 @5 %5\n"
+        windows = self.multiplexer.create_session_lazily(self.session)
+        self.subprocess.return_value.stdout = "@6 %6\n"
+        next(windows)
+        assert self.commands(self.subprocess.call_args) == [
+            [
+                "splitw",
+                "-t",
+                "@6.{top-left}",
+                "-c",
+                "/tmp",
+                "-PF",
+                "#{pane_id}",
+                "-d",
+            ],
+            ["select-layout", "-t", "@6", "tiled"],
         ]
-        expected_call = self.mocker.call(command, check=True)
-        call_count = self.subprocess.mock_calls.count(expected_call)
-        assert call_count == 1
+
+    def test_tmux_error_creating_a_window_raises_ValueError(self):
+        self.subprocess.return_value.stdout = "$5 @5 %5\n%6\n"
+        windows = self.multiplexer.create_session_lazily(self.session)
+        self.subprocess.side_effect = subprocess.CalledProcessError(
+            1, [], stderr="can't find window: @5"
+        )
+        with pytest.raises(ValueError):
+            next(windows)
+
+    def test_session_with_no_windows_raises_ValueError(self):
+        with pytest.raises(ValueError):
+            self.multiplexer.create_session_lazily(JmuxSession("$1", "session1", []))
+        self.subprocess.assert_not_called()
+
+
+def completed_process(stdout):
+    return subprocess.CompletedProcess([], 0, stdout=stdout)
+
+
+class TestCreateNewSession:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_subprocess, mocker):
+        self.subprocess = mock_subprocess
+        self.multiplexer = TmuxClient()
+        self.multiplexer._bin = "/usr/bin/tmux"
+        mocker.patch.object(self.multiplexer, "is_running", return_value=True)
+        self.subprocess.reset_mock()
+
+    def test_creates_session_and_switches_to_it(self):
+        self.multiplexer.create_new_session("session1")
+        commands = [call[0][0][1] for call in self.subprocess.call_args_list]
+        assert commands == ["new-session", "switch-client"]
+
+    def test_unfocused_session_does_not_switch_client(self):
+        self.multiplexer.create_new_session("session1", focus=False)
+        self.subprocess.assert_called_once_with(
+            ["/usr/bin/tmux", "new-session", "-ds", "session1"], check=True
+        )
 
 
 class TestGetCurrentSessionId:
@@ -420,3 +912,145 @@ class FocusSession:
         expected_call = self.mocker.call(command, check=True)
         call_count = self.subprocess.mock_calls.count(expected_call)
         assert call_count == 1
+
+
+class TestControlMode:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_subprocess, session_labels, mocker):
+        self.subprocess = mock_subprocess
+        self.mocker = mocker
+        self.labels = session_labels
+        self.control = mocker.patch(
+            "src.business_logic.tmux_client.TmuxControlMode"
+        ).return_value
+        self.control.run.return_value = "base-index 1"
+        self.mocker.patch.object(TmuxClient, "is_running", return_value=True)
+        self.subprocess.return_value.stdout = "/dev/pts/1\n"
+        self.multiplexer = TmuxClient(control_mode=True)
+        self.multiplexer._bin = "/usr/bin/tmux"
+        self.subprocess.reset_mock()
+
+    def test_starts_control_mode_connection(self):
+        self.control.start.assert_called_once()
+
+    def test_commands_are_sent_over_control_mode(self):
+        self.control.run.return_value = "$1:session1"
+        self.multiplexer.list_sessions()
+        self.control.run.assert_called_with(
+            ["list-sessions", "-F", "#{session_id}:#{session_name}"]
+        )
+        self.subprocess.assert_not_called()
+
+    def test_switches_the_client_jmux_was_opened_from(self):
+        self.control.run.return_value = "$1:session1"
+        self.multiplexer.focus_session(self.labels[0])
+        self.control.run.assert_called_with(
+            ["switch-client", "-c", "/dev/pts/1", "-t", self.labels[0].id]
+        )
+
+    def test_current_session_is_the_session_of_the_client(self):
+        self.control.run.return_value = "/dev/pts/2:$2:session2\n/dev/pts/1:$1:session1"
+        assert self.multiplexer.get_current_session_label() == self.labels[0]
+
+    def test_errors_raise_ValueError_when_creating_session(self, jmux_session):
+        self.control.run.side_effect = subprocess.CalledProcessError(1, [], "", "err")
+        with pytest.raises(ValueError):
+            self.multiplexer.create_session(jmux_session)
+
+    def test_close_closes_control_mode_connection(self):
+        self.multiplexer.close()
+        self.control.close.assert_called_once()
+
+
+class TestSessionCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_subprocess, session_labels, mocker):
+        self.subprocess = mock_subprocess
+        self.mocker = mocker
+        self.labels = session_labels
+        self.control = mocker.patch(
+            "src.business_logic.tmux_client.TmuxControlMode"
+        ).return_value
+        self.control.run.return_value = "base-index 1"
+        self.control.is_alive.return_value = True
+        self.mocker.patch.object(TmuxClient, "is_running", return_value=True)
+        self.subprocess.return_value.stdout = "/dev/pts/1\n"
+        self.multiplexer = TmuxClient(control_mode=True)
+        self.multiplexer._bin = "/usr/bin/tmux"
+        self.notify = self.control.subscribe.call_args[0][0]
+        self.control.run.reset_mock()
+        self.control.run.return_value = "$1:session1\n$2:session2"
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        self.multiplexer.list_sessions()
+        assert self.multiplexer.list_sessions() == self.labels
+        self.control.run.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "notification",
+        ["sessions-changed", "session-renamed", "client-session-changed", "exit"],
+    )
+    def test_session_notifications_invalidate_the_cache(self, notification):
+        self.multiplexer.list_sessions()
+        self.notify(notification, ["$1", "session1"])
+        self.multiplexer.list_sessions()
+        assert self.control.run.call_count == 2
+
+    def test_unrelated_notifications_keep_the_cache(self):
+        self.multiplexer.list_sessions()
+        self.notify("window-add", ["@1"])
+        self.multiplexer.list_sessions()
+        self.control.run.assert_called_once()
+
+    def test_dead_control_client_refetches_sessions(self):
+        self.multiplexer.list_sessions()
+        self.control.is_alive.return_value = False
+        self.multiplexer.list_sessions()
+        assert self.control.run.call_count == 2
+
+    def test_notification_during_fetch_is_not_lost(self):
+        def list_sessions(command):
+            self.notify("sessions-changed", [])
+            return "$1:session1"
+
+        self.control.run.side_effect = list_sessions
+        self.multiplexer.list_sessions()
+        self.multiplexer.list_sessions()
+        assert self.control.run.call_count == 2
+
+    def test_renaming_a_returned_label_does_not_change_the_cache(self):
+        self.multiplexer.list_sessions()[0].name = "renamed"
+        assert self.multiplexer.list_sessions() == self.labels
+
+    def test_own_changes_invalidate_the_cache(self):
+        self.multiplexer.kill_session(self.labels[0])
+        self.multiplexer.list_sessions()
+        assert self.control.run.call_count == 3
+
+    def test_current_session_is_cached(self):
+        self.control.run.return_value = "/dev/pts/1:$1:session1"
+        self.multiplexer.get_current_session_label()
+        assert self.multiplexer.get_current_session_label() == self.labels[0]
+        self.control.run.assert_called_once()
+
+    def test_without_control_mode_sessions_are_refetched(self):
+        self.mocker.patch.object(TmuxClient, "is_running", return_value=False)
+        self.subprocess.return_value.stdout = "base-index 1"
+        multiplexer = TmuxClient(control_mode=True)
+        self.mocker.patch.object(TmuxClient, "is_running", return_value=True)
+        self.subprocess.reset_mock()
+        self.subprocess.return_value.stdout = "$1:session1\n"
+        multiplexer.list_sessions()
+        multiplexer.list_sessions()
+        assert self.subprocess.call_count == 2
+
+    def test_subscribe_forwards_notifications(self):
+        callback = self.mocker.Mock()
+        assert self.multiplexer.subscribe(callback) is True
+        self.control.subscribe.assert_called_with(callback)
+
+    def test_subscribe_without_control_mode_returns_false(self):
+        self.mocker.patch.object(TmuxClient, "is_running", return_value=False)
+        self.subprocess.return_value.stdout = "base-index 1"
+        multiplexer = TmuxClient(control_mode=True)
+        assert multiplexer.subscribe(self.mocker.Mock()) is False
@@ -0,0 +1,146 @@
+import queue
+import subprocess
+import threading
+
+import pytest
+
+from src.business_logic.tmux_control import TmuxControlMode
+
+
+class FakeControlClient:
+    """
+    Stands in for a `tmux -C` process, answering every command line
+    with the replies queued in `replies`.
+    """
+
+    def __init__(self):
+        self.lines = queue.Queue()
+        self.replies = []
+        self.written = []
+        self.stdin = self
+        self.stdout = iter(self.lines.get, None)
+        self.returncode = None
+        self.lines.put("%begin 1 1 0\n")
+        self.lines.put("%end 1 1 0\n")
+
+    def write(self, data):
+        self.written.append(data)
+        for line in self.replies.pop(0):
+            self.lines.put(None if line is None else line + "\n")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.lines.put(None)
+        self.returncode = 0
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def notify(self, line):
+        self.lines.put(line + "\n")
+
+
+def reply(number, *output, status="%end"):
+    return [f"%begin 1 {number} 1", *output, f"{status} 1 {number} 1"]
+
+
+class TestRun:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        self.process = FakeControlClient()
+        self.popen = mocker.patch("subprocess.Popen", return_value=self.process)
+        self.control = TmuxControlMode("/usr/bin/tmux", timeout=1)
+        self.control.start()
+        yield
+        self.control.close()
+
+    def test_starts_control_client(self):
+        command = self.popen.call_args[0][0]
+        assert command[:3] == ["/usr/bin/tmux", "-C", "attach-session"]
+
+    def test_returns_command_output(self):
+        self.process.replies.append(reply(2, "$1:session1", "$2:session2"))
+        output = self.control.run(["list-sessions", "-F", "#{session_id}"])
+        assert output == "$1:session1\n$2:session2"
+
+    def test_quotes_arguments(self):
+        self.process.replies.append(reply(2))
+        self.control.run(["list-sessions", "-F", "#{session_id}"])
+        assert self.process.written == ["list-sessions -F '#{session_id}'\n"]
+
+    def test_does_not_quote_command_separators(self):
+        self.process.replies.append(reply(2) + reply(3))
+        self.control.run(["kill-session", "-t", "$1", ";", "kill-session", "-t", "$2"])
+        assert self.process.written == ["kill-session -t '$1' ; kill-session -t '$2'\n"]
+
+    def test_chained_commands_return_output_of_all_commands(self):
+        self.process.replies.append(reply(2, "$1") + reply(3, "@1"))
+        output = self.control.run(["new-session", ";", "new-window"])
+        assert output == "$1\n@1"
+
+    def test_error_raises_CalledProcessError(self):
+        self.process.replies.append(reply(2, "can't find session: $9", status="%error"))
+        with pytest.raises(subprocess.CalledProcessError) as error:
+            self.control.run(["kill-session", "-t", "$9"])
+        assert error.value.stderr == "can't find session: $9"
+
+    def test_error_in_chained_commands_raises_CalledProcessError(self):
+        self.process.replies.append(reply(2, "oops", status="%error"))
+        with pytest.raises(subprocess.CalledProcessError):
+            self.control.run(["kill-session", ";", "kill-session"])
+
+    def test_replies_are_matched_in_order(self):
+        self.process.replies.append(reply(2, "first"))
+        self.process.replies.append(reply(3, "second"))
+        assert self.control.run(["display-message"]) == "first"
+        assert self.control.run(["display-message"]) == "second"
+
+    def test_ignores_blocks_not_sent_by_client(self):
+        self.process.replies.append(
+            ["%begin 1 2 0", "hook output", "%end 1 2 0", *reply(3, "mine")]
+        )
+        assert self.control.run(["display-message"]) == "mine"
+
+    def test_command_with_newline_raises_ValueError(self):
+        with pytest.raises(ValueError):
+            self.control.run(["rename-session", "a\nb"])
+
+    def test_notifications_are_passed_to_subscribers(self):
+        notifications = []
+        self.control.subscribe(lambda name, args: notifications.append((name, args)))
+        self.process.notify("%session-renamed $1 new_name")
+        self.process.replies.append(reply(2))
+        self.control.run(["display-message"])
+        assert notifications == [("session-renamed", ["$1", "new_name"])]
+
+    def test_exited_client_fails_pending_commands(self):
+        self.process.replies.append([None])
+        with pytest.raises(ConnectionError):
+            self.control.run(["display-message"])
+
+    def test_submit_returns_future_with_command_output(self):
+        self.process.replies.append(reply(2, "$1"))
+        future = self.control.submit(["display-message", "-p", "#{session_id}"])
+        assert future.result(timeout=1) == "$1"
+
+    def test_exit_notification_detaches_client(self):
+        exited = threading.Event()
+        self.control.subscribe(lambda name, args: exited.set())
+        self.process.notify("%exit")
+        assert exited.wait(1)
+        assert not self.control.is_alive()
+
+    def test_command_after_exit_attaches_new_client(self):
+        self.process.notify("%exit")
+        self.process.close()
+        self.control._reader.join(1)
+        second = FakeControlClient()
+        second.replies.append(reply(2, "$2"))
+        self.popen.return_value = second
+        assert self.control.run(["display-message"]) == "$2"
+        assert self.popen.call_count == 2
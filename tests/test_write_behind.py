@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from src.business_logic.write_behind import WriteBehindQueue
+
+
+class TestWriteBehindQueue:
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        self.mocker = mocker
+        self.write = self.mocker.Mock()
+        self.queue = WriteBehindQueue(self.write, delay=60)
+        yield
+        self.queue.close()
+
+    def test_invalid_delay_raises_value_error(self):
+        with pytest.raises(ValueError):
+            WriteBehindQueue(self.write, delay=-1)
+
+    def test_flush_writes_pending_items_in_one_batch(self):
+        self.queue.put("a", 1)
+        self.queue.put("b", 2)
+        self.queue.flush()
+        self.write.assert_called_once_with([1, 2])
+
+    def test_items_under_same_key_are_coalesced(self):
+        self.queue.put("a", 1)
+        self.queue.put("a", 2)
+        self.queue.flush()
+        self.write.assert_called_once_with([2])
+
+    def test_flush_without_pending_items_does_not_write(self):
+        self.queue.flush()
+        self.write.assert_not_called()
+
+    def test_get_and_discard_pending_item(self):
+        self.queue.put("a", 1)
+        assert self.queue.get("a") == 1
+        assert self.queue.discard("a") == 1
+        assert self.queue.get("a") is None
+
+    def test_pending_items_are_listed(self):
+        self.queue.put("a", 1)
+        self.queue.put("b", 2)
+        assert self.queue.pending() == [1, 2]
+        self.write.assert_not_called()
+
+    def test_failed_write_keeps_items_pending(self):
+        self.write.side_effect = OSError
+        self.queue.put("a", 1)
+        with pytest.raises(OSError):
+            self.queue.flush()
+        assert self.queue.get("a") == 1
+        self.write.side_effect = None
+
+    def test_flushes_after_delay(self):
+        written = threading.Event()
+        queue = WriteBehindQueue(lambda items: written.set(), delay=0.01)
+        queue.put("a", 1)
+        assert written.wait(5)
+        queue.close()
+
+    def test_pending_items_are_flushed_at_exit(self):
+        register = self.mocker.patch("atexit.register")
+        queue = WriteBehindQueue(self.write, delay=60)
+        register.assert_called_once_with(queue.flush)